@@ -2,12 +2,25 @@
 
 import streamlit as st
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from src.data_loader import load_data
-from src.statistics import calculate_descriptive_stats, calculate_correlation
-from src.data_modifier import sample_data, reduce_dimensions, remove_columns
-from src.visualizer import create_plot
+from src.data_loader import load_shared_data, read_csv_columns, resolve_local_path
+from src.samplers import make_sampler
+from src.config import LIVE_POLL_SECONDS, LOCAL_DATA_DIR, TRACING_ENABLED, TRACING_MEMORY
+from src.columnar_loader import detect_columnar_format, inspect_schema, load_columnar_data
+from src.dataset_cache import get_default_cache
+from src.landmarks import DEFAULT_N_LANDMARKS, LARGE_DATA_THRESHOLD
+from src.visualizer import AGGREGATIONS, describe_render_mode
+from src.jobs import get_job_manager, split_finished, run_reduction, run_embedding, run_statistics, run_plot
+from src.pipeline import ModificationPipeline, Operation
+from src.reducers import available_methods
+from src.reducer_comparison import ReducerComparison, comparison_configs, share_array, threads_per_job
+from src.data_modifier import prepare_reduction_input
+from src.block_store import BlockStore, RESULTS_PAGE_SIZE, EXPANDED_BLOCKS, LIVE_REFRESH_BLOCKS
+from src.tracing import Tracer, set_active_tracer, span, summarize
+from src.recipes import RecipeStep, modification_steps, recipe_from_history
+from src.warm_start import PreviousEmbedding
+from src.watched_csv import WatchedCsv
 
 st.set_page_config(layout="wide", page_title="Narzędzie do wizualizacji danych")
 
@@ -15,7 +28,209 @@ st.set_page_config(layout="wide", page_title="Narzędzie do wizualizacji danych"
 if 'data' not in st.session_state:
     st.session_state.data: pd.DataFrame | None = None
 if 'blocks' not in st.session_state:
-    st.session_state.blocks: List[Dict[str, Any]] = []
+    # Bloki wynikowe w postaci zwartej, z limitem pamięci - patrz src/block_store.py
+    st.session_state.blocks = BlockStore()
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = []
+if 'pipeline' not in st.session_state:
+    # Historia modyfikacji nad niezmiennymi danymi źródłowymi - patrz src/pipeline.py
+    st.session_state.pipeline: ModificationPipeline | None = None
+if 'comparisons' not in st.session_state:
+    # Porównania metod redukcji w toku (identyfikator -> ReducerComparison) - patrz src/reducer_comparison.py
+    st.session_state.comparisons = {}
+if 'live_source' not in st.session_state:
+    # Obserwowany plik CSV, do którego dopisywane są wiersze (None - dane wczytane jednorazowo) - patrz src/watched_csv.py
+    st.session_state.live_source: WatchedCsv | None = None
+    st.session_state.live_poll_seconds = LIVE_POLL_SECONDS
+    st.session_state.live_refresh = True
+if 'tracer' not in st.session_state:
+    # Pomiary wydajności etapów sesji (panel 'Wydajność') - None oznacza wyłączone
+    st.session_state.tracer: Tracer | None = Tracer(memory=TRACING_MEMORY) if TRACING_ENABLED else None
+
+job_manager = get_job_manager()
+
+def activate_tracer() -> None:
+    """Ustawia tracer sesji dla bieżącego uruchomienia skryptu i oznacza pomiary identyfikatorem zbioru danych."""
+    tracer = st.session_state.tracer
+    set_active_tracer(tracer)
+    if tracer is not None:
+        handle = st.session_state.get('dataset_handle')
+        tracer.tags['dataset'] = handle.fingerprint if handle is not None else None
+        pipeline = st.session_state.pipeline
+        tracer.tags['node'] = pipeline.current_id if pipeline is not None else None
+
+activate_tracer()
+
+def show_current_data() -> None:
+    """Ustawia dane sesji na (leniwie materializowaną) ramkę bieżącego kroku historii modyfikacji."""
+    pipeline = st.session_state.pipeline
+    st.session_state.data = pipeline.frame() if pipeline is not None else None
+
+def job_origin() -> Dict[str, Any]:
+    """Metadane wiążące zadanie z bieżącym krokiem historii (dane mogą się zmienić, zanim zadanie się skończy)."""
+    pipeline = st.session_state.pipeline
+    return {'pipeline_id': pipeline.pipeline_id, 'node_id': pipeline.current_id, 'revision': pipeline.revision}
+
+def recipe_origin(step: RecipeStep) -> Dict[str, Any]:
+    """Metadane zadania potrzebne do eksportu przepisu: modyfikacje prowadzące do bieżących danych i krok wyniku."""
+    return {'recipe': (modification_steps(st.session_state.pipeline), step)}
+
+def origin_node(job) -> int | None:
+    """Krok historii, dla którego uruchomiono zadanie, lub None, jeśli w międzyczasie wczytano inne dane."""
+    pipeline = st.session_state.pipeline
+    if pipeline is None or job.meta.get('pipeline_id') != pipeline.pipeline_id:
+        return None
+    return job.meta.get('node_id')
+
+def adopt_stats_engine(job, result: Dict[str, Any]) -> None:
+    """Zapamiętuje silnik statystyk zwrócony przez zadanie w kroku historii, dla którego był liczony."""
+    node_id = origin_node(job)
+    if result.get('engine') is not None and node_id is not None:
+        st.session_state.pipeline.set_engine(node_id, result['engine'])
+
+def plot_engine(plot_type: str, node_id: Optional[int] = None):
+    """Silnik statystyk przekazywany do zadania wykresu - potrzebny tylko mapie ciepła (macierz korelacji)."""
+    return st.session_state.pipeline.engine(node_id) if plot_type == 'Mapa ciepła' else None
+
+def store_result_block(job, block_type: str, content) -> None:
+    """Dodaje blok wyniku zadania; wynik przeliczony po dopisaniu wierszy zastępuje treść swojego bloku."""
+    if 'replace_block' in job.meta:
+        st.session_state.blocks.replace(job.meta['replace_block'], content)
+    else:
+        origin = (job.meta['pipeline_id'], job.meta['node_id']) if 'node_id' in job.meta else None
+        st.session_state.blocks.add(block_type, content, job.title, recipe=job.meta.get('recipe'), origin=origin)
+
+def job_result(job) -> Dict[str, Any]:
+    """Wynik zakończonego zadania; pomiary zebrane w procesie roboczym trafiają do tracera sesji."""
+    result = job.future.result()
+    if st.session_state.tracer is not None:
+        st.session_state.tracer.merge(result.get('spans'))
+    return result
+
+def collect_comparison_job(job) -> None:
+    """Zapisuje wynik wariantu porównania metod; po zebraniu wszystkich wariantów dodaje jeden blok z wykresem."""
+    comparison = st.session_state.comparisons.get(job.meta['comparison_id'])
+    if comparison is None:
+        return
+    if job.cancelled:
+        comparison.record_failure(job.meta['label'], "anulowano")
+    elif job.future.exception() is not None:
+        comparison.record_failure(job.meta['label'], str(job.future.exception()))
+    else:
+        result = job_result(job)
+        comparison.record(job.meta['label'], result['embedding'], result['seconds'])
+    if comparison.complete:
+        del st.session_state.comparisons[comparison.comparison_id]
+        comparison.release()
+        st.session_state.blocks.add("plot", comparison.figure(), comparison.title)
+
+def collect_finished_jobs() -> None:
+    """Przenosi wyniki zakończonych zadań w tle do bloków wynikowych (lub do danych sesji)."""
+    finished, pending = split_finished(st.session_state.jobs)
+    st.session_state.jobs = pending
+    for job in finished:
+        if job.kind == 'comparison':
+            collect_comparison_job(job)
+            continue
+        if job.cancelled:
+            st.session_state.blocks.add("message", "Zadanie zostało anulowane.", job.title)
+            continue
+        error = job.future.exception()
+        if error is not None:
+            st.session_state.blocks.add("error", f"Błąd: {error}", job.title)
+        elif job.kind == 'reduction':
+            result = job_result(job)
+            if 'drift' in result:
+                drift = result['drift']
+                st.session_state.blocks.add(
+                    "message",
+                    f"Zgodność sąsiedztw z pełnym dopasowaniem: {drift['knn_agreement']:.2f} "
+                    f"(wiarygodność: pełne {drift['trustworthiness_full']:.3f}, "
+                    f"punkty orientacyjne {drift['trustworthiness_landmarks']:.3f}; "
+                    f"podzbiór {drift['n_eval']} wierszy, {drift['n_landmarks']} punktów orientacyjnych).",
+                    f"Ocena trybu dużych danych ({job.meta['method']})"
+                )
+            node_id = origin_node(job)
+            if node_id is None:
+                continue
+            operation = Operation(
+                'reduce', {'method': job.meta['method'], 'n_components': job.meta['n_components'], 'params': job.meta['params']},
+                f"Redukcja wymiarowości ({job.meta['method']}, {job.meta['n_components']}D)"
+            )
+            st.session_state.pipeline.add_result(operation, result['data'], parent_id=node_id)
+            st.session_state.pipeline.last_embedding = PreviousEmbedding.from_frame(result['data'], job.meta['method'])
+            show_current_data()
+            st.session_state.blocks.add(
+                "message",
+                f"Wykonano redukcję wymiarowości metodą {job.meta['method']} do {job.meta['n_components']} wymiarów. Dane zostały znormalizowane."
+                + (" Start z poprzedniego osadzenia." if job.meta.get('warm_start') else ""),
+                "Komunikat o modyfikacji"
+            )
+        elif job.kind == 'statistics':
+            result = job_result(job)
+            adopt_stats_engine(job, result)
+            store_result_block(job, "dataframe", result['result'])
+        elif job.kind == 'plot':
+            result = job_result(job)
+            adopt_stats_engine(job, result)
+            # Grupy policzone przed dopisaniem wierszy nie trafiają do pamięci podręcznej węzła
+            if result.get('plot_cache') and origin_node(job) is not None and job.meta.get('revision') == st.session_state.pipeline.revision:
+                st.session_state.pipeline.set_plot_cache(origin_node(job), result['plot_cache'])
+            store_result_block(job, "plot", result['figure'])
+
+collect_finished_jobs()
+
+def refresh_results(node_ids: List[int]) -> None:
+    """
+    Przelicza w tle najnowsze tabele i wykresy policzone dla kroków historii, których dane objęły dopisane wiersze;
+    nowe wyniki zastępują treść bloków (bez dodawania kolejnych).
+    """
+    pipeline = st.session_state.pipeline
+    pending = {job.meta.get('replace_block') for job in st.session_state.jobs}
+    recent = [block for block in st.session_state.blocks.blocks if block.recipe is not None][-LIVE_REFRESH_BLOCKS:]
+    for block in recent:
+        if block.block_id in pending or block.origin is None:
+            continue
+        pipeline_id, node_id = block.origin
+        if pipeline_id != pipeline.pipeline_id or node_id not in node_ids:
+            continue
+        step = block.recipe[1]
+        meta = {'pipeline_id': pipeline_id, 'node_id': node_id, 'revision': pipeline.revision,
+                'recipe': block.recipe, 'replace_block': block.block_id}
+        frame = job_manager.share_frame(pipeline.frame(node_id))
+        if step.action == 'statistics':
+            params = step.params
+            job = job_manager.submit('statistics', block.title, run_statistics, frame, pipeline.engine(node_id),
+                                     params['stat_type'], params['corr_method'], params['columns'], params['top_k'], meta=meta)
+        else:
+            plot_type = step.params['plot_type']
+            job = job_manager.submit('plot', block.title, run_plot, frame, plot_engine(plot_type, node_id), plot_type,
+                                     dict(step.params['params']), pipeline.nodes[node_id].plot_cache, meta=meta)
+        st.session_state.jobs.append(job)
+
+def append_live_rows(rows: pd.DataFrame) -> None:
+    """Dołącza wiersze dopisane do obserwowanego pliku do danych źródłowych sesji."""
+    pipeline = st.session_state.pipeline
+    with span('modify.append', rows=len(rows), total=len(pipeline.source) + len(rows)):
+        changed = pipeline.extend_source(st.session_state.live_source.buffer.append(rows))
+    show_current_data()
+    if st.session_state.live_refresh:
+        refresh_results(changed)
+
+@st.fragment(run_every=st.session_state.live_poll_seconds)
+def show_live_panel() -> None:
+    """Sprawdza obserwowany plik co zadany czas; po dopisaniu wierszy dołącza je do danych i odświeża stronę."""
+    source = st.session_state.live_source
+    try:
+        rows = source.poll()
+    except (OSError, ValueError) as e:
+        st.session_state.live_source = None
+        st.session_state.blocks.add("error", f"Obserwowanie pliku zatrzymane: {e}", "Obserwowany plik")
+        st.rerun()
+    if rows is not None and len(rows):
+        append_live_rows(rows)
+        st.rerun()
+    st.caption(f"Obserwowany plik: {source.path} - wierszy: {source.n_rows:,}, sprawdzany co {st.session_state.live_poll_seconds} s.")
 
 st.title("Wizualizacja Dużych Zbiorów Danych")
 st.markdown("---")
@@ -25,28 +240,140 @@ st.header("1. Wczytaj dane")
 
 # Sprawdzamy, czy dane nie zostały już wczytane, aby uniknąć resetowania przy każdej interakcji
 if st.session_state.data is None:
-    uploaded_file = st.file_uploader("Wybierz plik .csv", type="csv")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        sep_input = st.text_input(
-            "Określ separator kolumn", 
-            value="auto", 
-            help="Wpisz znak separatora (np. ';' lub ','). Wpisz 'auto', aby program spróbował wykryć go automatycznie."
-        )
-    
-    with col2:
-        decimal_input = st.selectbox(
-            "Separator dziesiętny",
-            options=['.', ','],
-            index=0,
-            help="Wybierz znak używany jako separator dziesiętny w liczbach"
+    uploaded_file = st.file_uploader("Wybierz plik .csv, .parquet, .feather lub .arrow", type=["csv", "parquet", "feather", "arrow"])
+    data_source = uploaded_file
+    if LOCAL_DATA_DIR is not None:
+        local_path = st.text_input(
+            f"...lub ścieżka pliku na serwerze (względem {LOCAL_DATA_DIR})",
+            help="Duże pliki nie muszą być przesyłane przez przeglądarkę; z próbkowaniem wczytywana jest tylko próbka."
         )
+        if uploaded_file is None and local_path:
+            try:
+                data_source = resolve_local_path(local_path)
+            except ValueError as e:
+                st.error(str(e))
+    source_name = uploaded_file.name if uploaded_file is not None else (data_source or '')
+    file_format = detect_columnar_format(source_name) if data_source is not None else None
+    columnar_schema = None
+    watch_file = False
+
+    if file_format is not None:
+        # Pliki kolumnowe: schemat z metadanych, wybór kolumn i próbki przed wczytaniem danych
+        try:
+            columnar_schema = inspect_schema(data_source, file_format)
+        except Exception as e:
+            st.error(f"Nie udało się odczytać schematu pliku: {e}")
+        if columnar_schema is not None:
+            st.caption(
+                f"Format: {file_format}, wierszy: {columnar_schema.num_rows:,}, kolumn: {len(columnar_schema.columns)}, "
+                f"grup wierszy: {len(columnar_schema.row_group_rows)}"
+            )
+            column_names = [name for name, _ in columnar_schema.columns]
+            selected_load_columns = st.multiselect(
+                "Kolumny do wczytania",
+                options=column_names,
+                default=column_names,
+                format_func=lambda name: f"{name} ({dict(columnar_schema.columns)[name]})",
+                help="Niewybrane kolumny nie są w ogóle odczytywane z pliku."
+            )
+            load_sample = None
+            if st.checkbox("Wczytaj tylko próbkę wierszy", help="Odczytywane są tylko grupy wierszy zawierające próbkę."):
+                col1, col2 = st.columns(2)
+                with col1:
+                    load_sample_method = st.selectbox("Metoda próbkowania", ['Pierwsze n', 'Ostatnie n', 'Losowe n'], key="load_sample_method")
+                with col2:
+                    load_sample_n = st.number_input("Liczba wierszy (n)", min_value=1, max_value=max(1, columnar_schema.num_rows),
+                                                    value=min(10_000, max(1, columnar_schema.num_rows)), key="load_sample_n")
+                load_sample = (load_sample_method, int(load_sample_n))
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            sep_input = st.text_input(
+                "Określ separator kolumn", 
+                value="auto", 
+                help="Wpisz znak separatora (np. ';' lub ','). Wpisz 'auto', aby program spróbował wykryć go automatycznie."
+            )
+        
+        with col2:
+            decimal_input = st.selectbox(
+                "Separator dziesiętny",
+                options=['auto', '.', ','],
+                index=0,
+                help="Wybierz znak używany jako separator dziesiętny w liczbach. Wybierz 'auto', aby program wykrył go na podstawie początku pliku."
+            )
+
+        if isinstance(data_source, str):
+            watch_file = st.checkbox(
+                "Obserwuj plik i wczytuj dopisywane wiersze",
+                help="Plik jest sprawdzany co zadany czas; parsowane są tylko nowe pełne linie (z tymi samymi separatorami i typami kolumn)."
+            )
+            if watch_file:
+                st.session_state.live_poll_seconds = int(st.number_input(
+                    "Sprawdzaj plik co (s)", min_value=1, value=int(st.session_state.live_poll_seconds), step=1
+                ))
 
-    if st.button("Wczytaj dane") and uploaded_file is not None:
-        df = load_data(uploaded_file, separator=sep_input, decimal=decimal_input)
-        if df is not None:
-            st.session_state.data = df
+        load_sampler = None
+        if data_source is not None and not watch_file and st.checkbox(
+            "Wczytaj tylko próbkę wierszy (strumieniowo)",
+            help="Plik jest czytany kawałkami, a w pamięci trzymana jest tylko próbka - działa także dla plików większych niż pamięć."
+        ):
+            col1, col2 = st.columns(2)
+            with col1:
+                load_sample_method = st.selectbox("Metoda próbkowania", ['Pierwsze n', 'Ostatnie n', 'Losowe n', 'Warstwowe n'], key="load_sample_method")
+            with col2:
+                load_sample_n = st.number_input("Liczba wierszy (n)", min_value=1, value=100_000, step=10_000, key="load_sample_n")
+            stratify_column = None
+            if load_sample_method == 'Warstwowe n':
+                try:
+                    header_columns = read_csv_columns(data_source, sep_input)
+                except Exception as e:
+                    st.error(f"Nie udało się odczytać nagłówka pliku: {e}")
+                    header_columns = []
+                stratify_column = st.selectbox("Kolumna warstwowania (kategoryczna)", header_columns)
+            load_sampler = (load_sample_method, int(load_sample_n), stratify_column)
+
+    if st.button("Wczytaj dane") and data_source is not None and (file_format is None or columnar_schema is not None):
+        progress_placeholder = st.empty()
+        handle, live_source = None, None
+        # Ten sam plik otwarty w wielu sesjach jest trzymany w pamięci raz (src/dataset_registry.py)
+        with span('load.total', file=str(source_name), format=file_format or 'csv'):
+            if file_format is not None:
+                handle = load_columnar_data(data_source, columnar_schema, selected_load_columns, load_sample)
+            elif watch_file:
+                # Obserwowany plik się zmienia - wczytanie z pominięciem pamięci podręcznej i rejestru wspólnych zbiorów
+                try:
+                    live_source, live_df = WatchedCsv.open(
+                        data_source, sep_input, decimal_input,
+                        progress_callback=lambda rows: progress_placeholder.text(f"Wczytano {rows:,} wierszy...")
+                    )
+                    st.success(f"Dane zostały pomyślnie wczytane! (separator: '{live_source.separator}', separator dziesiętny: '{live_source.decimal}', wierszy: {len(live_df)})")
+                except Exception as e:
+                    st.error(f"Wystąpił błąd podczas wczytywania pliku: {e}")
+            else:
+                handle = load_shared_data(
+                    data_source,
+                    separator=sep_input,
+                    decimal=decimal_input,
+                    progress_callback=lambda rows: progress_placeholder.text(f"Wczytano {rows:,} wierszy..."),
+                    cache=get_default_cache(),
+                    sampler=make_sampler(*load_sampler) if load_sampler is not None else None
+                )
+        progress_placeholder.empty()
+        if handle is not None or live_source is not None:
+            if st.session_state.get('dataset_handle') is not None:
+                st.session_state.dataset_handle.release()
+            # Uchwyt żyje tak długo jak sesja; po jej zakończeniu odwołanie jest zwalniane automatycznie
+            st.session_state.dataset_handle = handle
+            st.session_state.live_source = live_source
+            # Ustawienia wczytywania trafiają do eksportowanego przepisu analizy (tryb wsadowy, src/batch.py)
+            if file_format is not None:
+                st.session_state.load_settings = {'columns': selected_load_columns if len(selected_load_columns) < len(columnar_schema.columns) else None, 'sample': list(load_sample) if load_sample else None}
+            else:
+                st.session_state.load_settings = {'separator': sep_input, 'decimal': decimal_input,
+                                                  'sampler': list(load_sampler) if load_sampler is not None else None}
+            df = handle.frame if handle is not None else live_df
+            st.session_state.pipeline = ModificationPipeline(df)
+            show_current_data()
             st.subheader("Podgląd wczytanych danych:")
             st.dataframe(df.head())
             
@@ -59,6 +386,8 @@ if st.session_state.data is None:
             st.rerun() # Odświeżamy, aby ukryć opcje wczytywania i pokazać panel
 else:
     st.success("Dane są załadowane. Możesz rozpocząć analizę z panelu bocznego.")
+    if st.session_state.live_source is not None:
+        show_live_panel()
     st.subheader("Podgląd aktualnych danych:")
     st.dataframe(st.session_state.data.head())
 
@@ -67,6 +396,57 @@ if st.session_state.data is not None:
     df = st.session_state.data
     st.sidebar.success("Dane załadowane. Wybierz akcję.")
     
+    pipeline = st.session_state.pipeline
+
+    # --- HISTORIA MODYFIKACJI ---
+    with st.sidebar.expander("Historia modyfikacji", expanded=pipeline.can_undo() or pipeline.can_redo()):
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("↶ Cofnij", disabled=not pipeline.can_undo(), use_container_width=True):
+                pipeline.undo()
+                show_current_data()
+                st.rerun()
+        with col2:
+            if st.button("↷ Ponów", disabled=not pipeline.can_redo(), use_container_width=True):
+                pipeline.redo()
+                show_current_data()
+                st.rerun()
+        node_ids = list(pipeline.nodes)
+        selected_node = st.selectbox(
+            "Krok (także z innych gałęzi)", node_ids, index=node_ids.index(pipeline.current_id),
+            format_func=pipeline.describe,
+            help="Modyfikacja wykonana po cofnięciu tworzy nową gałąź; poprzednie kroki pozostają dostępne."
+        )
+        if selected_node != pipeline.current_id:
+            pipeline.checkout(selected_node)
+            show_current_data()
+            st.rerun()
+
+    # --- OBSERWOWANY PLIK ---
+    if st.session_state.live_source is not None:
+        with st.sidebar.expander("Obserwowany plik", expanded=False):
+            st.session_state.live_refresh = st.checkbox(
+                "Przeliczaj wyniki po dopisaniu wierszy", value=st.session_state.live_refresh,
+                help=f"Najnowsze tabele i wykresy (do {LIVE_REFRESH_BLOCKS}) policzone dla danych obejmujących nowe wiersze są przeliczane w tle."
+            )
+            if st.button("Zakończ obserwowanie", use_container_width=True):
+                st.session_state.live_source = None
+                st.rerun()
+
+    # --- PRZEPIS ANALIZY ---
+    with st.sidebar.expander("Przepis analizy", expanded=False):
+        # Statystyki i wykresy z listy wyników wraz z modyfikacjami danych, dla których je policzono
+        entries = [block.recipe for block in st.session_state.blocks.blocks if block.recipe is not None]
+        recipe = recipe_from_history(st.session_state.get('load_settings', {}), entries)
+        if not entries:
+            recipe.steps = modification_steps(pipeline)
+        st.caption(
+            f"Kroków: {len(recipe.steps)}. Przepis wykonuje te same operacje dla wielu plików bez interfejsu: "
+            "`python -m src.batch przepis.json pliki... --output wyniki`."
+        )
+        st.download_button("Pobierz przepis (JSON)", recipe.to_json(), file_name="przepis.json", mime="application/json",
+                           use_container_width=True, disabled=not recipe.steps)
+
     # --- PANEL STEROWANIA ---
     st.sidebar.header("Panel sterowania")
     action = st.sidebar.radio("Wybierz opcję", ["Modyfikuj dane", "Oblicz statystyki", "Zwizualizuj dane"])
@@ -74,31 +454,23 @@ if st.session_state.data is not None:
     # ... (reszta kodu app.py pozostaje bez zmian) ...
     if action == "Modyfikuj dane":
         st.sidebar.subheader("Opcje modyfikacji")
-        mod_type = st.sidebar.selectbox("Typ modyfikacji", ["Próbkowanie", "Redukcja wymiarowości", "Usuń kolumny"])
+        mod_type = st.sidebar.selectbox("Typ modyfikacji", ["Próbkowanie", "Redukcja wymiarowości", "Porównanie metod redukcji", "Usuń kolumny"])
 
         if mod_type == "Próbkowanie": #
             sample_method = st.sidebar.selectbox("Metoda próbkowania", ['Pierwsze n', 'Ostatnie n', 'Losowe n'])
             n_samples = st.sidebar.slider("Liczba wierszy (n)", 1, len(df), 10)
             if st.sidebar.button("Wykonaj próbkowanie"):
-                st.session_state.data = sample_data(df, sample_method, n_samples)
-                st.session_state.blocks.append({"type": "message", "content": f"Wykonano próbkowanie. Nowa liczba wierszy: {len(st.session_state.data)}.", "title": "Komunikat o modyfikacji"})
+                # Próbka jest widokiem na dane źródłowe (bez kopii), a poprzedni stan pozostaje w historii
+                pipeline.sample(sample_method, n_samples)
+                show_current_data()
+                st.session_state.blocks.add("message", f"Wykonano próbkowanie. Nowa liczba wierszy: {len(st.session_state.data)}.", "Komunikat o modyfikacji")
                 st.rerun()
         
         elif mod_type == "Redukcja wymiarowości":
-            # Sprawdź dostępne metody
-            available_methods = ['t-SNE', 'UMAP']
-            try:
-                from trimap import TRIMAP
-                available_methods.append('TRIMAP')
-            except ImportError:
-                pass
-            try:
-                from pacmap import PaCMAP
-                available_methods.append('PaCMAP')
-            except ImportError:
-                pass
-                
-            dim_red_method = st.sidebar.selectbox("Algorytm", available_methods)
+            # Dostępność metod jest sprawdzana bez importowania bibliotek (src/reducers.py)
+            dim_red_method = st.sidebar.selectbox("Algorytm", available_methods())
+            # Import i kompilacja wybranej metody w tle, zanim użytkownik uruchomi redukcję
+            job_manager.prewarm_reducers([dim_red_method])
             
             # Ograniczenia dla t-SNE
             if dim_red_method == 't-SNE':
@@ -108,6 +480,37 @@ if st.session_state.data is not None:
                 max_comp = 10
                 
             n_comp = st.sidebar.slider("Docelowa liczba wymiarów", 2, max_comp, 2)
+
+            # Tryb dużych danych: dopasowanie na punktach orientacyjnych i rzutowanie pozostałych wierszy
+            large_data_label = st.sidebar.selectbox(
+                "Tryb dużych danych",
+                ['auto', 'włączony', 'wyłączony'],
+                help=f"W trybie 'auto' włącza się powyżej {LARGE_DATA_THRESHOLD:,} wierszy. Reduktor jest dopasowywany na podzbiorze punktów orientacyjnych, a pozostałe wiersze są do niego rzutowane."
+            )
+            large_data = {'auto': 'auto', 'włączony': True, 'wyłączony': False}[large_data_label]
+            reduction_params = {'n_components': n_comp, 'large_data': large_data}
+            check_drift = False
+            if large_data is not False:
+                reduction_params['n_landmarks'] = int(st.sidebar.number_input(
+                    "Liczba punktów orientacyjnych", min_value=500, max_value=200_000, value=DEFAULT_N_LANDMARKS, step=500
+                ))
+                if dim_red_method in ['UMAP', 'PaCMAP']:
+                    placement_label = st.sidebar.selectbox(
+                        "Umieszczanie pozostałych wierszy",
+                        ['transform reduktora', 'interpolacja kNN'],
+                        help="Interpolacja najbliższych sąsiadów jest szybsza, transform reduktora dokładniejszy."
+                    )
+                    reduction_params['placement'] = 'transform' if placement_label == 'transform reduktora' else 'knn'
+                check_drift = st.sidebar.checkbox("Oceń odchylenie od pełnego dopasowania (na podzbiorze)", value=False)
+
+            # Start z poprzedniego osadzenia tej historii: szybsza zbieżność i stabilny układ kolejnych wykresów
+            warm_start = None
+            if pipeline.last_embedding is not None and st.sidebar.checkbox(
+                "Start z poprzedniego osadzenia", value=True,
+                help=f"Wiersze obecne w poprzedniej redukcji ({pipeline.last_embedding.method}) startują z poprzednich położeń, "
+                     "nowe - z położeń najbliższych sąsiadów. Optymalizacja wymaga wtedy mniej iteracji."
+            ):
+                warm_start = pipeline.last_embedding
             
             # Sprawdź czy dane są odpowiednie do redukcji
             numeric_df = df.select_dtypes(include=['number']).dropna()
@@ -120,20 +523,63 @@ if st.session_state.data is not None:
                 
                 if st.sidebar.button("Redukuj wymiary"):
                     try:
-                        with st.spinner(f'Wykonuję redukcję wymiarowości metodą {dim_red_method}...'):
-                            reduced_df = reduce_dimensions(df, dim_red_method, {'n_components': n_comp})
-                            st.session_state.data = reduced_df
-                            st.session_state.blocks.append({
-                                "type": "message", 
-                                "content": f"Wykonano redukcję wymiarowości metodą {dim_red_method} do {n_comp} wymiarów. Dane zostały znormalizowane.", 
-                                "title": "Komunikat o modyfikacji"
-                            })
-                            
-                            st.rerun()  # Dodane odświeżenie
+                        # Redukcja trwa długo - wykonujemy ją w tle, wynik zastąpi dane po zakończeniu
+                        st.session_state.jobs.append(job_manager.submit(
+                            'reduction',
+                            f"Redukcja wymiarowości ({dim_red_method})",
+                            run_reduction, job_manager.share_frame(df), dim_red_method, reduction_params, check_drift, warm_start,
+                            meta={'method': dim_red_method, 'n_components': n_comp, 'params': reduction_params,
+                                  'warm_start': warm_start is not None, **job_origin()}
+                        ))
+                        st.rerun()  # Dodane odświeżenie
                             
                     except Exception as e:
                         st.sidebar.error(f"Błąd: {e}")
 
+        elif mod_type == "Porównanie metod redukcji":
+            # Osadzenia 2D kilku metod i wariantów hiperparametrów obok siebie (dane pozostają bez zmian)
+            methods = available_methods()
+            compare_methods = st.sidebar.multiselect("Metody", methods, default=methods)
+            job_manager.prewarm_reducers(compare_methods)
+            neighborhood_sizes = st.sidebar.multiselect(
+                "Wielkości sąsiedztwa",
+                [5, 10, 15, 30, 50],
+                help="Każda metoda jest dopasowywana z każdą wybraną wartością (perplexity dla t-SNE, n_neighbors dla UMAP i PaCMAP, n_inliers dla TRIMAP). Bez wyboru - wartości domyślne."
+            )
+            non_numeric_columns = df.select_dtypes(exclude=['number']).columns.tolist()
+            color_choice = st.sidebar.selectbox("Kolor punktów", ['(brak)'] + non_numeric_columns)
+            color = None if color_choice == '(brak)' else color_choice
+
+            numeric_df = df.select_dtypes(include=['number']).dropna()
+            if len(numeric_df) < 4 or len(numeric_df.columns) < 2:
+                st.sidebar.warning("Za mało danych do redukcji wymiarowości (minimum 4 wiersze i 2 kolumny numeryczne).")
+            elif st.sidebar.button("Porównaj metody"):
+                try:
+                    configs = comparison_configs(compare_methods, neighborhood_sizes)
+                    # Wspólne przygotowanie danych (wybór kolumn, usunięcie NaN, normalizacja) raz dla wszystkich wariantów;
+                    # zadania odczytują macierz z pliku mapowanego w pamięci zamiast otrzymywać własne kopie
+                    scaled_data, index, _ = prepare_reduction_input(df)
+                    comparison = ReducerComparison(
+                        title=f"Porównanie metod redukcji ({len(configs)} wariantów, {len(index)} wierszy)",
+                        input_path=share_array(scaled_data),
+                        labels=[config.label for config in configs],
+                        color=color,
+                        color_values=df[color].loc[index] if color is not None else None,
+                    )
+                    st.session_state.comparisons[comparison.comparison_id] = comparison
+                    # Rdzenie są dzielone między równoległe dopasowania, aby numba i BLAS nie tworzyły nadmiaru wątków
+                    n_threads = threads_per_job(len(configs), job_manager.max_workers)
+                    for config in configs:
+                        st.session_state.jobs.append(job_manager.submit(
+                            'comparison',
+                            f"Porównanie metod: {config.label}",
+                            run_embedding, comparison.input_path, config.method, config.params({'large_data': 'auto'}), n_threads,
+                            meta={'comparison_id': comparison.comparison_id, 'label': config.label}
+                        ))
+                    st.rerun()
+                except ValueError as e:
+                    st.sidebar.error(f"Błąd: {e}")
+
         elif mod_type == "Usuń kolumny":
             st.sidebar.subheader("Wybór kolumn do usunięcia")
             
@@ -165,17 +611,18 @@ if st.session_state.data is not None:
                         
                         if st.sidebar.button("Usuń wybrane kolumny"):
                             try:
-                                # Usuń wybrane kolumny używając funkcji
-                                modified_df = remove_columns(df, columns_to_remove)
-                                st.session_state.data = modified_df
+                                # Usunięcie kolumn to projekcja danych źródłowych (bez kopii), zapisana w historii
+                                pipeline.remove_columns(columns_to_remove)
+                                show_current_data()
+                                modified_df = st.session_state.data
                                 
                                 # Dodaj komunikat do bloków
                                 removed_columns_str = ", ".join(columns_to_remove)
-                                st.session_state.blocks.append({
-                                    "type": "message", 
-                                    "content": f"Usunięto kolumny: {removed_columns_str}. Pozostało {len(modified_df.columns)} kolumn.",
-                                    "title": "Komunikat o modyfikacji"
-                                })
+                                st.session_state.blocks.add(
+                                    "message",
+                                    f"Usunięto kolumny: {removed_columns_str}. Pozostało {len(modified_df.columns)} kolumn.",
+                                    "Komunikat o modyfikacji"
+                                )
                                 
                                 st.rerun()  # Dodane odświeżenie
                                 
@@ -210,6 +657,10 @@ if st.session_state.data is not None:
         elif stat_type == "Korelacja":
             st.sidebar.subheader("Wybór kolumn")
             corr_method = st.sidebar.selectbox("Metoda korelacji", ['pearson', 'spearman'])
+            top_k = st.sidebar.number_input(
+                "Tylko k najsilniejszych par (0 = pełna macierz)", min_value=0, value=0, step=10,
+                help="Dla wielu kolumn pełna macierz jest bardzo duża; lista par jest porządkowana według wartości bezwzględnej korelacji."
+            )
             use_all_numeric = st.sidebar.checkbox("Użyj wszystkich kolumn numerycznych", value=True)
             
             if not use_all_numeric:
@@ -223,24 +674,23 @@ if st.session_state.data is not None:
         
         if st.sidebar.button("Oblicz"):
             try:
+                column_info = f" (kolumny: {', '.join(selected_columns)})" if selected_columns else " (wszystkie kolumny numeryczne)"
                 if stat_type == "Statystyki opisowe":
-                    stats_df = calculate_descriptive_stats(df, selected_columns)
-                    column_info = f" (kolumny: {', '.join(selected_columns)})" if selected_columns else " (wszystkie kolumny numeryczne)"
-                    st.session_state.blocks.append({
-                        "type": "dataframe", 
-                        "content": stats_df, 
-                        "title": f"Statystyki opisowe{column_info}"
-                    })
-                    
-                elif stat_type == "Korelacja":
-                    corr_df = calculate_correlation(df, corr_method, selected_columns)
-                    column_info = f" (kolumny: {', '.join(selected_columns)})" if selected_columns else " (wszystkie kolumny numeryczne)"
-                    st.session_state.blocks.append({
-                        "type": "dataframe", 
-                        "content": corr_df, 
-                        "title": f"Macierz korelacji ({corr_method}){column_info}"
-                    })
-                
+                    title = f"Statystyki opisowe{column_info}"
+                    corr_method = None
+                    top_k = None
+                elif top_k:
+                    title = f"Najsilniejsze pary korelacji ({corr_method}, k={top_k}){column_info}"
+                else:
+                    title = f"Macierz korelacji ({corr_method}){column_info}"
+
+                st.session_state.jobs.append(job_manager.submit(
+                    'statistics', title, run_statistics, job_manager.share_frame(df), pipeline.engine(), stat_type, corr_method,
+                    selected_columns, int(top_k or 0) or None,
+                    meta={**job_origin(), **recipe_origin(RecipeStep('statistics', {
+                        'stat_type': stat_type, 'corr_method': corr_method, 'columns': selected_columns, 'top_k': int(top_k or 0) or None,
+                    }, title))}
+                ))
                 st.rerun()  # Dodane odświeżenie
                     
             except ValueError as e:
@@ -275,9 +725,18 @@ if st.session_state.data is not None:
             elif plot_type == 'Wykres liniowy':
                 params['x'] = st.sidebar.selectbox("Wybierz kolumnę dla osi X (indeks jeśli brak)", [None] + all_columns, index=0)
                 params['y'] = st.sidebar.selectbox("Wybierz kolumnę dla osi Y", numeric_columns)
+
+            # Agregacja wartości Y w grupach osi X (po stronie serwera) - figura zawiera tylko wartości grup
+            if plot_type in ['Wykres słupkowy', 'Wykres liniowy']:
+                agg_label = st.sidebar.selectbox(
+                    "Agregacja wartości Y", ['brak'] + list(AGGREGATIONS), index=1 if plot_type == 'Wykres słupkowy' else 0,
+                    help="Grupuje wiersze według osi X (i koloru); liczbowa lub czasowa oś X z wieloma wartościami jest dzielona na przedziały."
+                )
+                if agg_label != 'brak':
+                    params['agg'] = AGGREGATIONS[agg_label]
             
             # Opcjonalny parametr 'color' dla wybranych typów wykresów
-            if plot_type in ['Wykres punktowy', 'Histogram', 'Wykres słupkowy', 'Wykres pudełkowy']:
+            if plot_type in ['Wykres punktowy', 'Histogram', 'Wykres słupkowy', 'Wykres liniowy', 'Wykres pudełkowy']:
                 color_options = [None] + categorical_columns + numeric_columns # Kolorować można też wg skali numerycznej
                 selected_color = st.sidebar.selectbox("Koloruj według kolumny (opcjonalnie)", color_options, index=0)
                 if selected_color:
@@ -292,11 +751,13 @@ if st.session_state.data is not None:
                         # Usunięcie klucza, który nie jest parametrem plotly
                         params.pop('x', None)
                         params.pop('y', None)
-                        corr_df = calculate_correlation(df, 'pearson')
-                        params['corr_df'] = corr_df
-                    
-                    fig = create_plot(df, plot_type, params)
-                    st.session_state.blocks.append({"type": "plot", "content": fig, "title": f"Wykres: {plot_type}"})
+
+                    # Macierz korelacji dla mapy ciepła jest liczona w zadaniu w tle (lub brana z silnika statystyk)
+                    st.session_state.jobs.append(job_manager.submit(
+                        'plot', f"Wykres: {plot_type}", run_plot, job_manager.share_frame(df), plot_engine(plot_type), plot_type,
+                        params, pipeline.current.plot_cache,
+                        meta={**job_origin(), **recipe_origin(RecipeStep('plot', {'plot_type': plot_type, 'params': dict(params)}, f"Wykres: {plot_type}"))}
+                    ))
                     st.rerun()
                 except Exception as e:
                     st.sidebar.error(f"Błąd podczas generowania wykresu: {e}")
@@ -305,16 +766,104 @@ if st.session_state.data is not None:
 st.markdown("---")
 st.header("Wyniki analizy")
 
-if not st.session_state.blocks:
+@st.fragment(run_every=1.0)
+def show_jobs_panel() -> None:
+    """Pokazuje postęp zadań w tle; po zakończeniu któregoś odświeża całą stronę, aby dodać wynik."""
+    if any(job.done or job.cancelled for job in st.session_state.jobs):
+        st.rerun()
+    st.subheader("Zadania w toku")
+    for job in st.session_state.jobs:
+        fraction, stage = job_manager.progress(job)
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.progress(fraction, text=f"{job.title} ({job.status}): {stage}")
+        with col2:
+            if st.button("Anuluj", key=f"cancel_{job.job_id}",
+                         help="Przerywa zadanie także w trakcie dopasowania reduktora (zwykle w ciągu ułamka sekundy)."):
+                job_manager.cancel(job)
+                st.rerun()
+
+if st.session_state.jobs:
+    show_jobs_panel()
+
+def show_block(number: int, block) -> None:
+    """Rysuje pojedynczy blok wynikowy; treść tabel i wykresów jest dekodowana tylko dla rozwiniętych bloków."""
+    st.subheader(f"Wynik {number}: {block.title}")
+    if block.type == 'message':
+        st.success(block.text)
+    elif block.type == 'error':
+        st.error(block.text)
+    elif st.toggle("Pokaż", value=number > len(st.session_state.blocks) - EXPANDED_BLOCKS, key=f"show_block_{block.block_id}"):
+        content = st.session_state.blocks.load(block.block_id)
+        if content is None:
+            st.warning("Treść tego wyniku została usunięta z pamięci (przekroczony limit).")
+        elif block.type == 'dataframe':
+            with span('render.dataframe', block=block.block_id, rows=len(content)):
+                st.dataframe(content)
+        elif block.type == 'plot':
+            with span('render.plot', block=block.block_id, traces=len(content.data)):
+                st.plotly_chart(content, use_container_width=True, key=f"plot_block_{block.block_id}")
+            render_info = describe_render_mode(content)
+            if render_info:
+                st.caption(render_info)
+    else:
+        location = {'memory': 'w pamięci', 'disk': 'na dysku', 'evicted': 'usunięty'}[block.location]
+        st.caption(f"Zwinięty ({block.nbytes / 1024:.0f} KB, {location}).")
+    st.markdown("---")
+
+if not st.session_state.blocks and not st.session_state.jobs:
     st.info("Brak wyników do wyświetlenia. Wykonaj akcję z panelu bocznego.")
 else:
-    for i, block in enumerate(reversed(st.session_state.blocks)):
+    blocks = st.session_state.blocks.blocks
+    n_pages = max(1, -(-len(blocks) // RESULTS_PAGE_SIZE))
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(f"Strona wyników (1-{n_pages}, najnowsze na pierwszej)", min_value=1, max_value=n_pages, value=1)
+    start = len(blocks) - (page - 1) * RESULTS_PAGE_SIZE
+    for number in range(start, max(0, start - RESULTS_PAGE_SIZE), -1):
         with st.container():
-            st.subheader(f"Wynik {len(st.session_state.blocks) - i}: {block['title']}")
-            if block['type'] == 'message':
-                st.success(block['content'])
-            elif block['type'] == 'dataframe':
-                st.dataframe(block['content'])
-            elif block['type'] == 'plot':
-                st.plotly_chart(block['content'], use_container_width=True)
-            st.markdown("---")
\ No newline at end of file
+            show_block(number, blocks[number - 1])
+
+# --- PANEL WYDAJNOŚCI ---
+def show_performance_panel() -> None:
+    """Pomiary etapów bieżącej sesji (wczytywanie, modyfikacje, statystyki, wykresy) z eksportem."""
+    with st.sidebar.expander("Wydajność", expanded=False):
+        enabled = st.checkbox("Zbieraj pomiary czasu etapów", value=st.session_state.tracer is not None, key="tracing_enabled")
+        memory = st.checkbox("Mierz szczytowe zużycie pamięci (wolniej)", value=TRACING_MEMORY, disabled=not enabled, key="tracing_memory")
+        if not enabled:
+            st.session_state.tracer = None
+            set_active_tracer(None)
+            st.caption("Pomiary są wyłączone i nie spowalniają obliczeń.")
+            return
+        if st.session_state.tracer is None:
+            st.session_state.tracer = Tracer(memory=memory)
+            activate_tracer()
+        tracer = st.session_state.tracer
+        tracer.memory = memory
+
+        records = tracer.records()
+        if not records:
+            st.caption("Brak pomiarów - wykonaj dowolną akcję.")
+            return
+        st.caption("Podsumowanie według etapu:")
+        st.dataframe(pd.DataFrame(summarize(records)), hide_index=True)
+        st.caption("Ostatnie pomiary (najnowsze na górze, wcięcie oznacza etap wewnętrzny):")
+        st.dataframe(pd.DataFrame([{
+            'etap': '· ' * record['depth'] + record['name'],
+            'czas [ms]': record['wall_seconds'] * 1e3,
+            'CPU [ms]': record['cpu_seconds'] * 1e3,
+            'pamięć [MB]': record['peak_bytes'] / 2**20 if record['peak_bytes'] is not None else None,
+            'parametry': ', '.join(f"{key}={value}" for key, value in record['attrs'].items() if value is not None),
+        } for record in reversed(records[-50:])]), hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("JSON", tracer.to_json(), file_name="pomiary.json", mime="application/json", use_container_width=True)
+        with col2:
+            st.download_button("Chrome trace", tracer.to_chrome_trace(), file_name="pomiary.trace.json", mime="application/json",
+                               use_container_width=True, help="Do otwarcia w chrome://tracing lub ui.perfetto.dev")
+        if st.button("Wyczyść pomiary", use_container_width=True):
+            tracer.clear()
+            st.rerun()
+
+show_performance_panel()
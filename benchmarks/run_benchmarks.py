@@ -0,0 +1,260 @@
+# benchmarks/run_benchmarks.py
+
+"""
+Testy wydajności głównych ścieżek aplikacji (wczytywanie, konwersja typów, próbkowanie,
+redukcja wymiarowości, statystyki, wykresy) na syntetycznych danych - bez uruchamiania Streamlit.
+
+Przykłady (z głównego folderu projektu):
+    python -m benchmarks.run_benchmarks --rows 200000 --columns 30 --output wyniki.json
+    python -m benchmarks.run_benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import streamlit.logger
+from streamlit import config as streamlit_config
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.data_loader import load_data, read_csv_data, detect_and_convert_numeric
+from src.data_modifier import reduce_dimensions, sample_data
+from src.reducers import available_methods
+from src.statistics import calculate_correlation, calculate_descriptive_stats
+from src.synthetic_data import SyntheticSpec, generate_dataframe, write_csv
+from src.visualizer import create_plot
+
+def _silence_streamlit() -> None:
+    """Wycisza ostrzeżenia st.success/st.error wywoływanych bez działającej aplikacji."""
+    # Wczytanie konfiguracji ustawia poziom logowania - nadpisujemy go dopiero potem
+    streamlit_config.get_option('logger.level')
+    streamlit.logger.set_log_level('error')
+
+PLOT_TYPES = ['Histogram', 'Wykres punktowy', 'Wykres liniowy', 'Wykres słupkowy', 'Wykres pudełkowy']
+# Względny wzrost czasu lub pamięci uznawany za regresję
+DEFAULT_TOLERANCE = 0.2
+# Różnice czasu poniżej tej wartości (s) są traktowane jako szum pomiaru
+MIN_TIME_DELTA = 0.01
+_MB = 1024 * 1024
+
+@dataclass
+class BenchmarkCase:
+    """Pojedynczy pomiar: `setup` przygotowuje argumenty (poza pomiarem), `func` jest mierzona."""
+    name: str
+    group: str
+    func: Callable[..., Any]
+    setup: Optional[Callable[[], Tuple]] = None
+    repeat: int = 3
+    extra: Optional[Callable[[Any], Dict[str, Any]]] = None
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    group: str
+    repeat: int
+    seconds_median: float
+    seconds_min: float
+    peak_mb: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+def measure(case: BenchmarkCase) -> BenchmarkResult:
+    """
+    Mierzy szczytowe zużycie pamięci (tracemalloc, osobne wywołanie - śledzenie alokacji spowalnia kod)
+    oraz czas `repeat` wywołań. Alokacje wykonane w `setup` nie są wliczane.
+    """
+    args = case.setup() if case.setup is not None else ()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = case.func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    extra = case.extra(result) if case.extra is not None else {}
+    del result, args
+
+    times = []
+    for _ in range(case.repeat):
+        args = case.setup() if case.setup is not None else ()
+        gc.collect()
+        start = time.perf_counter()
+        case.func(*args)
+        times.append(time.perf_counter() - start)
+        del args
+    return BenchmarkResult(case.name, case.group, case.repeat, statistics.median(times), min(times), peak / _MB, extra)
+
+def _figure_payload(fig) -> Dict[str, Any]:
+    """Rozmiar figury przesyłanej do przeglądarki (JSON Plotly) i liczba serii danych."""
+    payload = pio.to_json(fig, validate=False)
+    render_mode = fig.layout.meta.get('render_mode') if isinstance(fig.layout.meta, dict) else None
+    return {'payload_bytes': len(payload.encode('utf-8')), 'traces': len(fig.data), 'render_mode': render_mode}
+
+def build_cases(spec: SyntheticSpec, csv_path: Path, reduce_rows: int, methods: List[str], repeat: int) -> List[BenchmarkCase]:
+    """Tworzy listę pomiarów dla zbioru opisanego przez `spec` (zapisanego w `csv_path`)."""
+    decimal = ',' if spec.decimal_comma else '.'
+    df = generate_dataframe(spec)
+    numeric = df.select_dtypes(include=['number']).columns.tolist()
+    text = df.select_dtypes(exclude=['number']).columns.tolist()
+    n_sample = max(1, spec.n_rows // 10)
+
+    cases = [
+        BenchmarkCase('load_data', 'load', lambda: load_data(str(csv_path), 'auto', 'auto'), repeat=repeat,
+                      extra=lambda loaded: {'rows': len(loaded), 'memory_mb': loaded.memory_usage(deep=True).sum() / _MB}),
+        # Konwersja typów działa w miejscu - każde wywołanie dostaje świeżo sparsowaną ramkę
+        BenchmarkCase('detect_and_convert_numeric', 'load', lambda raw: detect_and_convert_numeric(raw, decimal),
+                      setup=lambda: (read_csv_data(str(csv_path), ';', decimal),), repeat=repeat),
+    ]
+    for method in ['Pierwsze n', 'Ostatnie n', 'Losowe n']:
+        cases.append(BenchmarkCase(f'sample_data[{method}]', 'modify', lambda method=method: sample_data(df, method, n_sample), repeat=repeat))
+
+    if len(numeric) >= 2:
+        reduce_df = sample_data(df, 'Losowe n', reduce_rows)
+        for method in methods:
+            # Bez pamięci podręcznej osadzeń - mierzymy obliczenia, a nie odczyt wyniku
+            cases.append(BenchmarkCase(f'reduce_dimensions[{method}]', 'modify',
+                                       lambda method=method: reduce_dimensions(reduce_df, method, {'n_components': 2, 'use_cache': False}),
+                                       repeat=1))
+
+    if numeric:
+        cases.append(BenchmarkCase('calculate_descriptive_stats', 'stats', lambda: calculate_descriptive_stats(df), repeat=repeat))
+        for corr_method in ['pearson', 'spearman']:
+            cases.append(BenchmarkCase(f'calculate_correlation[{corr_method}]', 'stats',
+                                       lambda corr_method=corr_method: calculate_correlation(df, corr_method), repeat=repeat))
+
+        x, y = numeric[0], numeric[min(1, len(numeric) - 1)]
+        color = text[0] if text else None
+        plot_params = {
+            'Histogram': {'x': x, 'color': color},
+            'Wykres punktowy': {'x': x, 'y': y, 'color': color},
+            'Wykres liniowy': {'x': x, 'y': y},
+            'Wykres słupkowy': {'x': color or x, 'y': y},
+            'Wykres pudełkowy': {'y': y, 'color': color},
+        }
+        for plot_type in PLOT_TYPES:
+            # create_plot może zmieniać słownik parametrów - każde wywołanie dostaje kopię
+            cases.append(BenchmarkCase(f'create_plot[{plot_type}]', 'plot',
+                                       lambda params, plot_type=plot_type: create_plot(df, plot_type, params),
+                                       setup=lambda plot_type=plot_type: (dict(plot_params[plot_type]),),
+                                       repeat=repeat, extra=_figure_payload))
+    return cases
+
+def environment_info() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Porównuje wyniki z zapisanymi wynikami odniesienia. Zwraca listę regresji: pomiary, których
+    mediana czasu lub szczyt pamięci wzrosły o więcej niż `tolerance` (czas - także o więcej niż MIN_TIME_DELTA).
+    """
+    reference = {item['name']: item for item in baseline.get('results', [])}
+    regressions = []
+    for item in results:
+        before = reference.get(item['name'])
+        if before is None:
+            continue
+        time_ratio = item['seconds_median'] / before['seconds_median'] if before['seconds_median'] else float('inf')
+        if time_ratio > 1 + tolerance and item['seconds_median'] - before['seconds_median'] > MIN_TIME_DELTA:
+            regressions.append({'name': item['name'], 'metric': 'seconds_median', 'baseline': before['seconds_median'],
+                                'current': item['seconds_median'], 'ratio': time_ratio})
+        memory_ratio = item['peak_mb'] / before['peak_mb'] if before['peak_mb'] else 1.0
+        if memory_ratio > 1 + tolerance and item['peak_mb'] - before['peak_mb'] > 1.0:
+            regressions.append({'name': item['name'], 'metric': 'peak_mb', 'baseline': before['peak_mb'],
+                                'current': item['peak_mb'], 'ratio': memory_ratio})
+    return regressions
+
+def print_report(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Any]] = None,
+                 regressions: Optional[List[Dict[str, Any]]] = None, file=sys.stderr) -> None:
+    """Tabela wyników (na stderr, żeby standardowe wyjście pozostało poprawnym JSON-em)."""
+    reference = {item['name']: item for item in (baseline or {}).get('results', [])}
+    print(f"{'pomiar':<40} {'mediana [s]':>12} {'min [s]':>10} {'pamięć [MB]':>12} {'zmiana':>8}", file=file)
+    for item in results:
+        before = reference.get(item['name'])
+        change = f"{item['seconds_median'] / before['seconds_median'] - 1:+.0%}" if before and before['seconds_median'] else ''
+        print(f"{item['name']:<40} {item['seconds_median']:>12.4f} {item['seconds_min']:>10.4f} {item['peak_mb']:>12.1f} {change:>8}", file=file)
+    for regression in regressions or []:
+        print(f"REGRESJA {regression['name']} ({regression['metric']}): "
+              f"{regression['baseline']:.4f} -> {regression['current']:.4f} ({regression['ratio']:.2f}x)", file=file)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Testy wydajności na syntetycznych danych.")
+    parser.add_argument('--rows', type=int, default=100_000, help="Liczba wierszy zbioru.")
+    parser.add_argument('--columns', type=int, default=20, help="Liczba kolumn numerycznych.")
+    parser.add_argument('--text-columns', type=int, default=2, help="Liczba kolumn tekstowych (kategorycznych).")
+    parser.add_argument('--categories', type=int, default=10, help="Liczba różnych wartości w kolumnach tekstowych.")
+    parser.add_argument('--nan-rate', type=float, default=0.0, help="Odsetek braków danych w kolumnach numerycznych.")
+    parser.add_argument('--decimal-comma', action='store_true', help="Zapisz liczby z przecinkiem dziesiętnym.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reduce-rows', type=int, default=2_000, help="Liczba wierszy dla redukcji wymiarowości.")
+    parser.add_argument('--methods', nargs='*', default=None, help="Metody redukcji (domyślnie wszystkie dostępne; brak wartości pomija redukcję).")
+    parser.add_argument('--groups', nargs='*', default=None, help="Grupy pomiarów: load, modify, stats, plot (domyślnie wszystkie).")
+    parser.add_argument('--repeat', type=int, default=3, help="Liczba powtórzeń pomiaru czasu.")
+    parser.add_argument('--output', type=Path, default=None, help="Plik JSON z wynikami (domyślnie standardowe wyjście).")
+    parser.add_argument('--baseline', type=Path, default=None, help="Plik JSON z wynikami odniesienia do porównania.")
+    parser.add_argument('--save-baseline', type=Path, default=None, help="Zapisz wyniki jako nowe wyniki odniesienia.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Dopuszczalny względny wzrost czasu i pamięci.")
+    parser.add_argument('--generate-only', type=Path, default=None, help="Tylko zapisz syntetyczny plik CSV pod podaną ścieżką.")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    _silence_streamlit()
+    spec = SyntheticSpec(args.rows, args.columns, args.text_columns, args.categories, args.nan_rate, args.decimal_comma, args.seed)
+
+    if args.generate_only is not None:
+        write_csv(spec, args.generate_only)
+        print(f"Zapisano {args.generate_only} ({spec.n_rows} wierszy)", file=sys.stderr)
+        return 0
+
+    available = available_methods()
+    methods = available if args.methods is None else [m for m in args.methods if m in available]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = write_csv(spec, Path(tmp_dir) / 'benchmark.csv')
+        cases = build_cases(spec, csv_path, args.reduce_rows, methods, args.repeat)
+        if args.groups is not None:
+            cases = [case for case in cases if case.group in args.groups]
+        results = []
+        for case in cases:
+            print(f"... {case.name}", file=sys.stderr)
+            results.append(asdict(measure(case)))
+
+    report = {'environment': environment_info(), 'spec': spec.to_dict(), 'results': results}
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8')) if args.baseline is not None else None
+    if baseline is not None:
+        if baseline.get('spec') != report['spec']:
+            print("Uwaga: wyniki odniesienia dotyczą innego zbioru danych - porównanie może być mylące.", file=sys.stderr)
+        report['regressions'] = compare(results, baseline, args.tolerance)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False, default=str)
+    if args.output is not None:
+        args.output.write_text(text, encoding='utf-8')
+    else:
+        print(text)
+    if args.save_baseline is not None:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(text, encoding='utf-8')
+
+    print_report(results, baseline, report.get('regressions'))
+    return 1 if report.get('regressions') else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# src/batch.py
+
+"""
+Tryb wsadowy: wykonuje przepis analizy (wczytanie -> modyfikacje -> statystyki -> wykresy)
+dla wielu plików bez interfejsu Streamlit, w puli procesów (jeden plik na proces).
+Tabele są zapisywane jako Parquet, wykresy jako HTML (lub PNG/SVG z pakietem kaleido).
+
+Przykłady (z głównego folderu projektu):
+    python -m src.batch przepis.json dane/*.csv --output wyniki
+    python -m src.batch przepis.json dane/ --output wyniki --workers 4 --figure-format png
+"""
+
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import traceback
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.recipes import MODIFY_ACTIONS, RESET_ACTION, Recipe, apply_modification, compute_output
+
+# Rozszerzenia plików wejściowych wyszukiwanych w podanych katalogach
+INPUT_EXTENSIONS = ('.csv', '.parquet', '.pq', '.feather', '.arrow', '.ipc')
+FIGURE_FORMATS = ('html', 'png', 'svg', 'json')
+# Nazwa pliku z podsumowaniem przebiegu (w katalogu wyników)
+REPORT_FILE = 'raport.json'
+# Maksymalna długość części nazwy pliku wyniku utworzonej z tytułu kroku
+SLUG_MAX_CHARS = 60
+
+def _silence_streamlit() -> None:
+    """Wycisza ostrzeżenia Streamlit o braku działającej aplikacji (moduły ładujące importują streamlit)."""
+    import streamlit.logger
+    from streamlit import config as streamlit_config
+    # Wczytanie konfiguracji ustawia poziom logowania - nadpisujemy go dopiero potem
+    streamlit_config.get_option('logger.level')
+    streamlit.logger.set_log_level('error')
+
+def _slug(text: str) -> str:
+    slug = re.sub(r'[^\w-]+', '_', text, flags=re.UNICODE).strip('_')
+    return slug[:SLUG_MAX_CHARS] or 'wynik'
+
+def collect_inputs(patterns: List[str]) -> List[Path]:
+    """Rozwija argumenty na listę plików: katalogi (pliki o obsługiwanych rozszerzeniach) i wzorce glob."""
+    files: List[Path] = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.is_file() and p.suffix.lower() in INPUT_EXTENSIONS))
+        elif path.is_file():
+            files.append(path)
+        else:
+            matches = sorted(p for p in Path().glob(pattern) if p.is_file())
+            if not matches:
+                raise ValueError(f"Nie znaleziono plików: {pattern}")
+            files.extend(matches)
+    return list(dict.fromkeys(p.resolve() for p in files))
+
+def output_dirs(files: List[Path], output: Path) -> List[Path]:
+    """Katalog wyników każdego pliku: nazwa pliku bez rozszerzenia, z numerem przy powtórzeniach."""
+    used: Dict[str, int] = {}
+    dirs = []
+    for path in files:
+        name = _slug(path.stem)
+        used[name] = used.get(name, 0) + 1
+        dirs.append(output / (name if used[name] == 1 else f"{name}_{used[name]}"))
+    return dirs
+
+def load_file(path: str, load: Dict[str, Any]) -> pd.DataFrame:
+    """Wczytuje plik według ustawień 'load' przepisu (CSV lub plik kolumnowy), bez komunikatów interfejsu."""
+    from src.columnar_loader import detect_columnar_format, inspect_schema, read_columnar
+    from src.data_loader import read_data
+    from src.samplers import make_sampler
+
+    file_format = detect_columnar_format(path)
+    if file_format is not None:
+        schema = inspect_schema(path, file_format)
+        sample = tuple(load['sample']) if load.get('sample') else None
+        return read_columnar(path, schema, load.get('columns'), sample)
+    sampler = make_sampler(*load['sampler']) if load.get('sampler') else None
+    return read_data(path, load.get('separator', 'auto'), load.get('decimal', 'auto'), sampler=sampler).frame
+
+def _write_table(df: pd.DataFrame, path: Path) -> Path:
+    path = path.with_suffix('.parquet')
+    try:
+        df.to_parquet(path)
+    except (ValueError, TypeError):
+        # Np. nazwy kolumn niebędące napisami - Parquet ich nie obsługuje
+        df.rename(columns=str).to_parquet(path)
+    return path
+
+def _write_figure(fig, path: Path, figure_format: str) -> Path:
+    path = path.with_suffix(f'.{figure_format}')
+    if figure_format == 'html':
+        fig.write_html(path, include_plotlyjs='cdn')
+    elif figure_format == 'json':
+        fig.write_json(path)
+    else:
+        fig.write_image(path)
+    return path
+
+def run_file(recipe_data: Dict[str, Any], input_path: str, output_dir: str, figure_format: str = 'html') -> Dict[str, Any]:
+    """
+    Wykonuje przepis dla jednego pliku i zapisuje wyniki w `output_dir`. Wywoływana w procesie roboczym;
+    błąd kroku przerywa przetwarzanie tego pliku i jest zwracany w raporcie (pozostałe pliki są przetwarzane dalej).
+    """
+    _silence_streamlit()
+    recipe = Recipe.from_dict(recipe_data)
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    report: Dict[str, Any] = {'input': input_path, 'output': output_dir, 'outputs': [], 'error': None}
+    start = time.perf_counter()
+    try:
+        loaded = load_file(input_path, recipe.load)
+        report['rows'] = len(loaded)
+        df = loaded
+        for number, step in enumerate(recipe.steps, start=1):
+            if step.action == RESET_ACTION:
+                df = loaded
+            elif step.action in MODIFY_ACTIONS:
+                df = apply_modification(df, step)
+            else:
+                result = compute_output(df, step)
+                target = output / f"{number:02d}_{_slug(step.title or step.action)}"
+                if isinstance(result, pd.DataFrame):
+                    target = _write_table(result, target)
+                else:
+                    target = _write_figure(result, target, figure_format)
+                report['outputs'].append(str(target))
+    except Exception as e:
+        report['error'] = f"{type(e).__name__}: {e}"
+        report['traceback'] = traceback.format_exc()
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+def run_batch(recipe: Recipe, files: List[Path], output: Path, workers: int = 1, figure_format: str = 'html') -> List[Dict[str, Any]]:
+    """
+    Wykonuje przepis dla wszystkich plików - w puli `workers` procesów (1 = kolejno w bieżącym procesie).
+    Zapisuje podsumowanie w output/raport.json i zwraca raporty plików w kolejności wejścia.
+    """
+    output.mkdir(parents=True, exist_ok=True)
+    dirs = output_dirs(files, output)
+    tasks = [(recipe.to_dict(), str(path), str(out), figure_format) for path, out in zip(files, dirs)]
+    reports: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+
+    if workers <= 1 or len(tasks) <= 1:
+        for i, task in enumerate(tasks):
+            reports[i] = run_file(*task)
+            _print_progress(reports[i], i + 1, len(tasks))
+    else:
+        # 'spawn' jak w puli zadań aplikacji; każdy proces przetwarza całe pliki
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_limit_worker_threads, initargs=(workers,)) as executor:
+            futures = {executor.submit(run_file, *task): i for i, task in enumerate(tasks)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                reports[futures[future]] = future.result()
+                _print_progress(reports[futures[future]], done, len(tasks))
+
+    summary = {'recipe': recipe.to_dict(), 'figure_format': figure_format, 'files': reports}
+    (output / REPORT_FILE).write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding='utf-8')
+    return reports
+
+def _limit_worker_threads(workers: int) -> None:
+    """Dzieli rdzenie między procesy, aby biblioteki BLAS w równoległych procesach nie tworzyły nadmiaru wątków."""
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(limits=max(1, (os.cpu_count() or 1) // workers))
+
+def _print_progress(report: Dict[str, Any], done: int, total: int) -> None:
+    status = f"błąd: {report['error']}" if report['error'] else f"{len(report['outputs'])} wyników"
+    print(f"[{done}/{total}] {report['input']} - {status} ({report['seconds']:.1f} s)", file=sys.stderr)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Wykonanie przepisu analizy dla wielu plików bez interfejsu Streamlit.")
+    parser.add_argument('recipe', type=Path, help="Plik JSON z przepisem (eksportowany z aplikacji: 'Przepis analizy').")
+    parser.add_argument('inputs', nargs='+', help="Pliki wejściowe, katalogi lub wzorce glob.")
+    parser.add_argument('--output', type=Path, default=Path('wyniki'), help="Katalog wyników (podkatalog dla każdego pliku).")
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help="Liczba procesów (1 = kolejno).")
+    parser.add_argument('--figure-format', choices=FIGURE_FORMATS, default='html', help="Format zapisu wykresów (png i svg wymagają pakietu kaleido).")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    _silence_streamlit()
+    try:
+        recipe = Recipe.read(args.recipe)
+        files = collect_inputs(args.inputs)
+        if args.figure_format in ('png', 'svg') and importlib.util.find_spec('kaleido') is None:
+            raise ValueError("Zapis wykresów do PNG/SVG wymaga pakietu kaleido (pip install kaleido).")
+    except (OSError, ValueError) as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 2
+
+    reports = run_batch(recipe, files, args.output, args.workers, args.figure_format)
+    failed = [report for report in reports if report['error']]
+    print(f"Przetworzono {len(reports)} plików, błędy: {len(failed)}. Podsumowanie: {args.output / REPORT_FILE}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+# src/block_store.py
+
+import io
+import itertools
+import pickle
+import shutil
+import threading
+import uuid
+import weakref
+import zlib
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+from src.config import CACHE_DIR, RESULTS_MEMORY_MB, RESULTS_SPILL
+from src.tracing import span
+
+BlockType = Literal['message', 'error', 'dataframe', 'plot']
+BlockLocation = Literal['memory', 'disk', 'evicted']
+
+# Liczba ostatnio wyświetlanych bloków trzymanych w postaci zdekodowanej (Figure / DataFrame)
+DECODED_BLOCKS = 4
+# Liczba bloków na stronie listy wyników
+RESULTS_PAGE_SIZE = 5
+# Liczba najnowszych bloków domyślnie rozwiniętych (pozostałe są rysowane dopiero po rozwinięciu)
+EXPANDED_BLOCKS = 2
+# Liczba najnowszych wyników (tabel i wykresów) przeliczanych po dopisaniu wierszy do obserwowanego pliku
+LIVE_REFRESH_BLOCKS = 4
+_ZLIB_LEVEL = 6
+
+@dataclass
+class BlockInfo:
+    """Metadane bloku wynikowego (zawsze w pamięci); treść jest przechowywana osobno w postaci zwartej."""
+    block_id: int
+    type: BlockType
+    title: str
+    nbytes: int
+    location: BlockLocation
+    text: Optional[str] = None  # treść komunikatów (typy 'message' i 'error')
+    recipe: Optional[Any] = None  # (modyfikacje danych, krok wyniku) do eksportu przepisu analizy - src/recipes.py
+    origin: Optional[Tuple[str, int]] = None  # (historia, krok historii) danych, dla których policzono wynik
+
+def _encode(block_type: BlockType, content: Any) -> bytes:
+    """
+    Serializuje treść bloku: tabele do Parquet (kompresja zstd), wykresy do JSON Plotly
+    (tablice liczbowe zakodowane binarnie jako typed arrays) skompresowanego zlib.
+    """
+    if block_type == 'dataframe':
+        buffer = io.BytesIO()
+        try:
+            content.to_parquet(buffer, compression='zstd')
+            return b'P' + buffer.getvalue()
+        except (ValueError, TypeError):
+            # Np. nazwy kolumn niebędące napisami - Parquet ich nie obsługuje
+            return b'K' + zlib.compress(pickle.dumps(content, protocol=pickle.HIGHEST_PROTOCOL), _ZLIB_LEVEL)
+    if block_type == 'plot':
+        return b'J' + zlib.compress(pio.to_json(content, validate=False, engine='json').encode('utf-8'), _ZLIB_LEVEL)
+    raise ValueError(f"Nieobsługiwany typ bloku do serializacji: {block_type}")
+
+def _decode(payload: bytes) -> Union[pd.DataFrame, go.Figure]:
+    tag, data = payload[:1], payload[1:]
+    if tag == b'P':
+        return pd.read_parquet(io.BytesIO(data))
+    if tag == b'K':
+        return pickle.loads(zlib.decompress(data))
+    if tag == b'J':
+        return pio.from_json(zlib.decompress(data).decode('utf-8'), skip_invalid=True)
+    raise ValueError("Nieznany format zapisanego bloku.")
+
+class BlockStore:
+    """
+    Ograniczona pamięciowo lista bloków wynikowych sesji ('Wyniki analizy').
+
+    Tabele i wykresy są przechowywane w postaci zwartej (Parquet, skompresowany JSON Plotly),
+    a po przekroczeniu limitu pamięci najdawniej używane treści są zapisywane na dysku
+    (lub usuwane, jeśli zapis na dysku jest wyłączony). Dekodowane są tylko wyświetlane bloki,
+    a kilka ostatnio wyświetlonych jest trzymanych w postaci gotowej do narysowania.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, spill_dir: Optional[Union[str, Path]] = None,
+                 spill: bool = RESULTS_SPILL):
+        self.max_bytes = max_bytes if max_bytes is not None else RESULTS_MEMORY_MB * 1024 * 1024
+        self._ids = itertools.count(1)
+        self._blocks: List[BlockInfo] = []
+        self._payloads: 'OrderedDict[int, bytes]' = OrderedDict()
+        self._decoded: 'OrderedDict[int, Any]' = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.spill_dir: Optional[Path] = None
+        if spill:
+            base_dir = Path(spill_dir) if spill_dir is not None else CACHE_DIR / 'results'
+            self.spill_dir = base_dir / uuid.uuid4().hex
+            # Katalog sesji jest usuwany razem z magazynem (koniec sesji)
+            weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    @property
+    def blocks(self) -> List[BlockInfo]:
+        return list(self._blocks)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def add(self, block_type: BlockType, content: Any, title: str, recipe: Optional[Any] = None,
+            origin: Optional[Tuple[str, int]] = None) -> BlockInfo:
+        """
+        Dodaje blok wynikowy; komunikaty są przechowywane wprost, tabele i wykresy w postaci zwartej.
+        `recipe` opisuje, jak odtworzyć wynik w trybie wsadowym (patrz src/recipes.py),
+        a `origin` - dla których danych go policzono (przeliczenie po dopisaniu wierszy).
+        """
+        with self._lock:
+            block_id = next(self._ids)
+            if block_type in ('message', 'error'):
+                info = BlockInfo(block_id, block_type, title, 0, 'memory', text=str(content))
+            else:
+                with span('render.encode', block_type=block_type) as stage:
+                    payload = _encode(block_type, content)
+                    stage.set(bytes=len(payload))
+                info = BlockInfo(block_id, block_type, title, len(payload), 'memory', recipe=recipe, origin=origin)
+                self._payloads[block_id] = payload
+                self._memory_bytes += len(payload)
+                self._remember_decoded(block_id, content)
+            self._blocks.append(info)
+            self._enforce_limit()
+            return info
+
+    def _info(self, block_id: int) -> BlockInfo:
+        for info in self._blocks:
+            if info.block_id == block_id:
+                return info
+        raise KeyError(block_id)
+
+    def _spill_path(self, block_id: int) -> Path:
+        return self.spill_dir / f"{block_id}.bin"
+
+    def _remember_decoded(self, block_id: int, content: Any) -> None:
+        self._decoded[block_id] = content
+        self._decoded.move_to_end(block_id)
+        while len(self._decoded) > DECODED_BLOCKS:
+            self._decoded.popitem(last=False)
+
+    def _enforce_limit(self) -> None:
+        """Przenosi na dysk (lub usuwa) najdawniej używane treści, aż zmieszczą się w limicie pamięci."""
+        # Ostatnio używany blok zostaje w pamięci nawet wtedy, gdy sam przekracza limit
+        while self._memory_bytes > self.max_bytes and len(self._payloads) > 1:
+            block_id, payload = self._payloads.popitem(last=False)
+            self._memory_bytes -= len(payload)
+            self._decoded.pop(block_id, None)
+            info = self._info(block_id)
+            if self.spill_dir is not None:
+                self.spill_dir.mkdir(parents=True, exist_ok=True)
+                self._spill_path(block_id).write_bytes(payload)
+                info.location = 'disk'
+            else:
+                info.location = 'evicted'
+
+    def load(self, block_id: int) -> Optional[Union[pd.DataFrame, go.Figure]]:
+        """Zwraca zdekodowaną treść bloku (tabelę lub wykres) albo None, jeśli została usunięta."""
+        with self._lock:
+            if block_id in self._decoded:
+                self._decoded.move_to_end(block_id)
+                if block_id in self._payloads:
+                    self._payloads.move_to_end(block_id)
+                return self._decoded[block_id]
+
+            info = self._info(block_id)
+            if info.location == 'evicted':
+                return None
+            if info.location == 'disk':
+                payload = self._spill_path(block_id).read_bytes()
+                # Odczytany blok wraca do pamięci jako ostatnio używany
+                self._spill_path(block_id).unlink(missing_ok=True)
+                self._payloads[block_id] = payload
+                self._memory_bytes += len(payload)
+                info.location = 'memory'
+            else:
+                payload = self._payloads[block_id]
+                self._payloads.move_to_end(block_id)
+
+            with span('render.decode', block_type=info.type, bytes=len(payload)):
+                content = _decode(payload)
+            self._remember_decoded(block_id, content)
+            self._enforce_limit()
+            return content
+
+    def replace(self, block_id: int, content: Any) -> bool:
+        """
+        Zastępuje treść tabeli lub wykresu (np. przeliczonego po dopisaniu wierszy), zachowując miejsce bloku na liście.
+        Zwraca False, jeśli bloku już nie ma.
+        """
+        with self._lock:
+            info = next((info for info in self._blocks if info.block_id == block_id), None)
+            if info is None or info.type in ('message', 'error'):
+                return False
+            with span('render.encode', block_type=info.type) as stage:
+                payload = _encode(info.type, content)
+                stage.set(bytes=len(payload))
+            old_payload = self._payloads.pop(block_id, None)
+            if old_payload is not None:
+                self._memory_bytes -= len(old_payload)
+            if info.location == 'disk':
+                self._spill_path(block_id).unlink(missing_ok=True)
+            info.nbytes, info.location = len(payload), 'memory'
+            self._payloads[block_id] = payload
+            self._memory_bytes += len(payload)
+            self._remember_decoded(block_id, content)
+            self._enforce_limit()
+            return True
+
+    def remove(self, block_id: int) -> None:
+        """Usuwa blok wraz z jego treścią."""
+        with self._lock:
+            info = self._info(block_id)
+            self._blocks.remove(info)
+            self._decoded.pop(block_id, None)
+            payload = self._payloads.pop(block_id, None)
+            if payload is not None:
+                self._memory_bytes -= len(payload)
+            if info.location == 'disk':
+                self._spill_path(block_id).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Usuwa wszystkie bloki."""
+        with self._lock:
+            self._blocks.clear()
+            self._payloads.clear()
+            self._decoded.clear()
+            self._memory_bytes = 0
+            if self.spill_dir is not None:
+                shutil.rmtree(self.spill_dir, ignore_errors=True)
@@ -0,0 +1,195 @@
+# src/columnar_loader.py
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import streamlit as st
+from dataclasses import dataclass
+from typing import IO, List, Literal, Optional, Tuple, Union
+
+from src.data_modifier import sample_data
+from src.dataset_cache import hash_source, path_fingerprint
+from src.dataset_registry import DatasetHandle, DatasetRegistry, get_dataset_registry
+from src.tracing import span
+
+ColumnarFormat = Literal['parquet', 'feather']
+SampleMethod = Literal['Pierwsze n', 'Ostatnie n', 'Losowe n']
+
+# Rozszerzenia plików kolumnowych (Feather v2 to format Arrow IPC)
+COLUMNAR_EXTENSIONS = {'parquet': 'parquet', 'pq': 'parquet', 'feather': 'feather', 'arrow': 'feather', 'ipc': 'feather'}
+
+ColumnarSource = Union[str, IO[bytes]]
+
+@dataclass
+class ColumnarSchema:
+    """Opis pliku kolumnowego odczytany z metadanych (bez czytania danych)."""
+    format: ColumnarFormat
+    columns: List[Tuple[str, str]]  # (nazwa, typ Arrow) - bez kolumn indeksu
+    index_columns: List[str]
+    num_rows: int
+    row_group_rows: List[int]  # liczba wierszy w kolejnych grupach wierszy (Parquet) / partiach (Arrow)
+
+def detect_columnar_format(file_name: str) -> Optional[ColumnarFormat]:
+    """Rozpoznaje format kolumnowy po rozszerzeniu pliku (None dla CSV i innych)."""
+    extension = file_name.rsplit('.', 1)[-1].lower() if '.' in file_name else ''
+    return COLUMNAR_EXTENSIONS.get(extension)
+
+def _arrow_source(source: ColumnarSource):
+    """Źródło dla pyarrow bez kopiowania: bufor przesłanego pliku lub plik zmapowany w pamięci."""
+    if hasattr(source, 'getbuffer'):
+        return pa.BufferReader(pa.py_buffer(source.getbuffer()))
+    if hasattr(source, 'read'):
+        source.seek(0)
+        return source
+    return pa.memory_map(str(source), 'r')
+
+def _ipc_reader(source: ColumnarSource) -> Optional[pa.ipc.RecordBatchFileReader]:
+    """Czytnik pliku Arrow IPC / Feather v2 (czyta tylko stopkę) lub None dla Feather v1."""
+    try:
+        return pa.ipc.open_file(_arrow_source(source))
+    except pa.ArrowInvalid:
+        return None
+
+def _index_columns(schema: pa.Schema) -> List[str]:
+    """Kolumny zapisanego indeksu pandas (indeks typu 'range' nie ma kolumny w pliku)."""
+    metadata = schema.pandas_metadata or {}
+    return [col for col in metadata.get('index_columns', []) if isinstance(col, str)]
+
+def inspect_schema(source: ColumnarSource, file_format: ColumnarFormat) -> ColumnarSchema:
+    """
+    Odczytuje schemat, liczbę wierszy i podział na grupy wierszy wyłącznie z metadanych pliku.
+
+    Args:
+        source: Ścieżka do pliku lub bufor binarny (np. UploadedFile).
+        file_format: 'parquet' lub 'feather'.
+
+    Returns:
+        Opis pliku (ColumnarSchema).
+    """
+    if file_format == 'parquet':
+        parquet_file = pq.ParquetFile(_arrow_source(source))
+        schema = parquet_file.schema_arrow
+        metadata = parquet_file.metadata
+        row_group_rows = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    else:
+        reader = _ipc_reader(source)
+        if reader is None:
+            # Feather v1 nie ma podziału na partie - schemat wymaga odczytu tabeli
+            table = feather.read_table(_arrow_source(source))
+            schema, row_group_rows = table.schema, [table.num_rows]
+        else:
+            schema = reader.schema
+            row_group_rows = [reader.get_batch(i).num_rows for i in range(reader.num_record_batches)]
+
+    index_columns = _index_columns(schema)
+    columns = [(field.name, str(field.type)) for field in schema if field.name not in index_columns]
+    return ColumnarSchema(file_format, columns, index_columns, int(sum(row_group_rows)), row_group_rows)
+
+def _sample_positions(schema: ColumnarSchema, sample: Optional[Tuple[SampleMethod, int]]) -> Optional[np.ndarray]:
+    """Pozycje wierszy próbki - z tą samą semantyką co sample_data (None oznacza wszystkie wiersze)."""
+    if sample is None or sample[1] >= schema.num_rows:
+        return None
+    method, n_samples = sample
+    return sample_data(pd.DataFrame(index=pd.RangeIndex(schema.num_rows)), method, n_samples).index.to_numpy()
+
+def _read_groups(source: ColumnarSource, schema: ColumnarSchema, groups: List[int], columns: List[str]) -> pa.Table:
+    """Czyta wybrane grupy wierszy i tylko wybrane kolumny (wraz z kolumnami indeksu)."""
+    columns = columns + schema.index_columns
+    if schema.format == 'parquet':
+        return pq.ParquetFile(_arrow_source(source)).read_row_groups(groups, columns=columns, use_pandas_metadata=True)
+
+    reader = _ipc_reader(source)
+    if reader is None:
+        return feather.read_table(_arrow_source(source), columns=columns)
+    batches = [reader.get_batch(i).select(columns) for i in groups]
+    if not batches:
+        return reader.schema.empty_table().select(columns)
+    return pa.Table.from_batches(batches)
+
+def read_columnar(
+    source: ColumnarSource,
+    schema: ColumnarSchema,
+    columns: Optional[List[str]] = None,
+    sample: Optional[Tuple[SampleMethod, int]] = None,
+) -> pd.DataFrame:
+    """
+    Wczytuje plik Parquet/Feather/Arrow, czytając tylko wybrane kolumny oraz - dla próbki -
+    tylko grupy wierszy zawierające wylosowane (lub pierwsze/ostatnie) wiersze.
+
+    Args:
+        source: Ścieżka do pliku lub bufor binarny.
+        schema: Opis pliku z inspect_schema.
+        columns: Kolumny do wczytania (None - wszystkie).
+        sample: Opcjonalna próbka (metoda, n) jak w sample_data.
+
+    Returns:
+        Ramka danych Pandas z zachowanym indeksem zapisanym w pliku.
+    """
+    all_columns = [name for name, _ in schema.columns]
+    columns = all_columns if not columns else [col for col in all_columns if col in set(columns)]
+    if not columns:
+        raise ValueError("Nie wybrano żadnej kolumny do wczytania.")
+
+    positions = _sample_positions(schema, sample)
+    group_starts = np.concatenate([[0], np.cumsum(schema.row_group_rows)]).astype(np.int64)
+    if positions is None:
+        groups = list(range(len(schema.row_group_rows)))
+        local_positions = None
+    else:
+        group_of_row = np.searchsorted(group_starts, positions, side='right') - 1
+        groups = np.unique(group_of_row).tolist()
+        # Pozycje wierszy względem połączonych wczytanych grup
+        read_starts = np.cumsum([0] + [schema.row_group_rows[g] for g in groups[:-1]])
+        local_positions = read_starts[np.searchsorted(groups, group_of_row)] + (positions - group_starts[group_of_row])
+
+    table = _read_groups(source, schema, groups, columns)
+    if local_positions is not None:
+        table = table.take(pa.array(local_positions))
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+
+    if not schema.index_columns and len(df) != schema.num_rows and positions is not None:
+        # Indeks domyślny (RangeIndex) - odtwarzamy numery wierszy z pliku
+        df.index = pd.Index(positions)
+    return df
+
+def load_columnar_data(
+    uploaded_file: Union[st.runtime.uploaded_file_manager.UploadedFile, str],
+    schema: ColumnarSchema,
+    columns: Optional[List[str]] = None,
+    sample: Optional[Tuple[SampleMethod, int]] = None,
+    registry: Optional[DatasetRegistry] = None,
+) -> Optional[DatasetHandle]:
+    """
+    Wczytuje plik kolumnowy przez rejestr współdzielony przez sesje (jak load_shared_data dla CSV).
+    Typy kolumn pochodzą ze schematu pliku, więc wykrywanie typów (detect_and_convert_numeric) jest pomijane.
+
+    Returns:
+        Uchwyt zbioru danych lub None w przypadku błędu.
+    """
+    if uploaded_file is None:
+        return None
+    registry = registry if registry is not None else get_dataset_registry()
+
+    try:
+        content_hash = path_fingerprint(uploaded_file) if isinstance(uploaded_file, str) else hash_source(uploaded_file)
+        key = '|'.join([content_hash, ','.join(columns or []), repr(sample)])
+        handle = registry.acquire(key)
+        if handle is not None:
+            st.success(f"Dane zostały wczytane ze wspólnej pamięci (wierszy: {len(handle.frame)}).")
+            return handle
+
+        with span('load.columnar', format=schema.format, columns=len(columns or schema.columns), sample=repr(sample)) as stage:
+            df = read_columnar(uploaded_file, schema, columns, sample)
+            stage.set(rows=len(df))
+        numeric_cols = len(df.select_dtypes(include=['number']).columns)
+        st.success(f"Dane zostały pomyślnie wczytane! (format: {schema.format}, wierszy: {len(df)} z {schema.num_rows})")
+        st.info(f"Wykryto {numeric_cols} kolumn numerycznych z {len(df.columns)} łącznie.")
+        handle = registry.register(key, df)
+        if not handle.shared:
+            st.info("Zbiór nie mieści się w budżecie pamięci zbiorów współdzielonych - nie będzie współdzielony z innymi sesjami.")
+        return handle
+    except Exception as e:
+        st.error(f"Wystąpił błąd podczas wczytywania pliku: {e}")
+        return None
@@ -0,0 +1,69 @@
+# src/config.py
+
+import os
+from pathlib import Path
+
+# Ustawienia aplikacji można nadpisać zmiennymi środowiskowymi przed uruchomieniem Streamlit.
+
+def _env_int(name: str, default: int) -> int:
+    """Odczytuje liczbę całkowitą ze zmiennej środowiskowej."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Zmienna środowiskowa {name} musi być liczbą całkowitą, otrzymano: '{value}'")
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Odczytuje wartość logiczną ze zmiennej środowiskowej ('1', 'true', 'tak' oznaczają prawdę)."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'tak')
+
+# Katalog na trwałą pamięć podręczną (sparsowane zbiory danych itp.)
+CACHE_DIR = Path(os.environ.get('VIS_TOOL_CACHE_DIR', Path.home() / '.cache' / 'visualization-tool'))
+
+# Katalog z plikami danych dostępnymi do wczytania bezpośrednio z serwera (bez przesyłania); brak - funkcja wyłączona
+LOCAL_DATA_DIR = Path(os.environ['VIS_TOOL_LOCAL_DATA_DIR']) if os.environ.get('VIS_TOOL_LOCAL_DATA_DIR') else None
+# Domyślny odstęp (s) między sprawdzeniami obserwowanego pliku CSV, do którego dopisywane są wiersze
+LIVE_POLL_SECONDS = _env_int('VIS_TOOL_LIVE_POLL_SECONDS', 5)
+
+# Maksymalny rozmiar pamięci podręcznej wczytanych zbiorów danych (MB)
+DATASET_CACHE_MAX_MB = _env_int('VIS_TOOL_DATASET_CACHE_MB', 2048)
+
+# Budżet pamięci rejestru zbiorów danych współdzielonych przez sesje (MB); zbiór ponad budżet nie jest współdzielony
+DATASET_REGISTRY_MAX_MB = _env_int('VIS_TOOL_DATASET_REGISTRY_MB', 4096)
+# Po ilu sekundach od zamknięcia ostatniej sesji zbiór jest usuwany z rejestru
+DATASET_REGISTRY_IDLE_SECONDS = _env_int('VIS_TOOL_DATASET_REGISTRY_IDLE_SECONDS', 1800)
+
+# Liczba osadzeń (wyników redukcji wymiarowości) przechowywanych w pamięci
+EMBEDDING_CACHE_ENTRIES = _env_int('VIS_TOOL_EMBEDDING_CACHE_ENTRIES', 32)
+# Czy osadzenia zapisywać od razu także na dysku (w CACHE_DIR/embeddings) - wspólnie dla procesów roboczych zadań
+EMBEDDING_CACHE_SPILL = _env_bool('VIS_TOOL_EMBEDDING_CACHE_SPILL', True)
+# Limit rozmiaru osadzeń zapisanych na dysku (MB)
+EMBEDDING_CACHE_DISK_MB = _env_int('VIS_TOOL_EMBEDDING_CACHE_DISK_MB', 1024)
+
+# Liczba procesów roboczych wspólnej puli zadań w tle (0 = obliczenia synchronicznie w procesie serwera)
+JOB_WORKERS = _env_int('VIS_TOOL_JOB_WORKERS', min(4, os.cpu_count() or 1))
+
+# Czy po wybraniu metody redukcji wymiarowości importować ją i kompilować (numba) w tle, zanim użytkownik uruchomi redukcję
+REDUCER_PREWARM = _env_bool('VIS_TOOL_REDUCER_PREWARM', True)
+# Liczba wątków (BLAS, OpenMP, numba) jednego dopasowania w porównaniu metod redukcji (0 = rdzenie podzielone między równoległe zadania)
+COMPARISON_THREADS = _env_int('VIS_TOOL_COMPARISON_THREADS', 0)
+
+# Liczba wątków liczących kafelki macierzy korelacji (1 = wielowątkowość tylko w bibliotece BLAS)
+CORRELATION_THREADS = _env_int('VIS_TOOL_CORRELATION_THREADS', os.cpu_count() or 1)
+
+# Limit pamięci na treść bloków wynikowych jednej sesji (MB) - starsze bloki trafiają na dysk
+RESULTS_MEMORY_MB = _env_int('VIS_TOOL_RESULTS_MEMORY_MB', 64)
+# Czy bloki wynikowe wypierane z pamięci zapisywać na dysku (w CACHE_DIR/results); w przeciwnym razie są usuwane
+RESULTS_SPILL = _env_bool('VIS_TOOL_RESULTS_SPILL', True)
+
+# Czy pomiary wydajności etapów (panel 'Wydajność') są domyślnie włączone dla nowych sesji
+TRACING_ENABLED = _env_bool('VIS_TOOL_TRACING', False)
+# Czy domyślnie mierzyć też szczytowe zużycie pamięci etapów (tracemalloc - wyraźnie spowalnia obliczenia)
+TRACING_MEMORY = _env_bool('VIS_TOOL_TRACING_MEMORY', False)
+# Maksymalna liczba pomiarów etapów przechowywanych dla jednej sesji (najstarsze są usuwane)
+TRACE_MAX_SPANS = _env_int('VIS_TOOL_TRACE_MAX_SPANS', 2000)
@@ -0,0 +1,114 @@
+# src/correlation.py
+
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from src.config import CORRELATION_THREADS
+
+# Liczba kolumn w kafelku wyniku iloczynu macierzowego liczonym przez jeden wątek
+CORRELATION_TILE_COLUMNS = 256
+
+PAIR_COLUMNS = ['Kolumna 1', 'Kolumna 2', 'Korelacja']
+
+def blocked_product(a: np.ndarray, b: Optional[np.ndarray] = None, tile_columns: int = CORRELATION_TILE_COLUMNS,
+                    n_threads: int = CORRELATION_THREADS) -> np.ndarray:
+    """
+    Oblicza a.T @ b kafelkami kolumn wyniku, rozdzielając kafelki między wątki
+    (BLAS zwalnia GIL, więc kafelki liczą się równolegle na wielu rdzeniach).
+    Dla `b=None` wynik jest symetryczny: liczone są tylko kafelki nad przekątną i odbijane.
+
+    Args:
+        a: Macierz (wiersze × kolumny).
+        b: Druga macierz o tej samej liczbie wierszy lub None (wtedy b = a).
+        tile_columns: Liczba kolumn w kafelku.
+        n_threads: Liczba wątków (1 = pojedynczy iloczyn, wielowątkowość pozostawiona bibliotece BLAS).
+
+    Returns:
+        Macierz a.T @ b (float64).
+    """
+    symmetric = b is None
+    b = a if symmetric else b
+    k_a, k_b = a.shape[1], b.shape[1]
+    if n_threads <= 1 or max(k_a, k_b) <= tile_columns:
+        return a.T @ b
+
+    result = np.empty((k_a, k_b), dtype=np.result_type(a, b))
+    tiles = [
+        (i, j)
+        for i in range(0, k_a, tile_columns)
+        for j in range(i if symmetric else 0, k_b, tile_columns)
+    ]
+
+    def compute(tile: Tuple[int, int]) -> None:
+        i, j = tile
+        block = a[:, i:i + tile_columns].T @ b[:, j:j + tile_columns]
+        result[i:i + tile_columns, j:j + tile_columns] = block
+        if symmetric and i != j:
+            result[j:j + tile_columns, i:i + tile_columns] = block.T
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        list(executor.map(compute, tiles))
+    return result
+
+def pairwise_sums(centered: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sumy dla korelacji z parami kompletnych obserwacji, liczone iloczynami macierzowymi (bez pętli po parach).
+    Dla pary (i, j) uwzględniane są tylko wiersze, w których obie wartości istnieją.
+
+    Args:
+        centered: Macierz wartości (już przesuniętych o średnie), braki jako NaN.
+
+    Returns:
+        Krotka (n, sx, sxx, sxy) macierzy k × k: liczność, suma x_i, suma x_i², suma x_i·x_j.
+    """
+    present = ~np.isnan(centered)
+    k = centered.shape[1]
+    if present.all():
+        # Bez braków liczności i sumy jednowymiarowe są wspólne dla wszystkich par - wystarczy jeden iloczyn
+        sums = centered.sum(axis=0)
+        squares = np.einsum('ij,ij->j', centered, centered)
+        n = np.full((k, k), float(len(centered)))
+        return n, np.repeat(sums[:, None], k, axis=1), np.repeat(squares[:, None], k, axis=1), blocked_product(centered)
+
+    filled = np.where(present, centered, 0.0)
+    mask = present.astype(filled.dtype)
+    return (
+        blocked_product(mask),
+        blocked_product(filled, mask),
+        blocked_product(filled * filled, mask),
+        blocked_product(filled),
+    )
+
+def top_pairs(corr: pd.DataFrame, k: int, absolute: bool = True) -> pd.DataFrame:
+    """
+    Zwraca k par kolumn o najsilniejszej korelacji (każda para raz, bez przekątnej).
+
+    Args:
+        corr: Kwadratowa macierz korelacji.
+        k: Liczba par.
+        absolute: Czy porządkować według wartości bezwzględnej (silne korelacje ujemne też się liczą).
+
+    Returns:
+        Ramka z kolumnami PAIR_COLUMNS, posortowana malejąco.
+    """
+    if k <= 0:
+        raise ValueError("Liczba par musi być dodatnia.")
+    values = corr.to_numpy()
+    rows, cols = np.triu_indices(len(values), 1)
+    pair_values = values[rows, cols]
+    scores = np.abs(pair_values) if absolute else pair_values.copy()
+    scores[np.isnan(scores)] = -np.inf
+
+    k = min(k, len(scores))
+    if k == 0:
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+    best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind='stable')]
+    best = best[np.isfinite(scores[best])]
+    return pd.DataFrame({
+        PAIR_COLUMNS[0]: corr.index[rows[best]],
+        PAIR_COLUMNS[1]: corr.columns[cols[best]],
+        PAIR_COLUMNS[2]: pair_values[best],
+    })
@@ -1,45 +1,384 @@
 # src/data_loader.py
 
+import csv
+import re
+import numpy as np
 import pandas as pd
 import streamlit as st
-from io import StringIO
-from typing import Optional
+from dataclasses import dataclass
+from typing import Optional, Callable, List, Tuple, Union, IO
 
-def detect_and_convert_numeric(df: pd.DataFrame, decimal: str = '.') -> pd.DataFrame:
+from src.dataset_cache import DatasetCache, hash_source, path_fingerprint
+from src.samplers import StreamSampler
+from src.config import LOCAL_DATA_DIR
+from src.dataset_registry import DatasetHandle, DatasetRegistry, get_dataset_registry
+from src.tracing import span
+
+# Rozmiar próbki z początku pliku używanej do wykrywania formatu (bajty)
+SNIFF_SAMPLE_BYTES = 64 * 1024
+# Liczba wierszy parsowanych w jednym kawałku przez silnik C
+CHUNK_ROWS = 100_000
+# Separatory brane pod uwagę przy automatycznej detekcji
+CANDIDATE_SEPARATORS = [';', ',', '\t', '|']
+# Liczba wierszy, na podstawie których ustalany jest typ kolumny
+INFERENCE_SAMPLE_SIZE = 1000
+# Maksymalny stosunek liczby unikalnych wartości do liczby wierszy dla typu 'category'
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+_DECIMAL_COMMA_RE = re.compile(r'^[-+]?\d+,\d+$')
+_DECIMAL_DOT_RE = re.compile(r'^[-+]?\d+\.\d+$')
+
+CsvSource = Union[str, IO[bytes]]
+DataSource = Union[st.runtime.uploaded_file_manager.UploadedFile, str]
+
+def _sample_positions(n_rows: int, sample_size: int) -> np.ndarray:
+    """Zwraca równomiernie rozłożone pozycje wierszy (obejmujące cały plik, nie tylko początek)."""
+    if n_rows <= sample_size:
+        return np.arange(n_rows)
+    return np.unique(np.linspace(0, n_rows - 1, sample_size).astype(np.int64))
+
+def _parse_numbers(values: pd.Series, decimal: str) -> pd.Series:
+    """Konwertuje wartości tekstowe na liczby, uwzględniając separator dziesiętny."""
+    if decimal == ',':
+        # Zamień przecinki na kropki dla konwersji
+        values = values.astype(str).str.replace(',', '.', regex=False)
+    return pd.to_numeric(values, errors='coerce')
+
+def _downcast_numeric(series: pd.Series) -> pd.Series:
+    """Rzutuje kolumnę numeryczną na najmniejszy typ, który nie traci informacji."""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy()
+        finite = values[np.isfinite(values)]
+        # Kolumny całkowite bez braków zapisane jako float (np. po wczytaniu w kawałkach)
+        if finite.size == values.size and finite.size and np.array_equal(finite, np.round(finite)):
+            return pd.to_numeric(series, downcast='integer')
+        if series.dtype == np.float64 and (not finite.size or np.abs(finite).max() < FLOAT32_MAX):
+            # float32 tylko wtedy, gdy każda wartość wraca bez zmian (np. 697.7 nie ma dokładnej postaci float32)
+            narrowed = values.astype(np.float32)
+            if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+                return pd.Series(narrowed, index=series.index, name=series.name)
+        return series
+
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+
+    return series
+
+def detect_and_convert_numeric(df: pd.DataFrame, decimal: str = '.', downcast: bool = True) -> pd.DataFrame:
     """
     Próbuje wykryć i przekonwertować kolumny tekstowe na numeryczne.
     Uwzględnia różne formaty liczb w zależności od separatora dziesiętnego.
+
+    Typ kolumny jest ustalany na podstawie równomiernej próbki wierszy, a pełna konwersja
+    dotyczy tylko kolumn, które przeszły test. Ramka jest modyfikowana w miejscu (bez kopii).
+    Opcjonalnie typy są zawężane: liczby do najmniejszego bezpiecznego typu (int8/16/32, float32 tylko bez utraty precyzji),
+    a teksty o niewielkiej liczbie unikalnych wartości do typu 'category'.
+
+    Args:
+        df: Ramka danych po wczytaniu.
+        decimal: Separator dziesiętny użyty w pliku.
+        downcast: Czy zawężać typy kolumn w celu oszczędzenia pamięci.
+
+    Returns:
+        Ta sama ramka danych z przekonwertowanymi kolumnami.
     """
-    df_copy = df.copy()
-    
-    for col in df_copy.columns:
-        if df_copy[col].dtype == 'object':  # Kolumny tekstowe
-            # Próbujemy przekonwertować na numeryczne
-            if decimal == ',':
-                # Zamień przecinki na kropki dla konwersji
-                converted = pd.to_numeric(
-                    df_copy[col].astype(str).str.replace(',', '.'), 
-                    errors='coerce'
-                )
-            else:
-                converted = pd.to_numeric(df_copy[col], errors='coerce')
-            
-            # Jeśli większość wartości została przekonwertowana, uznajemy kolumnę za numeryczną
-            if converted.notna().sum() / len(converted) > 0.5:  # Co najmniej 50% wartości
-                df_copy[col] = converted
-    
-    return df_copy
-
-def load_data(uploaded_file: st.runtime.uploaded_file_manager.UploadedFile, separator: str, decimal: str = '.') -> Optional[pd.DataFrame]:
-    """
-    Wczytuje dane z przesłanego pliku CSV do ramki danych Pandas.
-    Jeśli separator to 'auto', próbuje go automatycznie wykryć.
+    n_rows = len(df)
+    if n_rows == 0:
+        return df
+    positions = _sample_positions(n_rows, INFERENCE_SAMPLE_SIZE)
+
+    for col in df.columns:
+        original = series = df[col]
+        if series.dtype == 'object':  # Kolumny tekstowe
+            # Jeśli większość wartości z próbki da się przekonwertować, uznajemy kolumnę za numeryczną
+            sample = _parse_numbers(series.iloc[positions], decimal)
+            if sample.notna().mean() > 0.5:  # Co najmniej 50% wartości
+                series = _parse_numbers(series, decimal)
+            elif downcast:
+                # Sprawdzenie na próbce pozwala pominąć liczenie unikalnych wartości w kolumnach z tekstem swobodnym
+                if series.iloc[positions].nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(positions) \
+                        and series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * n_rows:
+                    series = series.astype('category')
+
+        if downcast:
+            series = _downcast_numeric(series)
+
+        if series is not original:
+            df[col] = series
+
+    return df
+
+def convert_like(chunk: pd.DataFrame, dtypes: pd.Series, decimal: str = '.') -> pd.DataFrame:
+    """
+    Konwertuje kolejny kawałek wierszy tak, aby jego kolumny pasowały do typów ustalonych przy pierwszym
+    wczytaniu (`dtypes`, np. df.dtypes), bez ponownego wnioskowania typów z próbki.
+    Kolumny numeryczne są parsowane i zawężane (przy łączeniu pandas poszerzy typ, jeśli nowe wartości się nie mieszczą);
+    kolumny kategoryczne pozostają tekstowe - kategorie są uzgadniane przy dołączaniu (src/watched_csv.py).
+    Ramka jest modyfikowana w miejscu.
+    """
+    for col in chunk.columns:
+        original = series = chunk[col]
+        target = dtypes[col]
+        if pd.api.types.is_numeric_dtype(target) and not pd.api.types.is_bool_dtype(target):
+            if series.dtype == 'object':
+                series = _parse_numbers(series, decimal)
+            series = _downcast_numeric(series)
+        if series is not original:
+            chunk[col] = series
+    return chunk
+
+def _read_head(source: CsvSource, n_bytes: int = SNIFF_SAMPLE_BYTES) -> str:
+    """Odczytuje początek pliku bez przesuwania pozycji bufora."""
+    if hasattr(source, 'read'):
+        position = source.tell()
+        raw = source.read(n_bytes)
+        source.seek(position)
+    else:
+        with open(source, 'rb') as f:
+            raw = f.read(n_bytes)
+
+    text = raw.decode('utf-8', errors='ignore')
+    lines = text.splitlines()
+    # Ostatnia linia mogła zostać ucięta w połowie
+    if len(raw) == n_bytes and len(lines) > 1:
+        lines = lines[:-1]
+    return '\n'.join(lines)
+
+def _sniff_separator(lines: List[str]) -> str:
+    """Wykrywa separator kolumn na podstawie próbki linii."""
+    try:
+        dialect = csv.Sniffer().sniff('\n'.join(lines), delimiters=''.join(CANDIDATE_SEPARATORS))
+        return dialect.delimiter
+    except csv.Error:
+        pass
+
+    # Heurystyka: separator występuje w każdej linii tyle samo razy
+    best_separator, best_count = None, 0
+    for candidate in CANDIDATE_SEPARATORS:
+        counts = {line.count(candidate) for line in lines}
+        if len(counts) == 1:
+            count = counts.pop()
+            if count > best_count:
+                best_separator, best_count = candidate, count
+
+    if best_separator is None:
+        raise ValueError("Nie udało się automatycznie wykryć separatora kolumn.")
+    return best_separator
+
+def _sniff_decimal(lines: List[str], separator: str) -> str:
+    """Wykrywa separator dziesiętny, zliczając liczby zapisane z przecinkiem i z kropką."""
+    if separator == ',':
+        return '.'
+
+    comma_count = dot_count = 0
+    for line in lines[1:]:  # Pomijamy nagłówek
+        for field in line.split(separator):
+            field = field.strip().strip('"')
+            if _DECIMAL_COMMA_RE.match(field):
+                comma_count += 1
+            elif _DECIMAL_DOT_RE.match(field):
+                dot_count += 1
+    return ',' if comma_count > dot_count else '.'
+
+def sniff_csv_format(source: CsvSource, separator: str = 'auto', decimal: str = 'auto') -> Tuple[str, str]:
+    """
+    Ustala separator kolumn i separator dziesiętny na podstawie niewielkiej próbki z początku pliku.
+    Wartości podane jawnie (inne niż 'auto') są zwracane bez zmian.
+
+    Args:
+        source: Ścieżka do pliku lub bufor binarny (np. UploadedFile).
+        separator: Znak separatora lub 'auto' do automatycznej detekcji.
+        decimal: Separator dziesiętny ('.', ',') lub 'auto'.
+
+    Returns:
+        Krotka (separator, separator dziesiętny).
+    """
+    detect_separator = not separator or separator.lower() == 'auto'
+    detect_decimal = not decimal or decimal.lower() == 'auto'
+    if not detect_separator and not detect_decimal:
+        return separator, decimal
+
+    lines = [line for line in _read_head(source).splitlines() if line.strip()]
+    if not lines:
+        raise ValueError("Plik jest pusty.")
+
+    if detect_separator:
+        separator = _sniff_separator(lines)
+    if detect_decimal:
+        decimal = _sniff_decimal(lines, separator)
+    return separator, decimal
+
+def read_csv_data(
+    source: CsvSource,
+    separator: str,
+    decimal: str = '.',
+    chunksize: int = CHUNK_ROWS,
+    progress_callback: Optional[Callable[[int], None]] = None,
+    sampler: Optional[StreamSampler] = None,
+) -> pd.DataFrame:
+    """
+    Parsuje plik CSV silnikiem C w kawałkach o ograniczonym rozmiarze,
+    czytając bezpośrednio z bufora binarnego (bez dekodowania całości do napisu).
     Pierwsza linia to nagłówek, a pierwsza kolumna to indeks wierszy.
+    Z próbnikiem strumieniowym w pamięci trzymana jest tylko próbka i bieżący kawałek,
+    więc plik może być większy niż dostępna pamięć; próbka pierwszych n wierszy kończy czytanie wcześniej.
 
     Args:
-        uploaded_file: Plik przesłany przez użytkownika w Streamlit.
+        source: Ścieżka do pliku lub bufor binarny (np. UploadedFile).
+        separator: Znak separatora kolumn (już ustalony, bez 'auto').
+        decimal: Znak separatora dziesiętnego.
+        chunksize: Liczba wierszy parsowanych w jednym kawałku.
+        progress_callback: Opcjonalna funkcja wywoływana z liczbą wczytanych dotąd wierszy.
+        sampler: Opcjonalny próbnik strumieniowy (src/samplers.py) - zwracana jest wtedy tylko próbka.
+
+    Returns:
+        Ramka danych Pandas.
+    """
+    reader = pd.read_csv(
+        source,
+        sep=separator,
+        header=0,
+        index_col=0,
+        decimal=decimal,
+        encoding='utf-8',
+        engine='c',
+        chunksize=chunksize,
+    )
+
+    chunks = []
+    rows_parsed = 0
+    with reader:
+        for chunk in reader:
+            if sampler is not None:
+                sampler.update(chunk)
+            else:
+                chunks.append(chunk)
+            rows_parsed += len(chunk)
+            if progress_callback is not None:
+                progress_callback(rows_parsed)
+            if sampler is not None and sampler.done:
+                break
+
+    if sampler is not None:
+        chunks = [sampler.result()] if rows_parsed else []
+    if not chunks:
+        raise ValueError("Plik nie zawiera danych.")
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, copy=False)
+
+def resolve_local_path(path: str) -> str:
+    """
+    Sprawdza ścieżkę pliku na serwerze: musi wskazywać istniejący plik wewnątrz katalogu
+    LOCAL_DATA_DIR (zmienna VIS_TOOL_LOCAL_DATA_DIR); bez tego ustawienia pliki lokalne są wyłączone.
+    """
+    if LOCAL_DATA_DIR is None:
+        raise ValueError("Wczytywanie plików z serwera jest wyłączone (ustaw VIS_TOOL_LOCAL_DATA_DIR).")
+    root = LOCAL_DATA_DIR.resolve()
+    resolved = (root / path).resolve()
+    if root != resolved and root not in resolved.parents:
+        raise ValueError(f"Plik musi znajdować się w katalogu {root}.")
+    if not resolved.is_file():
+        raise ValueError(f"Plik nie istnieje: {resolved}")
+    return str(resolved)
+
+def source_key(source: DataSource, sampler: Optional[StreamSampler] = None, content_hash: Optional[str] = None) -> str:
+    """Identyfikator zawartości źródła (dla plików na serwerze - bez czytania całego pliku), wraz z opisem próbkowania."""
+    if content_hash is None:
+        content_hash = path_fingerprint(source) if isinstance(source, str) else hash_source(source)
+    return content_hash if sampler is None else f"{content_hash}|{sampler.describe()}"
+
+def read_csv_columns(source: CsvSource, separator: str = 'auto') -> List[str]:
+    """Zwraca nazwy kolumn z nagłówka pliku CSV (bez kolumny indeksu), czytając tylko początek pliku."""
+    separator, _ = sniff_csv_format(source, separator, '.')
+    if hasattr(source, 'seek'):
+        position = source.tell()
+        columns = pd.read_csv(source, sep=separator, index_col=0, nrows=0, encoding='utf-8').columns.tolist()
+        source.seek(position)
+        return columns
+    return pd.read_csv(source, sep=separator, index_col=0, nrows=0, encoding='utf-8').columns.tolist()
+
+@dataclass
+class LoadResult:
+    """Wynik wczytania pliku CSV: ramka danych i ustalony format pliku (do komunikatów i przepisów analizy)."""
+    frame: pd.DataFrame
+    separator: str
+    decimal: str
+    from_cache: bool = False
+    rows_seen: Optional[int] = None  # liczba przeczytanych wierszy, gdy wczytano tylko próbkę
+
+def read_data(
+    source: DataSource,
+    separator: str,
+    decimal: str = '.',
+    progress_callback: Optional[Callable[[int], None]] = None,
+    cache: Optional[DatasetCache] = None,
+    content_hash: Optional[str] = None,
+    sampler: Optional[StreamSampler] = None,
+) -> LoadResult:
+    """
+    Wczytuje plik CSV do ramki danych Pandas bez komunikatów interfejsu (także poza Streamlit, np. w trybie wsadowym).
+    Jeśli separator lub separator dziesiętny to 'auto', wykrywa je na podstawie próbki z początku pliku.
+    Pierwsza linia to nagłówek, a pierwsza kolumna to indeks wierszy. Błędy są zgłaszane wyjątkami.
+
+    Args:
+        source: Plik przesłany przez użytkownika w Streamlit lub ścieżka do pliku.
         separator: Znak separatora lub 'auto' do automatycznej detekcji.
-        decimal: Znak separatora dziesiętnego ('.' lub ',').
+        decimal: Znak separatora dziesiętnego ('.', ',' lub 'auto').
+        progress_callback: Opcjonalna funkcja wywoływana z liczbą wczytanych dotąd wierszy.
+        cache: Opcjonalna trwała pamięć podręczna sparsowanych zbiorów danych.
+        content_hash: Identyfikator zawartości źródła, jeśli został już obliczony (source_key).
+        sampler: Opcjonalny próbnik strumieniowy - wczytywana jest tylko próbka (w jednym przejściu).
+
+    Returns:
+        Wczytana ramka wraz z użytym formatem (LoadResult).
+    """
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(content_hash or source_key(source, sampler), separator, decimal)
+        with span('load.cache_get') as stage:
+            df = cache.get(cache_key)
+            stage.set(hit=df is not None)
+        if df is not None:
+            return LoadResult(df, separator, decimal, from_cache=True)
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    with span('load.sniff'):
+        separator, decimal = sniff_csv_format(source, separator, decimal)
+
+    with span('load.parse', separator=separator, decimal=decimal,
+              sampler=sampler.describe() if sampler is not None else None) as stage:
+        df = read_csv_data(source, separator, decimal, progress_callback=progress_callback, sampler=sampler)
+        stage.set(rows=len(df), columns=len(df.columns))
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    # Użyj ulepszonej funkcji konwersji
+    with span('load.convert_types', rows=len(df), columns=len(df.columns)):
+        df = detect_and_convert_numeric(df, decimal)
+
+    if cache is not None:
+        with span('load.cache_put'):
+            cache.put(cache_key, df)
+    return LoadResult(df, separator, decimal, rows_seen=sampler.rows_seen if sampler is not None else None)
+
+def load_data(
+    uploaded_file: DataSource,
+    separator: str,
+    decimal: str = '.',
+    progress_callback: Optional[Callable[[int], None]] = None,
+    cache: Optional[DatasetCache] = None,
+    content_hash: Optional[str] = None,
+    sampler: Optional[StreamSampler] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Wczytuje dane przez read_data i pokazuje w interfejsie Streamlit komunikat o wyniku lub błędzie.
+    Parametry jak w read_data.
 
     Returns:
         Ramka danych Pandas lub None w przypadku błędu.
@@ -48,33 +387,61 @@ def load_data(uploaded_file: st.runtime.uploaded_file_manager.UploadedFile, sepa
         return None
 
     try:
-        string_data = uploaded_file.getvalue().decode('utf-8')
-        uploaded_file.seek(0)
-
-        # Jeśli separator to 'auto' lub jest pusty, pandas sam go wykryje ustawiając sep=None
-        # Wymaga to użycia silnika 'python'
-        effective_sep = None if separator.lower() == 'auto' or not separator else separator
-        
-        df = pd.read_csv(
-            StringIO(string_data),
-            sep=effective_sep,
-            header=0,
-            index_col=0,
-            decimal=decimal,  # Używamy wybranego separatora dziesiętnego
-            engine='python' # Silnik 'python' jest lepszy w automatycznym wykrywaniu separatora
-        )
-        
-        # Użyj ulepszonej funkcji konwersji
-        df = detect_and_convert_numeric(df, decimal)
-        
-        numeric_cols = len(df.select_dtypes(include=['number']).columns)
-        total_cols = len(df.columns)
-        
-        st.success(f"Dane zostały pomyślnie wczytane! (separator dziesiętny: '{decimal}')")
-        st.info(f"Wykryto {numeric_cols} kolumn numerycznych z {total_cols} łącznie.")
-        
-        return df
+        result = read_data(uploaded_file, separator, decimal, progress_callback, cache, content_hash, sampler)
     except Exception as e:
         st.error(f"Wystąpił błąd podczas wczytywania pliku: {e}")
         st.info("Upewnij się, że pierwsza kolumna może służyć jako unikalny indeks. Jeśli problem nadal występuje, spróbuj ręcznie określić separator i separator dziesiętny.")
-        return None
\ No newline at end of file
+        return None
+
+    df = result.frame
+    numeric_cols = len(df.select_dtypes(include=['number']).columns)
+    total_cols = len(df.columns)
+    if result.from_cache:
+        st.success(f"Dane zostały wczytane z pamięci podręcznej (wierszy: {len(df)}).")
+    else:
+        sample_info = f", próbka z {result.rows_seen} przeczytanych" if result.rows_seen is not None else ""
+        st.success(f"Dane zostały pomyślnie wczytane! (separator: '{result.separator}', separator dziesiętny: '{result.decimal}', wierszy: {len(df)}{sample_info})")
+    st.info(f"Wykryto {numeric_cols} kolumn numerycznych z {total_cols} łącznie.")
+    return df
+
+def load_shared_data(
+    uploaded_file: DataSource,
+    separator: str,
+    decimal: str = '.',
+    progress_callback: Optional[Callable[[int], None]] = None,
+    cache: Optional[DatasetCache] = None,
+    registry: Optional[DatasetRegistry] = None,
+    sampler: Optional[StreamSampler] = None,
+) -> Optional[DatasetHandle]:
+    """
+    Wczytuje dane tak jak load_data, ale przez rejestr współdzielony przez sesje: jeśli ten sam plik
+    (z tymi samymi ustawieniami) wczytała już inna sesja, zwraca odwołanie do istniejącej ramki.
+    Świeżo sparsowane dane są po zapisie w pamięci podręcznej odczytywane z niej przez mapowanie
+    pamięci, dzięki czemu kolumny numeryczne są tylko do odczytu i nie zajmują pamięci procesu.
+
+    Returns:
+        Uchwyt zbioru danych (ramka w `handle.frame`) lub None w przypadku błędu.
+    """
+    if uploaded_file is None:
+        return None
+    registry = registry if registry is not None else get_dataset_registry()
+
+    with span('load.fingerprint'):
+        content_hash = source_key(uploaded_file, sampler)
+    key = DatasetCache.make_key(content_hash, separator, decimal)
+    handle = registry.acquire(key)
+    if handle is not None:
+        st.success(f"Dane zostały wczytane ze wspólnej pamięci (wierszy: {len(handle.frame)}).")
+        return handle
+
+    df = load_data(uploaded_file, separator, decimal, progress_callback, cache, content_hash=content_hash, sampler=sampler)
+    if df is None:
+        return None
+    if cache is not None:
+        mapped_df = cache.get(key)
+        if mapped_df is not None:
+            df = mapped_df
+    handle = registry.register(key, df)
+    if not handle.shared:
+        st.info("Zbiór nie mieści się w budżecie pamięci zbiorów współdzielonych - nie będzie współdzielony z innymi sesjami.")
+    return handle
@@ -1,23 +1,30 @@
 # src/data_modifier.py
 
 import pandas as pd
-from typing import Literal, Dict, Any, List
+from typing import Literal, Dict, Any, List, Optional, Tuple
 import numpy as np
 
-# Redukcja wymiarowości
-from sklearn.manifold import TSNE
-from umap import UMAP
-try:
-    from trimap import TRIMAP
-    TRIMAP_AVAILABLE = True
-except ImportError:
-    TRIMAP_AVAILABLE = False
-    
-try:
-    from pacmap import PaCMAP
-    PACMAP_AVAILABLE = True
-except ImportError:
-    PACMAP_AVAILABLE = False
+from src.embedding_cache import get_default_embedding_cache, make_embedding_key, fingerprint_matrix
+from src.tracing import span
+from src.landmarks import (
+    DEFAULT_N_LANDMARKS, EXACT_TSNE_MAX_SAMPLES, LARGE_DATA_THRESHOLD, OutOfSampleTransform,
+    fit_with_landmarks, estimate_landmark_drift,
+)
+from src.warm_start import PreviousEmbedding, initial_layout
+
+# Biblioteki redukcji wymiarowości są importowane dopiero przy pierwszym użyciu (src/reducers.py)
+from src.reducers import is_available, reducer_class
+
+# Liczba iteracji optymalizacji przy starcie z poprzedniego osadzenia - układ jest już bliski docelowemu
+# (domyślnie: t-SNE 1000, w tym 250 wzmocnienia; UMAP 200-500 epok; TRIMAP 400; PaCMAP 100+100+250)
+WARM_START_ITERATIONS: Dict[str, Dict[str, Any]] = {
+    't-SNE': {'max_iter': 500},
+    'UMAP': {'n_epochs': 100},
+    'TRIMAP': {'n_iters': 150},
+    'PaCMAP': {'num_iters': (0, 50, 150)},
+}
+# Odchylenie pierwszej współrzędnej położeń początkowych t-SNE (jak przy inicjalizacji PCA w scikit-learn)
+TSNE_INIT_STD = 1e-4
 
 def sample_data(df: pd.DataFrame, method: Literal['Pierwsze n', 'Ostatnie n', 'Losowe n'], n_samples: int) -> pd.DataFrame:
     """Próbkuje dane zgodnie z wybraną metodą."""
@@ -31,11 +38,87 @@ def sample_data(df: pd.DataFrame, method: Literal['Pierwsze n', 'Ostatnie n', 'L
         return df.sample(n=n_samples, random_state=42)
     return df
 
-def reduce_dimensions(df: pd.DataFrame, method: Literal['t-SNE', 'UMAP', 'TRIMAP', 'PaCMAP'], params: Dict[str, Any]) -> pd.DataFrame:
+def _reducer_hyperparams(method: str, n_components: int, n_samples: int) -> Dict[str, Any]:
+    """Wyznacza hiperparametry metody redukcji dopasowane do liczby próbek."""
+    if method == 't-SNE':
+        return {
+            'method': 'exact' if n_components > 3 else 'barnes_hut',
+            'perplexity': min(30, max(5, (n_samples - 1) // 3)),
+        }
+    if method == 'UMAP':
+        return {'n_neighbors': min(15, max(2, n_samples - 1)), 'min_dist': 0.1}
+    if method == 'TRIMAP':
+        if not is_available('TRIMAP'): raise ValueError("TRIMAP nie jest dostępny.")
+        return {'n_inliers': min(10, max(1, n_samples // 10)), 'n_outliers': min(5, max(1, n_samples // 20))}
+    if method == 'PaCMAP':
+        if not is_available('PaCMAP'): raise ValueError("PaCMAP nie jest dostępny.")
+        return {'n_neighbors': min(10, max(2, n_samples - 1))}
+    raise ValueError(f"Nieznana metoda redukcji wymiarowości: {method}")
+
+def _build_reducer(method: str, n_components: int, hyperparams: Dict[str, Any], out_of_sample: bool = False):
     """
-    Redukuje wymiarowość danych numerycznych i łączy wynik z oryginalnymi danymi nienumerycznymi.
+    Tworzy obiekt reduktora dla wybranej metody i hiperparametrów.
+    `out_of_sample` zachowuje struktury potrzebne do późniejszego rzutowania nowych wierszy (PaCMAP).
     """
-    
+    reducer_cls = reducer_class(method)
+    # Przy starcie z poprzedniego osadzenia wystarcza mniej iteracji
+    iterations = WARM_START_ITERATIONS.get(method, {}) if hyperparams.get('warm_start') else {}
+    if method == 't-SNE':
+        return reducer_cls(n_components=n_components, perplexity=hyperparams['perplexity'], method=hyperparams['method'], random_state=42, init='random', **iterations)
+    if method == 'UMAP':
+        return reducer_cls(n_components=n_components, n_neighbors=hyperparams['n_neighbors'], random_state=42, min_dist=hyperparams['min_dist'], **iterations)
+    if method == 'TRIMAP':
+        return reducer_cls(n_dims=n_components, n_inliers=hyperparams['n_inliers'], n_outliers=hyperparams['n_outliers'], verbose=False, **iterations)
+    if method == 'PaCMAP':
+        return reducer_cls(n_components=n_components, n_neighbors=hyperparams['n_neighbors'], random_state=42, save_tree=out_of_sample, **iterations)
+    raise ValueError(f"Nieznana metoda redukcji wymiarowości: {method}")
+
+def _fit_transform(method: str, reducer, data: np.ndarray, init: Optional[np.ndarray]) -> np.ndarray:
+    """Dopasowuje reduktor, opcjonalnie startując z podanych położeń początkowych wierszy (warm start)."""
+    if init is None:
+        return reducer.fit_transform(data)
+    if method == 't-SNE':
+        reducer.set_params(init=init / (np.std(init[:, 0]) or 1.0) * TSNE_INIT_STD)
+        return reducer.fit_transform(data)
+    if method == 'UMAP':
+        reducer.init = init
+        return reducer.fit_transform(data)
+    return reducer.fit_transform(data, init=init)
+
+def _out_of_sample_transform(method: str) -> Optional[OutOfSampleTransform]:
+    """Zwraca funkcję rzutowania nowych wierszy przez dopasowany reduktor lub None, jeśli metoda jej nie ma."""
+    if method == 'UMAP':
+        return lambda reducer, basis, rows: reducer.transform(rows)
+    if method == 'PaCMAP':
+        return lambda reducer, basis, rows: reducer.transform(rows, basis=basis)
+    # t-SNE i TRIMAP nie potrafią rzutować nowych punktów - używana jest interpolacja kNN
+    return None
+
+def _landmark_count(method: str, n_samples: int, n_components: int, params: Dict[str, Any]) -> Optional[int]:
+    """
+    Ustala, czy użyć trybu dużych danych, i zwraca liczbę punktów orientacyjnych (None = pełne dopasowanie).
+    Parametr 'large_data' przyjmuje wartości 'auto', True lub False.
+    """
+    large_data = params.get('large_data', 'auto')
+    n_landmarks = params.get('n_landmarks', DEFAULT_N_LANDMARKS)
+    exact_tsne = method == 't-SNE' and n_components > 3
+    if exact_tsne:
+        n_landmarks = min(n_landmarks, EXACT_TSNE_MAX_SAMPLES)
+
+    if large_data == 'auto':
+        large_data = n_samples > LARGE_DATA_THRESHOLD or (exact_tsne and n_samples > EXACT_TSNE_MAX_SAMPLES)
+    elif not large_data and exact_tsne and n_samples > EXACT_TSNE_MAX_SAMPLES:
+        raise ValueError(
+            f"Dokładny t-SNE (powyżej 3 wymiarów) jest dostępny dla maksymalnie {EXACT_TSNE_MAX_SAMPLES} wierszy. "
+            "Włącz tryb dużych danych lub zmniejsz liczbę wierszy."
+        )
+
+    if large_data and n_samples > n_landmarks:
+        return n_landmarks
+    return None
+
+def _prepare_numeric(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Rozdziela dane na numeryczne (bez NaN) i nienumeryczne oraz sprawdza, czy nadają się do redukcji."""
     # --- ZMIANA 1: Rozdzielenie danych na numeryczne i nienumeryczne ---
     non_numeric_df = df.select_dtypes(exclude=['number'])
     numeric_df_raw = df.select_dtypes(include=['number'])
@@ -46,7 +129,6 @@ def reduce_dimensions(df: pd.DataFrame, method: Literal['t-SNE', 'UMAP', 'TRIMAP
     if numeric_df_clean.empty:
         raise ValueError("Brak kolumn numerycznych do redukcji wymiarowości po usunięciu NaN.")
     
-    n_components = params.get('n_components', 2)
     n_samples = len(numeric_df_clean)
     n_features = len(numeric_df_clean.columns)
     
@@ -55,51 +137,106 @@ def reduce_dimensions(df: pd.DataFrame, method: Literal['t-SNE', 'UMAP', 'TRIMAP
         raise ValueError(f"Za mało próbek ({n_samples}) po usunięciu NaN. Potrzebne minimum 4 próbki.")
     if n_features < 2:
         raise ValueError(f"Za mało cech ({n_features}). Potrzebne minimum 2 cechy.")
-    
-    # Przygotuj parametry dla każdej metody (bez zmian)
-    if method == 't-SNE':
-        if n_components > 3:
-            tsne_method = 'exact'
-        else:
-            tsne_method = 'barnes_hut'
-        perplexity = min(30, max(5, (n_samples - 1) // 3))
-        reducer = TSNE(n_components=n_components, perplexity=perplexity, method=tsne_method, random_state=42, init='random')
-        
-    elif method == 'UMAP':
-        n_neighbors = min(15, max(2, n_samples - 1))
-        reducer = UMAP(n_components=n_components, n_neighbors=n_neighbors, random_state=42, min_dist=0.1)
-        
-    elif method == 'TRIMAP':
-        if not TRIMAP_AVAILABLE: raise ValueError("TRIMAP nie jest dostępny.")
-        n_inliers = min(10, max(1, n_samples // 10))
-        n_outliers = min(5, max(1, n_samples // 20))
-        reducer = TRIMAP(n_dims=n_components, n_inliers=n_inliers, n_outliers=n_outliers, verbose=False)
-        
-    elif method == 'PaCMAP':
-        if not PACMAP_AVAILABLE: raise ValueError("PaCMAP nie jest dostępny.")
-        n_neighbors = min(10, max(2, n_samples - 1))
-        reducer = PaCMAP(n_components=n_components, n_neighbors=n_neighbors, random_state=42)
-        
-    else:
-        raise ValueError(f"Nieznana metoda redukcji wymiarowości: {method}")
-    
-    # Normalizacja danych
+
+    return numeric_df_clean, non_numeric_df
+
+def _scale(numeric_df: pd.DataFrame) -> np.ndarray:
+    """Normalizuje dane numeryczne (średnia 0, odchylenie 1)."""
     from sklearn.preprocessing import StandardScaler
-    scaler = StandardScaler()
-    scaled_data = scaler.fit_transform(numeric_df_clean)
-    
-    # Wykonaj redukcję
-    try:
-        transformed_data = reducer.fit_transform(scaled_data)
-    except Exception as e:
-        raise ValueError(f"Błąd podczas redukcji wymiarowości metodą {method}: {str(e)}")
-    
+    return StandardScaler().fit_transform(numeric_df)
+
+def prepare_reduction_input(df: pd.DataFrame) -> Tuple[np.ndarray, pd.Index, pd.DataFrame]:
+    """
+    Przygotowuje dane do redukcji: wybiera kolumny numeryczne, usuwa wiersze z NaN i normalizuje je.
+    Zwraca znormalizowaną macierz, indeks użytych wierszy i kolumny nienumeryczne (do połączenia z wynikiem).
+    """
+    with span('reduce.prepare', rows=len(df), columns=len(df.columns)):
+        numeric_df_clean, non_numeric_df = _prepare_numeric(df)
+
+    # Normalizacja danych
+    with span('reduce.scale', rows=len(numeric_df_clean), columns=len(numeric_df_clean.columns)):
+        scaled_data = _scale(numeric_df_clean)
+    return scaled_data, numeric_df_clean.index, non_numeric_df
+
+def embed_scaled(scaled_data: np.ndarray, method: Literal['t-SNE', 'UMAP', 'TRIMAP', 'PaCMAP'], params: Dict[str, Any]) -> np.ndarray:
+    """
+    Dopasowuje reduktor do znormalizowanej macierzy (z prepare_reduction_input) i zwraca osadzenie.
+    Parametr 'hyperparams' nadpisuje wybrane hiperparametry dobrane automatycznie do liczby próbek,
+    a 'init' (macierz wiersze x n_components) to położenia początkowe - optymalizacja startuje z nich
+    i wykonuje mniej iteracji (WARM_START_ITERATIONS).
+    Macierz nie jest modyfikowana, więc może być tablicą tylko do odczytu (np. np.memmap).
+    """
+    n_components = params.get('n_components', 2)
+    n_samples = len(scaled_data)
+    n_landmarks = _landmark_count(method, n_samples, n_components, params)
+
+    # Przygotuj parametry dla każdej metody (dopasowane do liczby próbek, na których uczy się reduktor)
+    hyperparams = _reducer_hyperparams(method, n_components, n_landmarks or n_samples)
+    hyperparams.update(params.get('hyperparams') or {})
+    transform = None
+    if n_landmarks is not None:
+        hyperparams['n_landmarks'] = n_landmarks
+        # Sposób umieszczenia pozostałych wierszy zmienia wynik (rzutowanie reduktorem albo interpolacja kNN)
+        if params.get('placement', 'transform') == 'transform':
+            transform = _out_of_sample_transform(method)
+        hyperparams['placement'] = 'transform' if transform is not None else 'knn'
+    init = params.get('init')
+    if init is not None:
+        # Wynik zależy od położeń początkowych - są częścią klucza pamięci podręcznej
+        hyperparams['warm_start'] = fingerprint_matrix(np.asarray(init, dtype=np.float64))
+
+    # Ten sam zestaw danych i ustawień daje ten sam wynik - korzystamy z pamięci podręcznej
+    cache = get_default_embedding_cache() if params.get('use_cache', True) else None
+    cache_key = make_embedding_key(fingerprint_matrix(scaled_data), method, n_components, hyperparams) if cache is not None else None
+    transformed_data = cache.get(cache_key) if cache is not None else None
+
+    if transformed_data is None:
+        reducer = _build_reducer(method, n_components, hyperparams, out_of_sample=transform is not None)
+        # Wykonaj redukcję
+        try:
+            with span('reduce.fit', method=method, rows=n_samples, columns=scaled_data.shape[1],
+                      n_components=n_components, n_landmarks=n_landmarks):
+                if n_landmarks is not None:
+                    landmark_fit = None
+                    if init is not None:
+                        landmark_fit = lambda reducer, data, positions: _fit_transform(method, reducer, data, init[positions])
+                    transformed_data = fit_with_landmarks(scaled_data, reducer, n_landmarks, transform, fit=landmark_fit)
+                else:
+                    transformed_data = _fit_transform(method, reducer, scaled_data, init)
+        except Exception as e:
+            raise ValueError(f"Błąd podczas redukcji wymiarowości metodą {method}: {str(e)}")
+        if cache is not None:
+            cache.put(cache_key, transformed_data)
+    return transformed_data
+
+def reduce_dimensions(df: pd.DataFrame, method: Literal['t-SNE', 'UMAP', 'TRIMAP', 'PaCMAP'], params: Dict[str, Any],
+                      warm_start: Optional[PreviousEmbedding] = None) -> pd.DataFrame:
+    """
+    Redukuje wymiarowość danych numerycznych i łączy wynik z oryginalnymi danymi nienumerycznymi.
+
+    Z `warm_start` (poprzednie osadzenie w tej samej historii modyfikacji) dopasowanie startuje z poprzednich
+    położeń wierszy, a nowe wiersze - z położeń ich najbliższych sąsiadów (src/warm_start.py). Zbieżność jest
+    szybsza, a kolejne wykresy zachowują układ poprzednich.
+
+    Dla dużych zbiorów (parametr 'large_data') reduktor jest dopasowywany na 'n_landmarks'
+    punktach orientacyjnych, a pozostałe wiersze są rzutowane przez transform (UMAP, PaCMAP)
+    lub umieszczane interpolacją najbliższych sąsiadów (t-SNE, TRIMAP, albo gdy 'placement' == 'knn').
+    """
+    scaled_data, index, non_numeric_df = prepare_reduction_input(df)
+    n_components = params.get('n_components', 2)
+    if warm_start is not None:
+        init = initial_layout(warm_start, index, scaled_data, n_components)
+        if init is not None:
+            params = dict(params, init=init)
+    transformed_data = embed_scaled(scaled_data, method, params)
+
     # --- ZMIANA 2: Utworzenie nowej ramki danych i połączenie z danymi nienumerycznymi ---
     # Utwórz ramkę danych z wynikami redukcji, używając indeksu z oczyszczonych danych
     reduced_df = pd.DataFrame(
         transformed_data,
         columns=[f'Komponent_{i+1}' for i in range(n_components)],
-        index=numeric_df_clean.index
+        index=index,
+        copy=True  # Wynik z pamięci podręcznej jest tylko do odczytu
     )
     
     # Połącz wyniki z oryginalnymi danymi nienumerycznymi
@@ -108,6 +245,32 @@ def reduce_dimensions(df: pd.DataFrame, method: Literal['t-SNE', 'UMAP', 'TRIMAP
     
     return final_df
 
+def landmark_drift_report(df: pd.DataFrame, method: Literal['t-SNE', 'UMAP', 'TRIMAP', 'PaCMAP'], params: Dict[str, Any], n_eval: int = 2_000) -> Dict[str, Any]:
+    """
+    Porównuje tryb dużych danych z pełnym dopasowaniem na losowym podzbiorze `n_eval` wierszy.
+    Zwraca zgodność sąsiedztw (1.0 = identyczne) i wiarygodność obu osadzeń.
+    """
+    numeric_df_clean, _ = _prepare_numeric(df)
+    n_components = params.get('n_components', 2)
+    n_samples = len(numeric_df_clean)
+    n_landmarks = params.get('n_landmarks', DEFAULT_N_LANDMARKS)
+    if method == 't-SNE' and n_components > 3:
+        n_eval = min(n_eval, EXACT_TSNE_MAX_SAMPLES)
+
+    transform = _out_of_sample_transform(method) if params.get('placement', 'transform') == 'transform' else None
+
+    def reducer_factory(n_fit: int):
+        hyperparams = _reducer_hyperparams(method, n_components, n_fit)
+        return _build_reducer(method, n_components, hyperparams, out_of_sample=transform is not None)
+
+    return estimate_landmark_drift(
+        _scale(numeric_df_clean),
+        reducer_factory,
+        transform,
+        landmark_fraction=min(1.0, n_landmarks / n_samples),
+        n_eval=n_eval,
+    )
+
 def remove_columns(df: pd.DataFrame, columns_to_remove: List[str]) -> pd.DataFrame:
     """
     Usuwa wybrane kolumny z ramki danych.
@@ -0,0 +1,145 @@
+# src/dataset_cache.py
+
+import hashlib
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+from typing import Optional, Union, IO
+
+from src.config import CACHE_DIR, DATASET_CACHE_MAX_MB
+
+# Zmiana sposobu parsowania lub wnioskowania typów wymaga podbicia wersji, aby unieważnić stare wpisy
+CACHE_FORMAT_VERSION = 2
+_HASH_BLOCK_BYTES = 1024 * 1024
+_CACHE_SUFFIX = '.arrow'
+
+def hash_source(source: Union[str, IO[bytes]]) -> str:
+    """
+    Oblicza skrót SHA-256 zawartości pliku.
+    Dla przesłanych plików (UploadedFile) haszuje bufor bezpośrednio, bez kopiowania bajtów.
+    """
+    digest = hashlib.sha256()
+    if hasattr(source, 'getbuffer'):
+        digest.update(source.getbuffer())
+    elif hasattr(source, 'read'):
+        position = source.tell()
+        source.seek(0)
+        for block in iter(lambda: source.read(_HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+        source.seek(position)
+    else:
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def path_fingerprint(path: Union[str, Path]) -> str:
+    """
+    Identyfikator pliku na serwerze na podstawie ścieżki, rozmiaru i czasu modyfikacji
+    (bez czytania zawartości - pliki lokalne mogą mieć dziesiątki GB).
+    """
+    stat = os.stat(path)
+    signature = f"{os.path.realpath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha256(signature.encode('utf-8')).hexdigest()
+
+def write_frame(path: Union[str, Path], df: pd.DataFrame) -> None:
+    """
+    Zapisuje ramkę danych (wraz z indeksem i typami kolumn) do pliku Arrow IPC. Zapis do pliku
+    tymczasowego i atomowa podmiana chronią przed odczytem niepełnego pliku.
+    """
+    path = Path(path)
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    try:
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+def read_frame(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Odczytuje ramkę zapisaną przez write_frame przez mapowanie pamięci. Kolumny numeryczne
+    bez braków danych wskazują bezpośrednio na zmapowany plik (tylko do odczytu).
+    """
+    with pa.memory_map(str(path), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+class DatasetCache:
+    """
+    Trwała pamięć podręczna sparsowanych zbiorów danych w formacie Arrow IPC.
+
+    Kluczem jest skrót zawartości pliku wraz z ustawieniami wczytywania, dzięki czemu ponowne
+    przesłanie tego samego pliku nie wymaga parsowania. Pliki są odczytywane przez mapowanie
+    pamięci, a po przekroczeniu limitu rozmiaru usuwane są najdawniej używane wpisy (LRU).
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR / 'datasets'
+        self.max_bytes = max_bytes if max_bytes is not None else DATASET_CACHE_MAX_MB * 1024 * 1024
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(content_hash: str, separator: str, decimal: str) -> str:
+        """Tworzy klucz wpisu na podstawie skrótu zawartości i ustawień wczytywania."""
+        settings = f"{content_hash}|{separator}|{decimal}|v{CACHE_FORMAT_VERSION}"
+        return hashlib.sha256(settings.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{_CACHE_SUFFIX}"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Zwraca zapisaną ramkę danych lub None, jeśli wpisu nie ma.
+        Kolumny numeryczne bez braków danych wskazują bezpośrednio na zmapowany plik (tylko do odczytu).
+        """
+        path = self._path(key)
+        try:
+            df = read_frame(path)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+
+        # Oznacz wpis jako ostatnio używany
+        os.utime(path)
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """Zapisuje ramkę danych (wraz z indeksem i typami kolumn) i w razie potrzeby zwalnia miejsce."""
+        write_frame(self._path(key), df)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Usuwa najdawniej używane wpisy, dopóki łączny rozmiar przekracza limit."""
+        entries = []
+        for path in self.cache_dir.glob(f"*{_CACHE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Usuwa wszystkie wpisy z pamięci podręcznej."""
+        for path in self.cache_dir.glob(f"*{_CACHE_SUFFIX}"):
+            path.unlink(missing_ok=True)
+
+_default_cache: Optional[DatasetCache] = None
+
+def get_default_cache() -> DatasetCache:
+    """Zwraca współdzieloną instancję pamięci podręcznej skonfigurowaną w src/config.py."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DatasetCache()
+    return _default_cache
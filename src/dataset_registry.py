@@ -0,0 +1,146 @@
+# src/dataset_registry.py
+
+import hashlib
+import threading
+import time
+import weakref
+import pandas as pd
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from src.config import DATASET_REGISTRY_MAX_MB, DATASET_REGISTRY_IDLE_SECONDS
+
+def _keep(key: str) -> None:
+    """Zwolnienie uchwytu zbioru prywatnego - ramka znika razem z sesją."""
+
+@dataclass
+class _Entry:
+    frame: pd.DataFrame
+    nbytes: int
+    refcount: int = 0
+    released_at: float = field(default_factory=time.monotonic)
+
+class DatasetHandle:
+    """
+    Odwołanie sesji do współdzielonego zbioru danych. Ramka jest tylko do odczytu - modyfikacje
+    sesji są widokami (src/pipeline.py). Odwołanie jest zwalniane przez `release()` albo
+    automatycznie, gdy uchwyt przestaje istnieć (np. po zakończeniu sesji Streamlit).
+    Uchwyt bez rejestru (`shared` == False) dotyczy zbioru prywatnego sesji, który nie zmieścił się w budżecie.
+    """
+
+    def __init__(self, registry: Optional['DatasetRegistry'], key: str, frame: pd.DataFrame):
+        self.key = key
+        self.frame = frame
+        self.shared = registry is not None
+        self._finalizer = weakref.finalize(self, registry._release if registry is not None else _keep, key)
+
+    def release(self) -> None:
+        """Zwalnia odwołanie (wielokrotne wywołanie nie ma efektu)."""
+        self._finalizer()
+
+    @property
+    def released(self) -> bool:
+        return not self._finalizer.alive
+
+    @property
+    def fingerprint(self) -> str:
+        """Krótki identyfikator zbioru i ustawień wczytania (np. do oznaczania pomiarów wydajności)."""
+        return hashlib.blake2b(self.key.encode('utf-8'), digest_size=8).hexdigest()
+
+class DatasetRegistry:
+    """
+    Rejestr zbiorów danych wspólny dla wszystkich sesji w procesie serwera, adresowany zawartością pliku.
+
+    Ten sam plik wczytany przez wiele sesji jest przechowywany raz, więc zużycie pamięci zależy
+    od liczby różnych zbiorów, a nie od liczby użytkowników. Wpisy są liczone referencjami:
+    nieużywane wpisy są usuwane po czasie bezczynności albo wcześniej (najdawniej zwolnione),
+    gdy łączny rozmiar przekroczyłby budżet pamięci. Wpisów używanych przez sesje nie da się usunąć,
+    dlatego zbiór, dla którego nie da się w ten sposób zrobić miejsca, nie jest rejestrowany - sesja
+    dostaje uchwyt prywatny i łączny rozmiar rejestru nigdy nie przekracza budżetu.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, idle_seconds: Optional[float] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else DATASET_REGISTRY_MAX_MB * 1024 * 1024
+        self.idle_seconds = idle_seconds if idle_seconds is not None else DATASET_REGISTRY_IDLE_SECONDS
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        # RLock - zwolnienie uchwytu przez odśmiecacz może nastąpić w trakcie operacji na rejestrze
+        self._lock = threading.RLock()
+
+    def acquire(self, key: str) -> Optional[DatasetHandle]:
+        """Zwraca nowe odwołanie do zbioru o podanym kluczu lub None, jeśli go nie ma w rejestrze."""
+        with self._lock:
+            self._sweep()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.refcount += 1
+            return DatasetHandle(self, key, entry.frame)
+
+    def register(self, key: str, frame: pd.DataFrame) -> DatasetHandle:
+        """
+        Dodaje zbiór do rejestru i zwraca odwołanie. Jeśli inna sesja zdążyła w międzyczasie
+        zarejestrować ten sam zbiór, zwracane jest odwołanie do istniejącej ramki (nowa jest pomijana).
+        Gdy zbiór nie mieści się w budżecie nawet po usunięciu nieużywanych wpisów, zwracany jest
+        uchwyt prywatny (`shared` == False) - ramka nie jest współdzielona ani liczona w budżecie.
+        """
+        # Rozmiar z treścią napisów (kolumny tekstowe zajmują wielokrotnie więcej niż same wskaźniki);
+        # liczony raz i poza blokadą, bo wymaga przejrzenia wszystkich wartości tekstowych
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._sweep(reserve=nbytes)
+                if self.total_bytes + nbytes > self.max_bytes:
+                    return DatasetHandle(None, key, frame)
+                entry = _Entry(frame, nbytes)
+                self._entries[key] = entry
+            entry.refcount += 1
+            return DatasetHandle(self, key, entry.frame)
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refcount = max(0, entry.refcount - 1)
+            if entry.refcount == 0:
+                entry.released_at = time.monotonic()
+                # Kolejność w słowniku odpowiada kolejności zwalniania (najdawniej zwolnione na początku)
+                self._entries.move_to_end(key)
+            self._sweep()
+
+    def _sweep(self, reserve: int = 0) -> None:
+        """Usuwa nieużywane wpisy po czasie bezczynności oraz ponad budżet pamięci (pomniejszony o `reserve` bajtów)."""
+        now = time.monotonic()
+        total = self.total_bytes + reserve
+        for key, entry in list(self._entries.items()):
+            if entry.refcount > 0:
+                continue
+            if now - entry.released_at > self.idle_seconds or total > self.max_bytes:
+                del self._entries[key]
+                total -= entry.nbytes
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def stats(self) -> Dict[str, int]:
+        """Liczba zbiorów, odwołań i łączny rozmiar (do wyświetlenia w panelu)."""
+        with self._lock:
+            return {
+                'datasets': len(self._entries),
+                'references': sum(entry.refcount for entry in self._entries.values()),
+                'bytes': self.total_bytes,
+            }
+
+_default_registry: Optional[DatasetRegistry] = None
+_default_registry_lock = threading.Lock()
+
+def get_dataset_registry() -> DatasetRegistry:
+    """Zwraca rejestr zbiorów danych współdzielony przez wszystkie sesje w procesie."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = DatasetRegistry()
+        return _default_registry
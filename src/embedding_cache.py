@@ -0,0 +1,139 @@
+# src/embedding_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from src.config import CACHE_DIR, EMBEDDING_CACHE_ENTRIES, EMBEDDING_CACHE_SPILL, EMBEDDING_CACHE_DISK_MB
+
+def fingerprint_matrix(matrix: np.ndarray) -> str:
+    """Oblicza skrót zawartości macierzy (wraz z kształtem i typem danych)."""
+    matrix = np.ascontiguousarray(matrix)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{matrix.shape}|{matrix.dtype.str}".encode('utf-8'))
+    digest.update(matrix.view(np.uint8).reshape(-1))
+    return digest.hexdigest()
+
+def make_embedding_key(data_fingerprint: str, method: str, n_components: int, hyperparams: Dict[str, Any]) -> str:
+    """Tworzy klucz osadzenia z odcisku danych, metody, liczby wymiarów i hiperparametrów."""
+    payload = json.dumps(
+        {'data': data_fingerprint, 'method': method, 'n_components': n_components, 'params': hyperparams},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=20).hexdigest()
+
+class EmbeddingCache:
+    """
+    Pamięć podręczna wyników redukcji wymiarowości adresowana zawartością danych.
+
+    Wpisy są trzymane w pamięci z limitem liczby elementów (LRU). Z katalogiem `spill_dir` każdy wpis
+    jest od razu zapisywany także na dysku (write-through), skąd odczytują go inne procesy - redukcje
+    liczone są w procesach roboczych zadań (src/jobs.py), a ich pamięć nie jest współdzielona.
+    Instancja jest bezpieczna wątkowo, więc może być współdzielona przez wszystkie sesje Streamlit w procesie.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = EMBEDDING_CACHE_ENTRIES,
+        spill_dir: Optional[Union[str, Path]] = None,
+        max_disk_bytes: int = EMBEDDING_CACHE_DISK_MB * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Zwraca osadzenie (tylko do odczytu) lub None, jeśli nie było obliczone."""
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                return embedding
+
+        embedding = self._load_spilled(key)
+        if embedding is not None:
+            self.put(key, embedding)
+        return embedding
+
+    def put(self, key: str, embedding: np.ndarray) -> None:
+        """Zapisuje osadzenie w pamięci (najdawniej używane wpisy są wypierane) i na dysku."""
+        embedding = np.array(embedding, copy=True)
+        embedding.flags.writeable = False
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._spill(key, embedding)
+
+    def clear(self) -> None:
+        """Usuwa wszystkie wpisy z pamięci (wpisy na dysku pozostają)."""
+        with self._lock:
+            self._entries.clear()
+
+    def _spill_path(self, key: str) -> Path:
+        return self.spill_dir / f"{key}.npy"
+
+    def _spill(self, key: str, embedding: np.ndarray) -> None:
+        if self.spill_dir is None:
+            return
+        path = self._spill_path(key)
+        if path.exists():
+            os.utime(path)
+            return
+        tmp_path = self.spill_dir / f"{key}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, embedding)
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _load_spilled(self, key: str) -> Optional[np.ndarray]:
+        if self.spill_dir is None:
+            return None
+        path = self._spill_path(key)
+        try:
+            embedding = np.load(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(path)
+        return embedding
+
+    def _evict_disk(self) -> None:
+        """Usuwa najdawniej używane pliki, dopóki łączny rozmiar przekracza limit."""
+        entries = []
+        for path in self.spill_dir.glob('*.npy'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_default_embedding_cache() -> EmbeddingCache:
+    """Zwraca współdzieloną w procesie instancję pamięci podręcznej osadzeń."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            spill_dir = CACHE_DIR / 'embeddings' if EMBEDDING_CACHE_SPILL else None
+            _default_cache = EmbeddingCache(spill_dir=spill_dir)
+        return _default_cache
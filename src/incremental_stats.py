@@ -0,0 +1,436 @@
+# src/incremental_stats.py
+
+import itertools
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional
+
+from src.correlation import blocked_product, pairwise_sums
+
+# Liczba wierszy w bloku, dla którego przechowywane są statystyki jednowymiarowe
+BLOCK_ROWS = 65_536
+# Rozmiar próbki (rezerwuaru) do przybliżania kwartyli, gdy dane są przetwarzane strumieniowo
+QUANTILE_SAMPLE_ROWS = 100_000
+
+# Maksymalna liczba wartości tablic rang przeliczanych naraz dla pary grup kolumn (korelacja Spearmana z brakami)
+RERANK_BLOCK_VALUES = 1 << 22
+
+DESCRIBE_COLUMNS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+@dataclass
+class ColumnMoments:
+    """Statystyki dostateczne kolumn: liczność, średnia, suma kwadratów odchyleń, minimum i maksimum."""
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    minimum: np.ndarray
+    maximum: np.ndarray
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> 'ColumnMoments':
+        """Oblicza statystyki dla macierzy (wiersze x kolumny), pomijając NaN."""
+        present = ~np.isnan(values)
+        count = present.sum(axis=0).astype(np.float64)
+        total = np.where(present, values, 0.0).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / count, np.nan)
+        m2 = np.where(present, (values - mean) ** 2, 0.0).sum(axis=0)
+        return cls(count, mean, m2, np.fmin.reduce(values, axis=0), np.fmax.reduce(values, axis=0))
+
+    def merge(self, other: 'ColumnMoments') -> 'ColumnMoments':
+        """Łączy statystyki dwóch rozłącznych zbiorów wierszy (wzór Chana)."""
+        count = self.count + other.count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = np.nan_to_num(other.mean) - np.nan_to_num(self.mean)
+            mean = np.where(count > 0, np.nan_to_num(self.mean) + delta * other.count / count, np.nan)
+            m2 = np.where(count > 0, self.m2 + other.m2 + delta ** 2 * self.count * other.count / count, 0.0)
+        return ColumnMoments(count, mean, m2, np.fmin(self.minimum, other.minimum), np.fmax(self.maximum, other.maximum))
+
+    def take(self, positions: np.ndarray) -> 'ColumnMoments':
+        """Zwraca statystyki wybranych kolumn (projekcja)."""
+        return ColumnMoments(self.count[positions], self.mean[positions], self.m2[positions],
+                             self.minimum[positions], self.maximum[positions])
+
+    @property
+    def std(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+@dataclass
+class CoMoments:
+    """
+    Sumy potrzebne do korelacji Pearsona z parami kompletnych obserwacji (jak DataFrame.corr).
+    Dla pary kolumn (i, j) liczone są tylko wiersze, w których obie wartości istnieją:
+    n[i, j], suma x_i (sx[i, j]), suma x_i² (sxx[i, j]) oraz suma x_i·x_j (sxy[i, j]).
+    Wartości są przesunięte o `shift` (średnie z pierwszego bloku) dla stabilności numerycznej.
+    """
+    shift: np.ndarray
+    n: np.ndarray
+    sx: np.ndarray
+    sxx: np.ndarray
+    sxy: np.ndarray
+
+    @classmethod
+    def from_array(cls, values: np.ndarray, shift: Optional[np.ndarray] = None) -> 'CoMoments':
+        if shift is None:
+            with np.errstate(invalid='ignore'):
+                shift = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else np.zeros(values.shape[1])
+        n, sx, sxx, sxy = pairwise_sums(values - shift)
+        return cls(shift=shift, n=n, sx=sx, sxx=sxx, sxy=sxy)
+
+    def merge(self, other: 'CoMoments') -> 'CoMoments':
+        """Łączy sumy dwóch rozłącznych zbiorów wierszy (przesuwając drugi zbiór do wspólnego przesunięcia)."""
+        d = other.shift - self.shift
+        if np.any(d):
+            # Sumy dla x - s1 wyrażone przez sumy dla x - s2: x - s1 = (x - s2) + d
+            sx = other.sx + d[:, None] * other.n
+            sxx = other.sxx + 2 * d[:, None] * other.sx + (d[:, None] ** 2) * other.n
+            sxy = other.sxy + d[:, None] * other.sx.T + d[None, :] * other.sx + np.outer(d, d) * other.n
+            other = CoMoments(self.shift, other.n, sx, sxx, sxy)
+        return CoMoments(self.shift, self.n + other.n, self.sx + other.sx, self.sxx + other.sxx, self.sxy + other.sxy)
+
+    def take(self, positions: np.ndarray) -> 'CoMoments':
+        """Zwraca sumy dla wybranych kolumn (projekcja)."""
+        grid = np.ix_(positions, positions)
+        return CoMoments(self.shift[positions], self.n[grid], self.sx[grid], self.sxx[grid], self.sxy[grid])
+
+    def correlation(self) -> np.ndarray:
+        """Macierz współczynników korelacji Pearsona."""
+        n, sx, sy = self.n, self.sx, self.sx.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = n * self.sxy - sx * sy
+            variance_x = n * self.sxx - sx ** 2
+            variance_y = n * self.sxx.T - sy ** 2
+            corr = covariance / np.sqrt(variance_x * variance_y)
+        corr = np.clip(corr, -1.0, 1.0)
+        corr[n < 2] = np.nan
+        return corr
+
+def _ranks_within(kept: np.ndarray, dropped: np.ndarray) -> np.ndarray:
+    """
+    Rangi (średnie dla remisów) pozostawionych wierszy kilku kolumn liczone tylko w obrębie tych wierszy,
+    wyznaczone z podwojonych rang po wszystkich wartościach kolumn bez sortowania: ranga maleje o liczbę
+    pominiętych wartości mniejszych i o połowę liczby pominiętych wartości równych (liczności pominiętych
+    rang są zliczane w tablicy indeksowanej podwojoną rangą).
+
+    Args:
+        kept: Podwojone rangi pozostawionych wierszy (wiersze × kolumny).
+        dropped: Podwojone rangi pominiętych wierszy tych samych kolumn.
+
+    Returns:
+        Macierz rang (float64) o kształcie `kept`.
+    """
+    if not len(dropped):
+        return kept / 2
+    n_columns = kept.shape[1]
+    # Kolumny przesunięte o rozłączne zakresy wartości - jedno zliczanie obsługuje wszystkie kolumny naraz
+    width = int(max(kept.max(), dropped.max())) + 1
+    offsets = np.arange(n_columns, dtype=np.int64) * width
+    removed = np.bincount((dropped + offsets).ravel(), minlength=n_columns * width)
+    below = np.cumsum(removed) - np.repeat(np.arange(n_columns) * len(dropped), width)
+    needles = kept + offsets
+    return kept / 2 - below[needles - 1] - removed[needles] / 2
+
+def _column_chunks(columns: List[int], n_values: int) -> List[List[int]]:
+    """Dzieli kolumny na porcje, w których macierz n_values × kolumny nie przekracza RERANK_BLOCK_VALUES."""
+    width = max(1, RERANK_BLOCK_VALUES // max(n_values, 1))
+    return [columns[i:i + width] for i in range(0, len(columns), width)]
+
+@dataclass
+class _Block:
+    """Statystyki jednowymiarowe zakresu wierszy [start, stop)."""
+    start: int
+    stop: int
+    moments: ColumnMoments
+
+class StatisticsEngine:
+    """
+    Przyrostowy silnik statystyk dla bieżącego zbioru danych.
+
+    Przechowuje statystyki dostateczne (liczność, sumy, sumy kwadratów, min/max) dla bloków wierszy
+    oraz leniwie wyliczane sumy par kolumn (korelacja) i rangi (Spearman). Dzięki temu:
+    - usunięcie kolumn jest projekcją już policzonych statystyk,
+    - podzbiór 'pierwsze n' / 'ostatnie n' wykorzystuje pełne bloki i przelicza tylko blok brzegowy,
+    - dane mogą być dostarczane w kawałkach (`update`), bez trzymania drugiej pełnej kopii.
+    """
+
+    def __init__(self, columns: List[str], frame: Optional[pd.DataFrame] = None, block_rows: int = BLOCK_ROWS):
+        self.columns = list(columns)
+        self.block_rows = block_rows
+        self._frame = frame
+        self._blocks: List[_Block] = []
+        self._n_rows = 0
+        self._comoments: Dict[str, CoMoments] = {}
+        self._quantiles: Dict[str, np.ndarray] = {}
+        self._ranks: Dict[str, np.ndarray] = {}
+        self._reservoir: Optional[np.ndarray] = None
+        self._rng = np.random.default_rng(42)
+
+    # --- Budowa i aktualizacja ---
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, block_rows: int = BLOCK_ROWS) -> 'StatisticsEngine':
+        """
+        Tworzy silnik dla ramki danych (statystyki blokowe liczone od razu, korelacje na żądanie).
+        Silnik przechowuje tylko referencję do ramki, bez kopiowania danych (kopiowane są pojedyncze bloki).
+        """
+        engine = cls(df.select_dtypes(include=['number']).columns.tolist(), frame=df, block_rows=block_rows)
+        engine._append_blocks(df, 0)
+        engine._n_rows = len(df)
+        return engine
+
+    def _values(self, df: pd.DataFrame) -> np.ndarray:
+        """Kopiuje kolumny silnika z (niewielkiego) fragmentu ramki do macierzy float64."""
+        return df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def _append_blocks(self, df: pd.DataFrame, offset: int) -> None:
+        for start in range(0, len(df), self.block_rows):
+            stop = min(start + self.block_rows, len(df))
+            moments = ColumnMoments.from_array(self._values(df.iloc[start:stop]))
+            self._blocks.append(_Block(offset + start, offset + stop, moments))
+
+    def update(self, chunk: pd.DataFrame, frame: Optional[pd.DataFrame] = None) -> None:
+        """
+        Dołącza kolejny kawałek wierszy. Statystyki jednowymiarowe, sumy par kolumn (Pearson)
+        i próbka do kwartyli są aktualizowane przyrostowo.
+
+        Args:
+            chunk: Nowe wiersze (muszą zawierać kolumny silnika).
+            frame: Pełna ramka po dołączeniu wierszy, jeśli jest przechowywana w pamięci
+                (umożliwia dokładne kwartyle i korelację Spearmana). Bez niej silnik działa strumieniowo.
+        """
+        if len(chunk) == 0:
+            return
+        offset = self._n_rows
+        self._append_blocks(chunk, offset)
+        self._n_rows += len(chunk)
+
+        values = None
+        if 'pearson' in self._comoments or frame is None:
+            values = self._values(chunk)
+            update = CoMoments.from_array(values, self._comoments['pearson'].shift if 'pearson' in self._comoments else None)
+            self._comoments['pearson'] = self._comoments['pearson'].merge(update) if 'pearson' in self._comoments else update
+
+        self._frame = frame
+        self._quantiles.clear()
+        self._ranks.clear()
+        self._comoments.pop('spearman', None)
+        if self._frame is None:
+            self._update_reservoir(values if values is not None else self._values(chunk), offset)
+
+    def _update_reservoir(self, values: np.ndarray, offset: int) -> None:
+        """Aktualizuje równomierną próbkę wierszy (algorytm rezerwuarowy) używaną do przybliżania kwartyli."""
+        if self._reservoir is None:
+            self._reservoir = np.empty((0, len(self.columns)))
+        free = max(0, QUANTILE_SAMPLE_ROWS - len(self._reservoir))
+        self._reservoir = np.vstack([self._reservoir, values[:free]])
+        rest = values[free:]
+        if len(rest):
+            seen = offset + free + np.arange(1, len(rest) + 1)
+            slots = (self._rng.random(len(rest)) * seen).astype(np.int64)
+            rows = np.flatnonzero(slots < QUANTILE_SAMPLE_ROWS)
+            # Przy powtórzonym miejscu wygrywa późniejszy wiersz (jak w sekwencyjnym algorytmie)
+            _, last = np.unique(slots[rows][::-1], return_index=True)
+            rows = rows[len(rows) - 1 - last]
+            self._reservoir[slots[rows]] = rest[rows]
+
+    def attach(self, frame: Optional[pd.DataFrame]) -> 'StatisticsEngine':
+        """Podłącza ramkę danych, której dotyczą statystyki (np. po przesłaniu silnika między procesami)."""
+        self._frame = frame
+        return self
+
+    def __getstate__(self):
+        # Ramka ani rangi kolumn (wektor liczb całkowitych na kolumnę) nie są serializowane - przy przesyłaniu do procesu
+        # roboczego i z powrotem powstawałaby druga pełna kopia danych; strona odbierająca podłącza ramkę
+        # przez attach(), a rangi są liczone ponownie tylko wtedy, gdy brakuje zapamiętanych sum Spearmana
+        state = self.__dict__.copy()
+        state['_frame'] = None
+        state['_ranks'] = {}
+        return state
+
+    # --- Pochodne silniki (projekcja, podzbiory wierszy) ---
+
+    def _derive(self, columns: List[str], frame: Optional[pd.DataFrame]) -> 'StatisticsEngine':
+        engine = StatisticsEngine(columns, frame=frame, block_rows=self.block_rows)
+        engine._reservoir = self._reservoir
+        return engine
+
+    def _positions(self, columns: List[str]) -> np.ndarray:
+        index = {col: i for i, col in enumerate(self.columns)}
+        missing = [col for col in columns if col not in index]
+        if missing:
+            raise ValueError(f"Kolumny nie są numeryczne lub nie istnieją: {', '.join(map(str, missing))}")
+        return np.array([index[col] for col in columns], dtype=np.int64)
+
+    def project(self, columns: List[str], frame: Optional[pd.DataFrame] = None) -> 'StatisticsEngine':
+        """Zwraca silnik ograniczony do podanych kolumn - wszystkie policzone statystyki są zachowane."""
+        columns = [col for col in columns if col in set(self.columns)]
+        positions = self._positions(columns)
+        engine = self._derive(columns, frame if frame is not None else self._frame)
+        engine._blocks = [_Block(b.start, b.stop, b.moments.take(positions)) for b in self._blocks]
+        engine._n_rows = self._n_rows
+        engine._comoments = {method: co.take(positions) for method, co in self._comoments.items()}
+        engine._quantiles = {col: q for col, q in self._quantiles.items() if col in set(columns)}
+        engine._ranks = {col: r for col, r in self._ranks.items() if col in set(columns)}
+        if self._reservoir is not None:
+            engine._reservoir = self._reservoir[:, positions]
+        return engine
+
+    def row_range(self, start: int, stop: int, frame: pd.DataFrame) -> 'StatisticsEngine':
+        """Silnik dla zakresu wierszy [start, stop) (`frame` to wynikowa ramka); pełne bloki są przepisywane, bloki brzegowe przeliczane."""
+        if self._frame is None:
+            raise ValueError("Podzbiór wierszy wymaga danych przechowywanych w pamięci.")
+        engine = self._derive(self.columns, frame)
+        engine._reservoir = None  # próbka dotyczy wszystkich wierszy, kwantyle liczone są z ramki
+        for block in self._blocks:
+            lo, hi = max(block.start, start), min(block.stop, stop)
+            if lo >= hi:
+                continue
+            if lo == block.start and hi == block.stop:
+                moments = block.moments
+            else:
+                moments = ColumnMoments.from_array(self._values(self._frame.iloc[lo:hi]))
+            engine._blocks.append(_Block(lo - start, hi - start, moments))
+        engine._n_rows = stop - start
+        return engine
+
+    def head(self, n: int, frame: pd.DataFrame) -> 'StatisticsEngine':
+        """Silnik dla pierwszych n wierszy (`frame` to wynikowa ramka)."""
+        return self.row_range(0, min(n, self._n_rows), frame)
+
+    def tail(self, n: int, frame: pd.DataFrame) -> 'StatisticsEngine':
+        """Silnik dla ostatnich n wierszy (`frame` to wynikowa ramka)."""
+        return self.row_range(max(0, self._n_rows - n), self._n_rows, frame)
+
+    # --- Wyniki ---
+
+    @property
+    def n_rows(self) -> int:
+        return self._n_rows
+
+    def moments(self) -> ColumnMoments:
+        """Statystyki jednowymiarowe wszystkich wierszy (połączenie bloków)."""
+        if not self._blocks:
+            empty = np.full(len(self.columns), np.nan)
+            return ColumnMoments(np.zeros(len(self.columns)), empty, np.zeros(len(self.columns)), empty, empty)
+        total = self._blocks[0].moments
+        for block in self._blocks[1:]:
+            total = total.merge(block.moments)
+        return total
+
+    def _column_quantiles(self, col: str) -> np.ndarray:
+        if col not in self._quantiles:
+            if self._frame is not None:
+                values = self._frame[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            elif self._reservoir is not None:
+                values = self._reservoir[:, self.columns.index(col)]
+            else:
+                values = np.array([np.nan])
+            values = values[~np.isnan(values)]
+            self._quantiles[col] = np.percentile(values, [25, 50, 75]) if values.size else np.full(3, np.nan)
+        return self._quantiles[col]
+
+    def describe(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Statystyki opisowe w układzie DataFrame.describe().T.
+        Kwartyle są dokładne, gdy silnik ma dostęp do danych; przy wczytywaniu strumieniowym
+        są przybliżane z równomiernej próbki wierszy.
+        """
+        columns = self.columns if columns is None else list(columns)
+        positions = self._positions(columns)
+        moments = self.moments().take(positions)
+        quantiles = np.array([self._column_quantiles(col) for col in columns]).reshape(len(columns), 3)
+        table = np.column_stack([moments.count, moments.mean, moments.std, moments.minimum,
+                                 quantiles, moments.maximum])
+        return pd.DataFrame(table, index=pd.Index(columns), columns=DESCRIBE_COLUMNS)
+
+    def _column_ranks(self) -> List[np.ndarray]:
+        """
+        Podwojone rangi (średnie dla remisów są wielokrotnościami 1/2) kolumn jako liczby całkowite, -1 dla braków.
+        Liczone raz i zapamiętywane per kolumna; int32 zajmuje połowę pamięci wektora float64 (zob. _rerank_pairs).
+        """
+        dtype = np.int32 if 2 * self._n_rows < np.iinfo(np.int32).max else np.int64
+        for col in self.columns:
+            if col not in self._ranks:
+                ranks = self._frame[col].rank(method='average').to_numpy(dtype=np.float64, na_value=np.nan)
+                self._ranks[col] = np.where(np.isnan(ranks), -1, ranks * 2).astype(dtype)
+        return [self._ranks[col] for col in self.columns]
+
+    def _compute_comoments(self, method: str) -> CoMoments:
+        """Sumy par kolumn liczone blokami wierszy (bez materializowania pełnej macierzy float64 danych ani rang)."""
+        if self._frame is None:
+            raise ValueError("Korelacja wymaga danych przechowywanych w pamięci.")
+        starts = range(0, self._n_rows, self.block_rows)
+        if method == 'spearman':
+            ranks = self._column_ranks()
+            doubled = (np.column_stack([r[start:start + self.block_rows] for r in ranks]) for start in starts)
+            blocks = (np.where(block < 0, np.nan, block / 2) for block in doubled)
+        else:
+            blocks = (self._values(self._frame.iloc[start:start + self.block_rows]) for start in starts)
+
+        total = None
+        for values in blocks:
+            part = CoMoments.from_array(values, total.shift if total is not None else None)
+            total = part if total is None else total.merge(part)
+        if total is None:
+            return CoMoments.from_array(np.empty((0, len(self.columns))))
+        if method == 'spearman':
+            self._rerank_pairs(total, ranks)
+        return total
+
+    def _rerank_pairs(self, comoments: CoMoments, ranks: List[np.ndarray]) -> None:
+        """
+        Poprawia (w miejscu) sumy Spearmana par kolumn o różnych wzorcach braków. Rangi kolumny są liczone
+        po wszystkich jej wartościach, a DataFrame.corr rangi pary wyznacza tylko na wierszach, w których
+        istnieją obie wartości. Kolumny są grupowane według wzorca braków (pary w obrębie grupy, w tym
+        wszystkie kolumny bez braków, nie wymagają poprawki); dla każdej pary grup rangi obu grup są
+        liczone ponownie na wspólnych wierszach, a sumy wyznaczane jednym iloczynem macierzowym.
+        """
+        # Wzorzec braków kolumny zapisany bitowo (1 bit na wiersz)
+        patterns: Dict[bytes, List[int]] = {}
+        for position, r in enumerate(ranks):
+            patterns.setdefault(np.packbits(r < 0).tobytes(), []).append(position)
+        if len(patterns) == 1:
+            return
+        groups = list(patterns.values())
+        present = [ranks[group[0]] >= 0 for group in groups]
+        shift = comoments.shift
+
+        def reranked(columns: List[int], keep: np.ndarray, dropped: np.ndarray) -> np.ndarray:
+            kept = np.column_stack([ranks[col][keep] for col in columns])
+            removed = np.column_stack([ranks[col][dropped] for col in columns])
+            return _ranks_within(kept, removed) - shift[columns]
+
+        # Tablica liczności podwojonych rang ma 2 * n_rows + 2 pozycji na kolumnę
+        n_values = 2 * self._n_rows + 2
+        for a, b in itertools.combinations(range(len(groups)), 2):
+            both = present[a] & present[b]
+            if not both.any():
+                continue
+            for columns_a in _column_chunks(groups[a], n_values):
+                x = reranked(columns_a, both, present[a] & ~both)
+                for columns_b in _column_chunks(groups[b], n_values):
+                    y = reranked(columns_b, both, present[b] & ~both)
+                    grid, mirror = np.ix_(columns_a, columns_b), np.ix_(columns_b, columns_a)
+                    comoments.sx[grid], comoments.sx[mirror] = x.sum(axis=0)[:, None], y.sum(axis=0)[:, None]
+                    comoments.sxx[grid] = np.einsum('ij,ij->j', x, x)[:, None]
+                    comoments.sxx[mirror] = np.einsum('ij,ij->j', y, y)[:, None]
+                    product = blocked_product(x, y)
+                    comoments.sxy[grid], comoments.sxy[mirror] = product, product.T
+
+    def correlation(self, method: Literal['pearson', 'spearman'] = 'pearson', columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Macierz korelacji (pary kompletnych obserwacji). Sumy dla wszystkich kolumn są liczone raz i zapamiętywane;
+        dla podzbioru kolumn, gdy sum jeszcze nie ma, liczone są tylko sumy tego podzbioru.
+        """
+        if method not in ('pearson', 'spearman'):
+            raise ValueError(f"Nieobsługiwana metoda korelacji: {method}")
+        columns = self.columns if columns is None else list(columns)
+        if method in self._comoments:
+            comoments = self._comoments[method].take(self._positions(columns))
+        elif columns == self.columns:
+            comoments = self._comoments[method] = self._compute_comoments(method)
+        else:
+            comoments = self.project(columns)._compute_comoments(method)
+        return pd.DataFrame(comoments.correlation(), index=pd.Index(columns), columns=pd.Index(columns))
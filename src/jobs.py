@@ -0,0 +1,430 @@
+# src/jobs.py
+
+import _thread
+import multiprocessing
+import shutil
+import signal
+import threading
+import time
+import uuid
+import weakref
+import numpy as np
+import pandas as pd
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Literal, Optional, Tuple, Union
+
+from src.config import CACHE_DIR, JOB_WORKERS, REDUCER_PREWARM
+from src.tracing import Tracer, active_tracer, span
+
+if TYPE_CHECKING:
+    from src.incremental_stats import StatisticsEngine
+    from src.warm_start import PreviousEmbedding
+
+JobKind = Literal['reduction', 'comparison', 'statistics', 'plot']
+
+# Co ile sekund proces roboczy sprawdza, czy wykonywane zadanie zostało anulowane
+CANCEL_POLL_SECONDS = 0.2
+
+class JobCancelled(BaseException):
+    """
+    Zgłaszany w procesie roboczym, gdy użytkownik anulował zadanie. Dziedziczy po BaseException
+    (jak KeyboardInterrupt), aby nie przechwytywały go bloki `except Exception` w przerwanych obliczeniach.
+    """
+
+class JobContext:
+    """
+    Kanał komunikacji zadania z sesją: raportowanie postępu i sprawdzanie anulowania.
+    Obiekt jest przekazywany do procesu roboczego razem z danymi zadania.
+    """
+
+    def __init__(self, job_id: str, state: Optional[Dict[str, Any]] = None, trace: Optional[Dict[str, Any]] = None):
+        self.job_id = job_id
+        self._state = state
+        # Ustawienia pomiarów wydajności sesji ({'memory', 'tags'}) lub None, gdy są wyłączone
+        self.trace = trace
+
+    def report(self, fraction: float, stage: str) -> None:
+        """Zapisuje postęp zadania (0-1) wraz z opisem etapu i przerywa je, jeśli zostało anulowane."""
+        self.check_cancelled()
+        if self._state is not None:
+            self._state[self.job_id] = (fraction, stage, False)
+
+    def check_cancelled(self) -> None:
+        """Przerywa zadanie wyjątkiem JobCancelled, jeśli użytkownik je anulował."""
+        if self._state is not None and self._state.get(self.job_id, (0.0, '', False))[2]:
+            raise JobCancelled()
+
+@dataclass(frozen=True)
+class SharedFrame:
+    """
+    Ramka danych przekazywana do zadania przez plik Arrow (zob. JobManager.share_frame) zamiast serializacji.
+    Proces roboczy otwiera plik jako mapę pamięci tylko do odczytu, więc kolumny numeryczne bez braków
+    nie są kopiowane. W procesie serwera odwołanie trzyma też samą ramkę, aby plik nie został usunięty
+    przed zakończeniem zadania; ramka nie jest przesyłana do procesu roboczego.
+    """
+    path: str
+    frame: Optional[pd.DataFrame] = field(default=None, compare=False, repr=False)
+
+    def __getstate__(self):
+        return {'path': self.path, 'frame': None}
+
+FrameSource = Union[pd.DataFrame, SharedFrame]
+
+def open_frame(source: FrameSource) -> pd.DataFrame:
+    """Zwraca ramkę zadania: przekazaną bezpośrednio albo odczytaną z pliku wspólnego."""
+    if isinstance(source, SharedFrame):
+        from src.dataset_cache import read_frame
+        return read_frame(source.path)
+    return source
+
+@dataclass
+class Job:
+    """Uchwyt zadania w tle przechowywany w st.session_state."""
+    job_id: str
+    kind: JobKind
+    title: str
+    future: Future
+    meta: Dict[str, Any] = field(default_factory=dict)
+    submitted_at: float = field(default_factory=time.time)
+    cancelled: bool = False
+
+    @property
+    def status(self) -> str:
+        if self.cancelled:
+            return 'anulowane'
+        if not self.future.done():
+            return 'w toku' if self.future.running() else 'oczekuje'
+        return 'błąd' if self.future.exception() is not None else 'zakończone'
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+class JobManager:
+    """
+    Ograniczona pula procesów roboczych współdzielona przez wszystkie sesje Streamlit.
+
+    Zadania (redukcja wymiarowości, statystyki, wykresy) są wykonywane poza procesem serwera,
+    więc długie obliczenia nie blokują interfejsu, a ich liczba nie rośnie z liczbą użytkowników.
+    Przy `max_workers=0` zadania są wykonywane synchronicznie w bieżącym procesie.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._state: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._prewarmed: set = set()
+        # Pliki ramek przekazanych do zadań: id(ramki) -> (słaba referencja do ramki, ścieżka)
+        self._shared: Dict[int, Tuple[weakref.ref, str]] = {}
+        self._shared_dir: Optional[Path] = None
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._executor is None and self.max_workers > 0:
+                # 'spawn' - proces serwera Streamlit jest wielowątkowy, więc fork nie jest bezpieczny
+                context = multiprocessing.get_context('spawn')
+                self._manager = context.Manager()
+                self._state = self._manager.dict()
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def submit(self, kind: JobKind, title: str, fn: Callable[..., Any], *args: Any, meta: Optional[Dict[str, Any]] = None) -> Job:
+        """
+        Zleca wykonanie `fn(context, *args)` i zwraca uchwyt zadania.
+        Funkcja i argumenty muszą dać się zserializować (pickle).
+        """
+        self._ensure_started()
+        job_id = uuid.uuid4().hex
+        tracer = active_tracer()
+        trace = {'memory': tracer.memory, 'tags': dict(tracer.tags)} if tracer is not None else None
+        context = JobContext(job_id, self._state, trace)
+
+        if self._executor is None:
+            future: Future = Future()
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(_run_job(fn, context, *args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            self._state[job_id] = (0.0, 'W kolejce', False)
+            future = self._executor.submit(_run_job, fn, context, *args)
+            future.add_done_callback(lambda _: self._state.pop(job_id, None))
+
+        return Job(job_id=job_id, kind=kind, title=title, future=future, meta=meta or {})
+
+    def share_frame(self, df: pd.DataFrame) -> FrameSource:
+        """
+        Przygotowuje ramkę do przekazania zadaniu. Bez puli procesów zwraca ją bez zmian; w przeciwnym razie
+        zapisuje ją do pliku Arrow (SharedFrame) raz na obiekt ramki - kolejne zadania na tych samych danych
+        dostają ten sam plik, a plik jest usuwany, gdy ramka przestaje istnieć.
+        """
+        if self.max_workers <= 0:
+            return df
+        key = id(df)
+        with self._lock:
+            entry = self._shared.get(key)
+            if self._shared_dir is None:
+                self._shared_dir = CACHE_DIR / 'frames' / uuid.uuid4().hex
+                self._shared_dir.mkdir(parents=True, exist_ok=True)
+                weakref.finalize(self, shutil.rmtree, self._shared_dir, True)
+        if entry is not None and entry[0]() is df:
+            return SharedFrame(entry[1], df)
+
+        from src.dataset_cache import write_frame
+        path = str(self._shared_dir / f"{uuid.uuid4().hex}.arrow")
+        try:
+            with span('jobs.share_frame', rows=len(df), columns=len(df.columns)):
+                write_frame(path, df)
+        except (ValueError, TypeError):
+            # Kolumny, których Arrow nie obsługuje (np. obiekty mieszanych typów) - ramka jest serializowana jak dotąd
+            return df
+        ref = weakref.ref(df, lambda _, key=key, path=path: self._release_frame(key, path))
+        with self._lock:
+            self._shared[key] = (ref, path)
+        return SharedFrame(path, df)
+
+    def _release_frame(self, key: int, path: str) -> None:
+        with self._lock:
+            if key in self._shared and self._shared[key][1] == path:
+                del self._shared[key]
+        Path(path).unlink(missing_ok=True)
+
+    def prewarm_reducers(self, methods: List[str]) -> None:
+        """
+        Rozgrzewa biblioteki redukcji wymiarowości (import i kompilacja numba) w tle - w procesach
+        roboczych albo w bieżącym procesie, gdy pula jest wyłączona. Każda metoda jest rozgrzewana raz.
+        """
+        with self._lock:
+            methods = [method for method in methods if method not in self._prewarmed]
+            self._prewarmed.update(methods)
+        if not methods or not REDUCER_PREWARM:
+            return
+        self._ensure_started()
+        if self._executor is None:
+            from src.reducers import prewarm
+            prewarm(methods)
+            return
+        # Zadanie tylko uruchamia wątek rozgrzewki, więc proces roboczy od razu przyjmuje kolejne zadania;
+        # zlecenie po jednym na proces sprawia, że pula uruchamia wszystkie procesy
+        for _ in range(self.max_workers):
+            self._executor.submit(_prewarm_worker, methods)
+
+    def progress(self, job: Job) -> Tuple[float, str]:
+        """Zwraca ostatnio zgłoszony postęp zadania (ułamek, opis etapu)."""
+        if job.done:
+            return 1.0, 'Zakończono'
+        if self._state is None:
+            return 0.0, ''
+        fraction, stage, _ = self._state.get(job.job_id, (0.0, 'W kolejce', False))
+        return fraction, stage
+
+    def cancel(self, job: Job) -> None:
+        """
+        Anuluje zadanie. Zadanie oczekujące w kolejce nie zostanie uruchomione; uruchomione jest
+        przerywane w procesie roboczym w ciągu ok. CANCEL_POLL_SECONDS, także w trakcie dopasowania
+        reduktora (zob. _CancelWatcher), a jego wynik jest pomijany.
+        """
+        job.cancelled = True
+        if not job.future.cancel() and self._state is not None and not job.done:
+            fraction, stage, _ = self._state.get(job.job_id, (0.0, '', False))
+            self._state[job.job_id] = (fraction, stage, True)
+
+_default_manager: Optional[JobManager] = None
+_default_manager_lock = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    """Zwraca współdzieloną w procesie pulę zadań skonfigurowaną w src/config.py."""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = JobManager()
+        return _default_manager
+
+def split_finished(jobs: List[Job]) -> Tuple[List[Job], List[Job]]:
+    """Dzieli listę zadań na zakończone (w tym anulowane) i wciąż wykonywane."""
+    finished = [job for job in jobs if job.done or job.cancelled]
+    pending = [job for job in jobs if not (job.done or job.cancelled)]
+    return finished, pending
+
+# --- Zadania wykonywane w procesach roboczych ---
+
+def _prewarm_worker(methods: List[str]) -> None:
+    from src.reducers import prewarm
+    prewarm(methods)
+
+class _CancelWatcher:
+    """
+    Przerywa zadanie wykonywane w głównym wątku procesu roboczego, gdy użytkownik je anuluje - także
+    w trakcie obliczeń, które nie raportują postępu (dopasowanie reduktora). Wątek pomocniczy co
+    CANCEL_POLL_SECONDS sprawdza stan zadania i wysyła do głównego wątku SIGINT, którego obsługa zgłasza
+    JobCancelled przy najbliższej instrukcji Pythona (np. między iteracjami optymalizacji).
+    Proces roboczy przechwytuje wyjątek i pozostaje w puli.
+    """
+
+    def __init__(self, context: JobContext):
+        self._context = context
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.interrupted = False
+        self._previous = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> '_CancelWatcher':
+        self._previous = signal.signal(signal.SIGINT, self._handle)
+        self._thread = threading.Thread(target=self._watch, name=f"cancel-{self._context.job_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        try:
+            with self._lock:
+                self._stop.set()
+            self._thread.join()
+        finally:
+            signal.signal(signal.SIGINT, self._previous)
+
+    def _handle(self, signum: int, frame: Any) -> None:
+        if self.interrupted:
+            raise JobCancelled()
+        if callable(self._previous):
+            self._previous(signum, frame)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(CANCEL_POLL_SECONDS):
+            try:
+                self._context.check_cancelled()
+            except JobCancelled:
+                with self._lock:
+                    # Po zakończeniu zadania proces może już wykonywać następne - nie przerywamy go
+                    if not self._stop.is_set():
+                        self.interrupted = True
+                        _thread.interrupt_main(signal.SIGINT)
+                return
+            except Exception:
+                # Menedżer stanu zadań niedostępny (zamykanie serwera) - zadanie kończy się normalnie
+                return
+
+def _run_job(fn: Callable[..., Dict[str, Any]], context: JobContext, *args: Any) -> Dict[str, Any]:
+    """
+    Wykonuje zadanie; w procesie roboczym z możliwością przerwania w dowolnym momencie (_CancelWatcher).
+    """
+    if context._state is None or threading.current_thread() is not threading.main_thread():
+        return _run_traced(fn, context, *args)
+    watcher = _CancelWatcher(context)
+    try:
+        with watcher:
+            return _run_traced(fn, context, *args)
+    except KeyboardInterrupt:
+        # Sygnał obsłużony już po przywróceniu poprzedniej obsługi SIGINT
+        if watcher.interrupted:
+            raise JobCancelled()
+        raise
+
+def _run_traced(fn: Callable[..., Dict[str, Any]], context: JobContext, *args: Any) -> Dict[str, Any]:
+    """
+    Przy włączonych pomiarach wydajności zbiera je lokalnym tracerem i zwraca
+    w wyniku pod kluczem 'spans' (tracer sesji jest w procesie serwera).
+    """
+    if context.trace is None:
+        return fn(context, *args)
+    tracer = Tracer(memory=context.trace['memory'])
+    tracer.tags.update(context.trace['tags'])
+    with tracer.activate(), tracer.span(f"job.{fn.__name__}"):
+        result = fn(context, *args)
+    return dict(result, spans=tracer.records())
+
+def run_reduction(
+    context: JobContext,
+    source: FrameSource,
+    method: str,
+    params: Dict[str, Any],
+    check_drift: bool = False,
+    warm_start: Optional['PreviousEmbedding'] = None,
+) -> Dict[str, Any]:
+    """Redukcja wymiarowości (opcjonalnie ze startem z poprzedniego osadzenia i z oceną trybu dużych danych)."""
+    from src.data_modifier import reduce_dimensions, landmark_drift_report
+
+    context.report(0.05, f"Redukcja wymiarowości metodą {method}")
+    df = open_frame(source)
+    result = {'data': reduce_dimensions(df, method, params, warm_start=warm_start)}
+    if check_drift:
+        context.report(0.7, "Ocena odchylenia od pełnego dopasowania")
+        result['drift'] = landmark_drift_report(df, method, params)
+    context.report(1.0, "Zakończono")
+    return result
+
+def run_embedding(context: JobContext, input_path: str, method: str, params: Dict[str, Any], n_threads: int) -> Dict[str, Any]:
+    """
+    Jeden wariant porównania metod redukcji: dopasowanie do wspólnej, znormalizowanej macierzy
+    (otwieranej z pliku jako mapa pamięci tylko do odczytu) z ograniczoną liczbą wątków.
+    """
+    from src.data_modifier import embed_scaled
+    from src.reducer_comparison import open_shared_array
+    from src.reducers import reducer_class, thread_limits
+
+    context.report(0.05, f"Import biblioteki {method}")
+    reducer_class(method)  # import nie wlicza się do czasu dopasowania
+    scaled_data = open_shared_array(input_path)
+    context.report(0.1, f"Dopasowanie metody {method}")
+    with thread_limits(n_threads):
+        start = time.perf_counter()
+        embedding = embed_scaled(scaled_data, method, params)
+        seconds = time.perf_counter() - start
+    return {'embedding': np.asarray(embedding, dtype=np.float32), 'seconds': seconds}
+
+def run_statistics(
+    context: JobContext,
+    source: FrameSource,
+    engine: Optional['StatisticsEngine'],
+    stat_type: str,
+    corr_method: Optional[str],
+    columns: Optional[List[str]],
+    top_k: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Statystyki opisowe lub macierz korelacji liczone silnikiem przyrostowym.
+    Zwraca wynik oraz silnik z zebranymi podsumowaniami bloków, który sesja może ponownie wykorzystać.
+    """
+    from src.incremental_stats import StatisticsEngine
+    from src.statistics import calculate_descriptive_stats, calculate_correlation
+
+    context.report(0.1, f"Obliczanie: {stat_type}")
+    df = open_frame(source)
+    with span('stats.summarize', rows=len(df), columns=len(df.columns), reused=engine is not None):
+        engine = StatisticsEngine.from_frame(df) if engine is None else engine.attach(df)
+    if stat_type == "Statystyki opisowe":
+        result = calculate_descriptive_stats(df, columns, engine=engine)
+    else:
+        result = calculate_correlation(df, corr_method, columns, engine=engine, top_k=top_k)
+    return {'result': result, 'engine': engine}
+
+def run_plot(context: JobContext, source: FrameSource, engine: Optional['StatisticsEngine'], plot_type: str,
+             params: Dict[str, Any], plot_cache: Optional[Dict[Any, Any]] = None) -> Dict[str, Any]:
+    """
+    Budowa wykresu. Mapa ciepła korzysta z macierzy korelacji Pearsona zapamiętanej w silniku statystyk,
+    więc kolejne mapy (i statystyki) dla tych samych danych nie przeliczają jej od nowa.
+    Podobnie grupy agregacji i granice przedziałów histogramów są brane z `plot_cache` (pamięć węzła potoku);
+    proces roboczy dostaje tylko kopię tego słownika, więc zwracane są wpisy dodane przy tym wykresie.
+    """
+    from src.incremental_stats import StatisticsEngine
+    from src.statistics import calculate_correlation
+    from src.visualizer import create_plot
+
+    df = open_frame(source)
+    result: Dict[str, Any] = {}
+    if plot_type == 'Mapa ciepła':
+        context.report(0.1, "Obliczanie macierzy korelacji")
+        with span('stats.summarize', rows=len(df), columns=len(df.columns), reused=engine is not None):
+            engine = StatisticsEngine.from_frame(df) if engine is None else engine.attach(df)
+        params = dict(params, corr_df=calculate_correlation(df, 'pearson', engine=engine))
+        result['engine'] = engine
+    context.report(0.5, f"Tworzenie wykresu: {plot_type}")
+    known = set(plot_cache) if plot_cache is not None else set()
+    result['figure'] = create_plot(df, plot_type, params, plot_cache)
+    if plot_cache is not None:
+        result['plot_cache'] = {key: value for key, value in plot_cache.items() if key not in known}
+    return result
@@ -0,0 +1,164 @@
+# src/landmarks.py
+
+import numpy as np
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Funkcja (dopasowany reduktor, dane punktów orientacyjnych, nowe wiersze) -> osadzenie nowych wierszy
+OutOfSampleTransform = Callable[[Any, np.ndarray, np.ndarray], np.ndarray]
+# Funkcja (reduktor, dane punktów orientacyjnych, ich pozycje w całym zbiorze) -> osadzenie punktów orientacyjnych
+LandmarkFit = Callable[[Any, np.ndarray, np.ndarray], np.ndarray]
+
+# Powyżej tej liczby wierszy tryb dużych danych włącza się automatycznie
+LARGE_DATA_THRESHOLD = 20_000
+# Domyślna liczba punktów orientacyjnych (landmarków), na których dopasowywany jest reduktor
+DEFAULT_N_LANDMARKS = 10_000
+# Dokładny t-SNE (O(N²)) dopuszczamy tylko na niewielkiej liczbie punktów
+EXACT_TSNE_MAX_SAMPLES = 2_000
+# Powyżej tej liczby zapytań wyszukiwanie sąsiadów korzysta z przybliżonego indeksu (pynndescent)
+ANN_THRESHOLD = 50_000
+# Rozmiar porcji wierszy umieszczanych w osadzeniu w jednym kroku
+PLACEMENT_BATCH_ROWS = 50_000
+
+def select_landmarks(n_samples: int, n_landmarks: int, random_state: int = 42) -> np.ndarray:
+    """
+    Wybiera posortowane indeksy punktów orientacyjnych.
+    Losowanie jednostajne zachowuje rozkład danych, więc podzbiór jest reprezentatywny dla całości.
+    """
+    if n_landmarks >= n_samples:
+        return np.arange(n_samples)
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.choice(n_samples, size=n_landmarks, replace=False))
+
+def nearest_neighbors(reference: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Znajduje k najbliższych sąsiadów z `reference` dla każdego wiersza `query`.
+    Dla dużej liczby zapytań używa przybliżonego indeksu NN-Descent, jeśli jest zainstalowany.
+
+    Returns:
+        Krotka (odległości, indeksy), obie o kształcie (len(query), k).
+    """
+    k = min(k, len(reference))
+    if len(query) >= ANN_THRESHOLD:
+        try:
+            from pynndescent import NNDescent
+        except ImportError:
+            pass
+        else:
+            index = NNDescent(reference, n_neighbors=max(k, 15), random_state=42)
+            indices, distances = index.query(query, k=k)
+            return distances, indices
+
+    from sklearn.neighbors import NearestNeighbors
+    nn = NearestNeighbors(n_neighbors=k).fit(reference)
+    return nn.kneighbors(query)
+
+def knn_interpolate(reference: np.ndarray, reference_embedding: np.ndarray, query: np.ndarray, k: int = 10) -> np.ndarray:
+    """
+    Umieszcza nowe punkty w istniejącym osadzeniu jako średnią ważoną (odwrotnością odległości)
+    pozycji ich k najbliższych sąsiadów w przestrzeni cech.
+    """
+    distances, indices = nearest_neighbors(reference, query, k)
+    weights = 1.0 / (distances + 1e-12)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return np.einsum('nk,nkd->nd', weights, reference_embedding[indices])
+
+def fit_with_landmarks(
+    data: np.ndarray,
+    reducer,
+    n_landmarks: int,
+    transform: Optional[OutOfSampleTransform] = None,
+    random_state: int = 42,
+    fit: Optional[LandmarkFit] = None,
+) -> np.ndarray:
+    """
+    Dopasowuje reduktor na podzbiorze punktów orientacyjnych i umieszcza pozostałe wiersze
+    w otrzymanym osadzeniu, dzięki czemu koszt rośnie niemal liniowo z liczbą wierszy.
+
+    Args:
+        data: Przeskalowana macierz danych (wiersze x cechy).
+        reducer: Obiekt z metodą fit_transform.
+        n_landmarks: Liczba punktów orientacyjnych.
+        transform: Funkcja rzutująca nowe wiersze przez dopasowany reduktor (UMAP, PaCMAP).
+            Jeśli None, pozostałe wiersze są umieszczane interpolacją k najbliższych sąsiadów.
+        random_state: Ziarno losowania punktów orientacyjnych.
+        fit: Opcjonalna funkcja dopasowania zamiast reducer.fit_transform (np. start z poprzedniego osadzenia).
+
+    Returns:
+        Osadzenie wszystkich wierszy w kolejności zgodnej z `data`.
+    """
+    landmark_idx = select_landmarks(len(data), n_landmarks, random_state)
+    landmark_data = data[landmark_idx]
+    if fit is not None:
+        landmark_embedding = np.asarray(fit(reducer, landmark_data, landmark_idx))
+    else:
+        landmark_embedding = np.asarray(reducer.fit_transform(landmark_data))
+
+    embedding = np.empty((len(data), landmark_embedding.shape[1]), dtype=landmark_embedding.dtype)
+    embedding[landmark_idx] = landmark_embedding
+
+    rest_mask = np.ones(len(data), dtype=bool)
+    rest_mask[landmark_idx] = False
+    rest_idx = np.flatnonzero(rest_mask)
+
+    if transform is None and len(rest_idx):
+        embedding[rest_idx] = knn_interpolate(landmark_data, landmark_embedding, data[rest_idx])
+    else:
+        for start in range(0, len(rest_idx), PLACEMENT_BATCH_ROWS):
+            batch = rest_idx[start:start + PLACEMENT_BATCH_ROWS]
+            embedding[batch] = transform(reducer, landmark_data, data[batch])
+    return embedding
+
+def _knn_sets(points: np.ndarray, k: int) -> np.ndarray:
+    """Zwraca indeksy k najbliższych sąsiadów każdego punktu (bez niego samego)."""
+    _, indices = nearest_neighbors(points, points, k + 1)
+    return indices[:, 1:]
+
+def neighborhood_agreement(embedding_a: np.ndarray, embedding_b: np.ndarray, k: int = 10) -> float:
+    """Średni odsetek wspólnych k najbliższych sąsiadów punktu w dwóch osadzeniach (1.0 = identyczne sąsiedztwa)."""
+    neighbors_a = _knn_sets(embedding_a, k)
+    neighbors_b = _knn_sets(embedding_b, k)
+    shared = [len(np.intersect1d(a, b, assume_unique=True)) for a, b in zip(neighbors_a, neighbors_b)]
+    return float(np.mean(shared) / neighbors_a.shape[1])
+
+def estimate_landmark_drift(
+    data: np.ndarray,
+    reducer_factory: Callable[[int], Any],
+    transform: Optional[OutOfSampleTransform],
+    landmark_fraction: float,
+    n_eval: int = 2_000,
+    k: int = 10,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """
+    Szacuje, jak bardzo osadzenie z punktami orientacyjnymi odbiega od pełnego dopasowania.
+    Na losowym podzbiorze o rozmiarze `n_eval` porównuje pełne dopasowanie z dopasowaniem
+    na tym samym odsetku punktów orientacyjnych, co w głównym przebiegu.
+
+    Args:
+        data: Przeskalowana macierz danych.
+        reducer_factory: Funkcja tworząca nowy reduktor dla podanej liczby próbek dopasowania.
+        transform: Funkcja umieszczania nowych wierszy (jak w fit_with_landmarks) lub None.
+        landmark_fraction: Odsetek wierszy użytych jako punkty orientacyjne.
+        n_eval: Rozmiar podzbioru ewaluacyjnego.
+        k: Liczba sąsiadów w miarach jakości.
+        random_state: Ziarno losowania.
+
+    Returns:
+        Słownik z miarami: zgodność sąsiedztw obu osadzeń oraz wiarygodność (trustworthiness) każdego z nich.
+    """
+    from sklearn.manifold import trustworthiness
+
+    subset = data[select_landmarks(len(data), n_eval, random_state)]
+    n_landmarks = min(len(subset), max(2 * k, int(round(len(subset) * landmark_fraction))))
+
+    full_embedding = np.asarray(reducer_factory(len(subset)).fit_transform(subset))
+    landmark_embedding = fit_with_landmarks(subset, reducer_factory(n_landmarks), n_landmarks, transform, random_state)
+
+    k = max(1, min(k, len(subset) // 2 - 1))
+    return {
+        'n_eval': len(subset),
+        'n_landmarks': n_landmarks,
+        'knn_agreement': neighborhood_agreement(full_embedding, landmark_embedding, k),
+        'trustworthiness_full': float(trustworthiness(subset, full_embedding, n_neighbors=k)),
+        'trustworthiness_landmarks': float(trustworthiness(subset, landmark_embedding, n_neighbors=k)),
+    }
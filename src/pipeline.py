@@ -0,0 +1,324 @@
+# src/pipeline.py
+
+import itertools
+import uuid
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+from src.data_modifier import sample_data, remove_columns
+from src.incremental_stats import StatisticsEngine
+from src.warm_start import PreviousEmbedding
+from src.tracing import span
+
+# Liczba zmaterializowanych ramek (węzłów historii) trzymanych w pamięci; pozostałe są odtwarzane z widoków
+PIPELINE_CACHED_FRAMES = 4
+# Liczba wyników pośrednich wykresów (grup agregacji, granic przedziałów) pamiętanych dla węzła; najstarsze są usuwane
+PIPELINE_PLOT_CACHE_ENTRIES = 16
+
+OperationKind = Literal['load', 'sample', 'remove_columns', 'reduce']
+RowSelection = Union[slice, np.ndarray, None]
+
+@dataclass(frozen=True)
+class Operation:
+    """Zapis pojedynczej modyfikacji danych (parametry wystarczają do jej odtworzenia i opisu)."""
+    kind: OperationKind
+    params: Dict[str, Any] = field(default_factory=dict)
+    label: str = ''
+
+@dataclass
+class _View:
+    """
+    Leniwy opis danych węzła: wybór wierszy (wycinek lub pozycje) i kolumn ramki bazowej.
+    Ramką bazową jest dane źródłowe albo wynik ostatniej redukcji wymiarowości.
+    """
+    base: pd.DataFrame
+    rows: RowSelection
+    columns: List[str]
+
+    @property
+    def n_rows(self) -> int:
+        if self.rows is None:
+            return len(self.base)
+        if isinstance(self.rows, slice):
+            return len(range(*self.rows.indices(len(self.base))))
+        return len(self.rows)
+
+    def span(self) -> Optional[Tuple[int, int]]:
+        """Zakres pozycji [start, stop) w ramce bazowej, jeśli wybrane wiersze są ciągłe (None dla losowej próbki)."""
+        if self.rows is None:
+            return 0, len(self.base)
+        if isinstance(self.rows, slice):
+            start, stop, _ = self.rows.indices(len(self.base))
+            return start, stop
+        return None
+
+    def select_rows(self, rows: RowSelection) -> RowSelection:
+        """Składa wybór wierszy względem tego widoku z własnym wyborem (wynik jest względny wobec bazy)."""
+        if rows is None:
+            return self.rows
+        if self.rows is None:
+            return rows
+        if isinstance(self.rows, slice) and isinstance(rows, slice):
+            start, stop, _ = rows.indices(self.n_rows)
+            return slice(self.rows.start + start, self.rows.start + stop)
+        return np.arange(len(self.base))[self.rows][rows]
+
+    def materialize(self) -> pd.DataFrame:
+        """
+        Buduje ramkę bez kopiowania danych tam, gdzie to możliwe: projekcja kolumn składa ramkę
+        z widoków kolumn bazy, a wycinek wierszy jest widokiem. Kopiowane są tylko wiersze losowej próbki.
+        """
+        frame = self.base
+        if self.columns != self.base.columns.tolist():
+            frame = pd.DataFrame({col: self.base[col] for col in self.columns}, copy=False)
+        if isinstance(self.rows, slice):
+            frame = frame.iloc[self.rows]
+        elif self.rows is not None:
+            frame = frame.take(self.rows)
+        return frame
+
+@dataclass
+class PipelineNode:
+    """Węzeł historii modyfikacji: operacja zastosowana do danych węzła nadrzędnego."""
+    node_id: int
+    parent_id: Optional[int]
+    operation: Operation
+    view: _View
+    engine: Optional[StatisticsEngine] = None
+    # Wyniki pośrednie wykresów: grupy agregacji i granice przedziałów histogramów (src/visualizer.py)
+    plot_cache: Dict[Any, Any] = field(default_factory=dict)
+
+class ModificationPipeline:
+    """
+    Historia modyfikacji danych jako drzewo operacji nad niezmienną ramką źródłową.
+
+    Próbkowanie i usuwanie kolumn są zapisywane jako widoki (wybór wierszy i kolumn), więc niezależnie
+    od liczby kroków w pamięci pozostaje w przybliżeniu jedna kopia danych źródłowych. Ramki są
+    materializowane dopiero na żądanie i zapamiętywane dla kilku ostatnio używanych węzłów,
+    dlatego cofanie, ponawianie i przełączanie gałęzi nie wymaga ponownych obliczeń.
+    Zastosowanie operacji po cofnięciu tworzy nową gałąź - poprzednia pozostaje dostępna.
+    """
+
+    def __init__(self, source: pd.DataFrame, label: str = 'Wczytanie danych', engine: Optional[StatisticsEngine] = None):
+        self.pipeline_id = uuid.uuid4().hex
+        self._ids = itertools.count()
+        self.nodes: Dict[int, PipelineNode] = {}
+        self._last_child: Dict[int, int] = {}
+        self._frames: 'OrderedDict[int, pd.DataFrame]' = OrderedDict()
+        root = self._add(None, Operation('load', label=label), _View(source, None, source.columns.tolist()))
+        root.engine = engine
+        self._frames[root.node_id] = source
+        self.current_id = root.node_id
+        # Ostatnie osadzenie w tej historii - kolejna redukcja może od niego wystartować (src/warm_start.py)
+        self.last_embedding: Optional[PreviousEmbedding] = None
+        # Zwiększana po dopisaniu wierszy do danych źródłowych - wyniki zadań sprzed zmiany nie trafiają do pamięci podręcznych
+        self.revision = 0
+
+    def _add(self, parent_id: Optional[int], operation: Operation, view: _View) -> PipelineNode:
+        node = PipelineNode(next(self._ids), parent_id, operation, view)
+        self.nodes[node.node_id] = node
+        if parent_id is not None:
+            self._last_child[parent_id] = node.node_id
+        return node
+
+    # --- Stan bieżący i nawigacja ---
+
+    @property
+    def current(self) -> PipelineNode:
+        return self.nodes[self.current_id]
+
+    @property
+    def source(self) -> pd.DataFrame:
+        """Dane źródłowe historii (wczytana ramka, z wierszami dopisanymi przez extend_source)."""
+        return self.nodes[next(iter(self.nodes))].view.base
+
+    def frame(self, node_id: Optional[int] = None) -> pd.DataFrame:
+        """Zwraca (leniwie materializowaną) ramkę danych węzła - domyślnie bieżącego."""
+        node_id = self.current_id if node_id is None else node_id
+        if node_id in self._frames:
+            self._frames.move_to_end(node_id)
+            return self._frames[node_id]
+        node = self.nodes[node_id]
+        with span('modify.materialize', operation=node.operation.kind, rows=node.view.n_rows, columns=len(node.view.columns)):
+            frame = node.view.materialize()
+        self._frames[node_id] = frame
+        root_id = next(iter(self.nodes))
+        while len(self._frames) > PIPELINE_CACHED_FRAMES:
+            # Ramka źródłowa jest zawsze w pamięci (widoki się do niej odwołują), więc jej nie usuwamy
+            oldest = next(node for node in self._frames if node != root_id)
+            del self._frames[oldest]
+            if self.nodes[oldest].engine is not None:
+                # Silnik nie może przetrzymywać usuniętej ramki - zostanie podłączony ponownie przy użyciu
+                self.nodes[oldest].engine.attach(None)
+        return frame
+
+    def engine(self, node_id: Optional[int] = None) -> Optional[StatisticsEngine]:
+        """
+        Silnik statystyk węzła. Jeśli węzeł go nie ma, a ma go węzeł nadrzędny, silnik jest wyprowadzany
+        (projekcja kolumn, pierwsze/ostatnie n wierszy) bez ponownego przeglądania danych.
+        """
+        node = self.nodes[self.current_id if node_id is None else node_id]
+        if node.engine is None and node.parent_id is not None:
+            parent_engine = self.engine(node.parent_id)
+            if parent_engine is not None:
+                node.engine = self._derive_engine(parent_engine.attach(self.frame(node.parent_id)), node)
+        return node.engine
+
+    def _derive_engine(self, parent_engine: StatisticsEngine, node: PipelineNode) -> Optional[StatisticsEngine]:
+        operation, frame = node.operation, self.frame(node.node_id)
+        if operation.kind == 'remove_columns':
+            return parent_engine.project(frame.columns.tolist(), frame)
+        if operation.kind == 'sample':
+            # Zakres wierszy wynika z widoku węzła, a nie z bieżącej liczby wierszy rodzica: po dopisaniu
+            # wierszy (extend_source) próbka 'Ostatnie n' nadal obejmuje wiersze sprzed dopisania
+            span, parent_span = node.view.span(), self.nodes[node.parent_id].view.span()
+            if span is None or parent_span is None:
+                return None
+            start, stop = span[0] - parent_span[0], span[1] - parent_span[0]
+            if (start, stop) == (0, parent_engine.n_rows):
+                return parent_engine.attach(frame)
+            return parent_engine.row_range(start, stop, frame)
+        return None
+
+    def set_engine(self, node_id: int, engine: StatisticsEngine) -> None:
+        """Zapamiętuje silnik statystyk policzony dla węzła (np. w zadaniu w tle), jeśli dotyczy aktualnych danych węzła."""
+        if node_id in self.nodes and engine.n_rows == self.nodes[node_id].view.n_rows:
+            self.nodes[node_id].engine = engine.attach(self.frame(node_id))
+
+    def extend_source(self, extended: pd.DataFrame) -> List[int]:
+        """
+        Zastępuje dane źródłowe ramką z dopisanymi na końcu wierszami (obserwowany plik, src/watched_csv.py).
+        Pozycje dotychczasowych wierszy się nie zmieniają, więc próbki (wybory wierszy) i redukcje pozostają
+        migawkami, a węzły bez wyboru wierszy (wczytanie, usunięcie kolumn) obejmują nowe wiersze.
+        Silnik statystyk danych źródłowych jest aktualizowany przyrostowo - tylko o nowe wiersze.
+
+        Returns:
+            Identyfikatory węzłów, których dane się zmieniły.
+        """
+        root = self.nodes[next(iter(self.nodes))]
+        source = self.source
+        changed = []
+        for node in self.nodes.values():
+            if node.view.base is not source:
+                continue
+            node.view.base = extended
+            if node.view.rows is None:
+                changed.append(node.node_id)
+                self._frames.pop(node.node_id, None)
+                node.plot_cache = {}
+                if node is not root:
+                    # Projekcja kolumn jest wyprowadzana ponownie z silnika danych źródłowych (bez przeglądania danych)
+                    node.engine = None
+        if root.engine is not None:
+            root.engine.update(extended.iloc[len(source):], frame=extended)
+        self._frames[root.node_id] = extended
+        self.revision += 1
+        return changed
+
+    def set_plot_cache(self, node_id: int, plot_cache: Dict[Any, Any]) -> None:
+        """
+        Zapamiętuje wyniki pośrednie wykresów policzone dla węzła (zadanie w osobnym procesie zwraca nowe wpisy).
+        Pamiętanych jest co najwyżej PIPELINE_PLOT_CACHE_ENTRIES ostatnio dodanych wpisów, bo słownik jest
+        przesyłany do procesu roboczego z każdym wykresem.
+        """
+        if node_id not in self.nodes:
+            return
+        cache = self.nodes[node_id].plot_cache
+        for key, value in plot_cache.items():
+            cache.pop(key, None)
+            cache[key] = value
+        while len(cache) > PIPELINE_PLOT_CACHE_ENTRIES:
+            del cache[next(iter(cache))]
+
+    def can_undo(self) -> bool:
+        return self.current.parent_id is not None
+
+    def can_redo(self) -> bool:
+        return self.current_id in self._last_child
+
+    def undo(self) -> None:
+        """Przechodzi do węzła nadrzędnego (dane sprzed ostatniej modyfikacji)."""
+        if not self.can_undo():
+            raise ValueError("Brak modyfikacji do cofnięcia.")
+        self.current_id = self.current.parent_id
+
+    def redo(self) -> None:
+        """Ponawia ostatnio cofniętą (lub ostatnio wybraną) modyfikację w bieżącej gałęzi."""
+        if not self.can_redo():
+            raise ValueError("Brak modyfikacji do ponowienia.")
+        self.current_id = self._last_child[self.current_id]
+
+    def checkout(self, node_id: int) -> None:
+        """Przełącza na dowolny węzeł historii (np. inną gałąź)."""
+        if node_id not in self.nodes:
+            raise ValueError(f"Nie ma kroku historii o numerze {node_id}.")
+        self.current_id = node_id
+        # Ponowienie z węzłów nadrzędnych ma prowadzić z powrotem do wybranej gałęzi
+        node = self.nodes[node_id]
+        while node.parent_id is not None:
+            self._last_child[node.parent_id] = node.node_id
+            node = self.nodes[node.parent_id]
+
+    def path(self, node_id: Optional[int] = None) -> List[PipelineNode]:
+        """Ciąg operacji od wczytania danych do węzła."""
+        node = self.nodes[self.current_id if node_id is None else node_id]
+        path = [node]
+        while node.parent_id is not None:
+            node = self.nodes[node.parent_id]
+            path.append(node)
+        return path[::-1]
+
+    def describe(self, node_id: int) -> str:
+        """Opis węzła do listy wyboru: numer, operacja i rozmiar danych."""
+        node = self.nodes[node_id]
+        depth = len(self.path(node_id)) - 1
+        return f"{node_id}: {'· ' * depth}{node.operation.label} ({node.view.n_rows} × {len(node.view.columns)})"
+
+    # --- Operacje ---
+
+    def _apply(self, operation: Operation, view: _View, parent_id: Optional[int]) -> PipelineNode:
+        node = self._add(self.current_id if parent_id is None else parent_id, operation, view)
+        self.current_id = node.node_id
+        return node
+
+    def sample(self, method: Literal['Pierwsze n', 'Ostatnie n', 'Losowe n'], n_samples: int,
+               parent_id: Optional[int] = None) -> PipelineNode:
+        """Próbkowanie jako wybór wierszy (widok), z tą samą semantyką co sample_data."""
+        parent = self.nodes[self.current_id if parent_id is None else parent_id]
+        n_rows = parent.view.n_rows
+        if n_samples >= n_rows:
+            rows = None
+        elif method == 'Pierwsze n':
+            rows = slice(0, n_samples)
+        elif method == 'Ostatnie n':
+            rows = slice(n_rows - n_samples, n_rows)
+        else:
+            # Pozycje wylosowane przez sample_data na ramce bez kolumn - bez dotykania danych
+            positions = sample_data(pd.DataFrame(index=pd.RangeIndex(n_rows)), method, n_samples).index
+            rows = positions.to_numpy()
+        view = _View(parent.view.base, parent.view.select_rows(rows), parent.view.columns)
+        operation = Operation('sample', {'method': method, 'n_samples': n_samples},
+                              f"Próbkowanie ({method}, n={n_samples})")
+        return self._apply(operation, view, parent.node_id)
+
+    def remove_columns(self, columns_to_remove: List[str], parent_id: Optional[int] = None) -> PipelineNode:
+        """Usunięcie kolumn jako projekcja (widok), z walidacją jak w remove_columns."""
+        parent = self.nodes[self.current_id if parent_id is None else parent_id]
+        # Walidacja na pustej ramce o tych samych kolumnach
+        remaining = remove_columns(pd.DataFrame(columns=parent.view.columns), columns_to_remove).columns.tolist()
+        view = _View(parent.view.base, parent.view.rows, remaining)
+        operation = Operation('remove_columns', {'columns': list(columns_to_remove)},
+                              f"Usunięcie kolumn: {', '.join(map(str, columns_to_remove))}")
+        return self._apply(operation, view, parent.node_id)
+
+    def add_result(self, operation: Operation, result: pd.DataFrame, parent_id: Optional[int] = None) -> PipelineNode:
+        """
+        Dodaje krok, którego wynik został już obliczony (np. redukcja wymiarowości w zadaniu w tle).
+        Wynik staje się nową ramką bazową dla kolejnych widoków.
+        """
+        node = self._apply(operation, _View(result, None, result.columns.tolist()), parent_id)
+        self._frames[node.node_id] = result
+        return node
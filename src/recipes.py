@@ -0,0 +1,143 @@
+# src/recipes.py
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Tuple, Union
+import pandas as pd
+from plotly.graph_objects import Figure
+
+if TYPE_CHECKING:
+    from src.pipeline import ModificationPipeline
+
+RECIPE_VERSION = 1
+
+RecipeAction = Literal['reset', 'sample', 'remove_columns', 'reduce', 'statistics', 'plot']
+# Kroki zmieniające bieżące dane i kroki tworzące wyniki (tabele, wykresy)
+MODIFY_ACTIONS = ('sample', 'remove_columns', 'reduce')
+OUTPUT_ACTIONS = ('statistics', 'plot')
+# Powrót do danych zaraz po wczytaniu (wyniki z innej gałęzi historii modyfikacji)
+RESET_ACTION = 'reset'
+
+@dataclass
+class RecipeStep:
+    """Pojedynczy krok przepisu: akcja z parametrami (i tytuł wyniku dla statystyk i wykresów)."""
+    action: RecipeAction
+    params: Dict[str, Any] = field(default_factory=dict)
+    title: str = ''
+
+    def __post_init__(self):
+        if self.action not in MODIFY_ACTIONS + OUTPUT_ACTIONS + (RESET_ACTION,):
+            raise ValueError(f"Nieznana akcja w przepisie: {self.action}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        step = {'action': self.action, 'params': self.params}
+        if self.title:
+            step['title'] = self.title
+        return step
+
+@dataclass
+class Recipe:
+    """
+    Deklaratywny przepis analizy: ustawienia wczytywania pliku i kroki wykonywane kolejno
+    (modyfikacje danych, statystyki, wykresy). Zapisywany jako JSON, odtwarzany przez src/batch.py.
+
+    Ustawienia wczytywania ('load'): 'separator' i 'decimal' (CSV, domyślnie 'auto'), 'sampler' -
+    próbkowanie strumieniowe CSV [metoda, n, kolumna warstwowania], a dla plików kolumnowych
+    'columns' (lista kolumn) i 'sample' [metoda, n].
+    """
+    load: Dict[str, Any] = field(default_factory=dict)
+    steps: List[RecipeStep] = field(default_factory=list)
+    version: int = RECIPE_VERSION
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'version': self.version, 'load': self.load, 'steps': [step.to_dict() for step in self.steps]}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Recipe':
+        version = data.get('version', RECIPE_VERSION)
+        if version > RECIPE_VERSION:
+            raise ValueError(f"Nieobsługiwana wersja przepisu: {version} (obsługiwana: {RECIPE_VERSION}).")
+        steps = data.get('steps', [])
+        if not isinstance(steps, list):
+            raise ValueError("Pole 'steps' przepisu musi być listą.")
+        return cls(
+            load=dict(data.get('load') or {}),
+            steps=[RecipeStep(step['action'], dict(step.get('params') or {}), step.get('title', '')) for step in steps],
+            version=version,
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> 'Recipe':
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Niepoprawny plik przepisu (JSON): {e}")
+        return cls.from_dict(data)
+
+    @classmethod
+    def read(cls, path: Union[str, Path]) -> 'Recipe':
+        return cls.from_json(Path(path).read_text(encoding='utf-8'))
+
+def modification_steps(pipeline: 'ModificationPipeline', node_id: Optional[int] = None) -> List[RecipeStep]:
+    """Kroki przepisu odtwarzające modyfikacje od wczytania danych do węzła historii."""
+    steps = []
+    for node in pipeline.path(node_id):
+        operation = node.operation
+        if operation.kind == 'sample':
+            steps.append(RecipeStep('sample', {'method': operation.params['method'], 'n_samples': operation.params['n_samples']}))
+        elif operation.kind == 'remove_columns':
+            steps.append(RecipeStep('remove_columns', {'columns': list(operation.params['columns'])}))
+        elif operation.kind == 'reduce':
+            steps.append(RecipeStep('reduce', {'method': operation.params['method'],
+                                               'params': dict(operation.params.get('params') or {'n_components': operation.params['n_components']})}))
+    return steps
+
+def recipe_from_history(load: Dict[str, Any], entries: List[Tuple[List[RecipeStep], RecipeStep]]) -> Recipe:
+    """
+    Składa przepis z historii wyników sesji. Każdy wpis to (modyfikacje danych, dla których policzono wynik,
+    krok wyniku). Wyniki z tej samej gałęzi historii nie powtarzają modyfikacji; przejście do innej gałęzi
+    zaczyna się od kroku 'reset' (powrót do wczytanych danych).
+    """
+    steps: List[RecipeStep] = []
+    applied: List[RecipeStep] = []
+    for modifications, output in entries:
+        if applied != modifications[:len(applied)]:
+            steps.append(RecipeStep(RESET_ACTION))
+            applied = []
+        steps.extend(modifications[len(applied):])
+        applied = list(modifications)
+        steps.append(output)
+    return Recipe(load=dict(load), steps=steps)
+
+def apply_modification(df: pd.DataFrame, step: RecipeStep) -> pd.DataFrame:
+    """Wykonuje krok modyfikacji danych (próbkowanie, usunięcie kolumn, redukcja wymiarowości)."""
+    from src.data_modifier import sample_data, remove_columns, reduce_dimensions
+
+    if step.action == 'sample':
+        return sample_data(df, step.params['method'], int(step.params['n_samples']))
+    if step.action == 'remove_columns':
+        return remove_columns(df, step.params['columns'])
+    if step.action == 'reduce':
+        return reduce_dimensions(df, step.params['method'], dict(step.params.get('params') or {}))
+    raise ValueError(f"Krok '{step.action}' nie jest modyfikacją danych.")
+
+def compute_output(df: pd.DataFrame, step: RecipeStep) -> Union[pd.DataFrame, Figure]:
+    """Oblicza wynik kroku: tabelę statystyk lub wykres."""
+    from src.statistics import calculate_descriptive_stats, calculate_correlation
+    from src.visualizer import create_plot
+
+    params = step.params
+    if step.action == 'statistics':
+        if params.get('stat_type', 'Statystyki opisowe') == 'Statystyki opisowe':
+            return calculate_descriptive_stats(df, params.get('columns'))
+        return calculate_correlation(df, params.get('corr_method') or 'pearson', params.get('columns'), top_k=params.get('top_k'))
+    if step.action == 'plot':
+        plot_params = dict(params.get('params') or {})
+        if params['plot_type'] == 'Mapa ciepła':
+            plot_params['corr_df'] = calculate_correlation(df, 'pearson')
+        return create_plot(df, params['plot_type'], plot_params)
+    raise ValueError(f"Krok '{step.action}' nie tworzy wyniku.")
@@ -0,0 +1,129 @@
+# src/reducer_comparison.py
+
+import os
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from pathlib import Path
+from plotly.graph_objects import Figure
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.config import CACHE_DIR, COMPARISON_THREADS
+
+# Hiperparametr określający wielkość sąsiedztwa w każdej metodzie (zmieniany między wariantami porównania)
+NEIGHBORHOOD_PARAMS = {'t-SNE': 'perplexity', 'UMAP': 'n_neighbors', 'TRIMAP': 'n_inliers', 'PaCMAP': 'n_neighbors'}
+# Wspólne macierze wejściowe starsze niż ta liczba sekund są usuwane (pozostałości po przerwanych sesjach)
+SHARED_ARRAY_MAX_AGE_SECONDS = 24 * 3600
+# Maksymalna długość komunikatu błędu w tytule panelu wykresu
+ERROR_TITLE_CHARS = 80
+
+def _shared_dir() -> Path:
+    return CACHE_DIR / 'shared'
+
+def _remove_stale(directory: Path) -> None:
+    threshold = time.time() - SHARED_ARRAY_MAX_AGE_SECONDS
+    for path in directory.glob('*.npy'):
+        try:
+            if path.stat().st_mtime < threshold:
+                path.unlink()
+        except OSError:
+            continue
+
+def share_array(array: np.ndarray) -> str:
+    """
+    Zapisuje macierz do pliku .npy w CACHE_DIR/shared i zwraca jego ścieżkę. Procesy robocze otwierają
+    go przez open_shared_array jako mapę pamięci, więc dane nie są kopiowane do każdego zadania osobno.
+    """
+    directory = _shared_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    _remove_stale(directory)
+    path = directory / f"{uuid.uuid4().hex}.npy"
+    shared = np.lib.format.open_memmap(path, mode='w+', dtype=array.dtype, shape=array.shape)
+    shared[:] = array
+    shared.flush()
+    del shared
+    return str(path)
+
+def open_shared_array(path: Union[str, Path]) -> np.ndarray:
+    """Otwiera macierz zapisaną przez share_array jako mapę pamięci tylko do odczytu."""
+    return np.load(path, mmap_mode='r')
+
+def release_shared_array(path: Union[str, Path]) -> None:
+    """Usuwa plik wspólnej macierzy (procesy, które go otworzyły, zachowują dostęp do danych)."""
+    Path(path).unlink(missing_ok=True)
+
+@dataclass(frozen=True)
+class ComparisonConfig:
+    """Wariant porównania: metoda redukcji i nadpisane hiperparametry (pozostałe są dobierane automatycznie)."""
+    method: str
+    hyperparams: Tuple[Tuple[str, Any], ...] = ()
+
+    @property
+    def label(self) -> str:
+        if not self.hyperparams:
+            return self.method
+        return f"{self.method} ({', '.join(f'{name}={value}' for name, value in self.hyperparams)})"
+
+    def params(self, base_params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parametry embed_scaled dla wariantu. Pamięć podręczna osadzeń jest pomijana,
+        aby porównywane czasy dopasowania były rzeczywiste.
+        """
+        return dict(base_params, n_components=2, hyperparams=dict(self.hyperparams), use_cache=False)
+
+def comparison_configs(methods: List[str], neighborhood_sizes: Optional[List[int]] = None) -> List[ComparisonConfig]:
+    """Warianty porównania: każda metoda z domyślnymi hiperparametrami albo z każdą z podanych wielkości sąsiedztwa."""
+    if not methods:
+        raise ValueError("Wybierz co najmniej jedną metodę redukcji do porównania.")
+    if not neighborhood_sizes:
+        return [ComparisonConfig(method) for method in methods]
+    sizes = sorted({int(size) for size in neighborhood_sizes})
+    return [ComparisonConfig(method, ((NEIGHBORHOOD_PARAMS[method], size),)) for method in methods for size in sizes]
+
+def threads_per_job(n_jobs: int, n_workers: int) -> int:
+    """
+    Liczba wątków (BLAS, OpenMP, numba) dla jednego dopasowania: rdzenie dzielone po równo między
+    zadania wykonywane jednocześnie, chyba że ustawiono VIS_TOOL_COMPARISON_THREADS.
+    """
+    if COMPARISON_THREADS > 0:
+        return COMPARISON_THREADS
+    parallel = max(1, min(n_jobs, n_workers))
+    return max(1, (os.cpu_count() or 1) // parallel)
+
+@dataclass
+class ReducerComparison:
+    """Porównanie metod redukcji w sesji: wspólna macierz wejściowa, oczekiwane warianty i zebrane osadzenia."""
+    title: str
+    input_path: str
+    labels: List[str]
+    color: Optional[str] = None
+    color_values: Optional[pd.Series] = None  # wartości kolumny koloru dla wierszy wspólnej macierzy
+    comparison_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # etykieta wariantu -> (osadzenie lub None, czas dopasowania w sekundach, komunikat błędu)
+    results: Dict[str, Tuple[Optional[np.ndarray], Optional[float], Optional[str]]] = field(default_factory=dict)
+
+    def record(self, label: str, embedding: np.ndarray, seconds: float) -> None:
+        self.results[label] = (embedding, seconds, None)
+
+    def record_failure(self, label: str, message: str) -> None:
+        self.results[label] = (None, None, message)
+
+    @property
+    def complete(self) -> bool:
+        return all(label in self.results for label in self.labels)
+
+    def figure(self) -> Figure:
+        """Wykres 'small multiples' ze wszystkimi osadzeniami; czas dopasowania (lub błąd) w tytule panelu."""
+        from src.visualizer import create_embedding_grid
+
+        panels = []
+        for label in self.labels:
+            embedding, seconds, error = self.results.get(label, (None, None, "brak wyniku"))
+            note = f"{seconds:.1f} s" if error is None else f"błąd: {error[:ERROR_TITLE_CHARS]}"
+            panels.append((f"{label} - {note}", embedding))
+        return create_embedding_grid(panels, self.color_values, self.color, self.title)
+
+    def release(self) -> None:
+        release_shared_array(self.input_path)
@@ -0,0 +1,128 @@
+# src/reducers.py
+
+import importlib
+import importlib.util
+import threading
+import numpy as np
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Set
+
+ReductionMethod = Literal['t-SNE', 'UMAP', 'TRIMAP', 'PaCMAP']
+
+# Liczba punktów i cech zbioru rozgrzewkowego (kompilacja funkcji numba bez istotnych obliczeń)
+PREWARM_ROWS = 200
+PREWARM_FEATURES = 5
+
+@dataclass(frozen=True)
+class ReducerBackend:
+    """Biblioteka implementująca metodę redukcji: moduł, klasa i czy korzysta z kompilacji numba."""
+    package: str  # pakiet najwyższego poziomu (sprawdzany bez importu)
+    module: str
+    class_name: str
+    uses_numba: bool
+
+REDUCER_BACKENDS: Dict[str, ReducerBackend] = {
+    't-SNE': ReducerBackend('sklearn', 'sklearn.manifold', 'TSNE', False),
+    'UMAP': ReducerBackend('umap', 'umap', 'UMAP', True),
+    'TRIMAP': ReducerBackend('trimap', 'trimap', 'TRIMAP', True),
+    'PaCMAP': ReducerBackend('pacmap', 'pacmap', 'PaCMAP', True),
+}
+
+_prewarm_lock = threading.Lock()
+_prewarmed: Set[str] = set()
+
+@lru_cache(maxsize=None)
+def is_available(method: str) -> bool:
+    """Czy biblioteka metody jest zainstalowana - sprawdzane bez importowania (importlib.util.find_spec)."""
+    backend = REDUCER_BACKENDS.get(method)
+    return backend is not None and importlib.util.find_spec(backend.package) is not None
+
+def available_methods() -> List[str]:
+    """Metody redukcji wymiarowości, których biblioteki są zainstalowane (w kolejności z REDUCER_BACKENDS)."""
+    return [method for method in REDUCER_BACKENDS if is_available(method)]
+
+def reducer_class(method: str) -> type:
+    """
+    Zwraca klasę reduktora, importując jego bibliotekę przy pierwszym użyciu
+    (import UMAP, TRIMAP i PaCMAP ładuje numba i trwa kilka sekund).
+    """
+    backend = REDUCER_BACKENDS.get(method)
+    if backend is None:
+        raise ValueError(f"Nieznana metoda redukcji wymiarowości: {method}")
+    if not is_available(method):
+        raise ValueError(f"{method} nie jest dostępny.")
+    try:
+        module = importlib.import_module(backend.module)
+    except ImportError as e:
+        raise ValueError(f"{method} nie jest dostępny: {e}")
+    return getattr(module, backend.class_name)
+
+def _warm_up(method: str) -> None:
+    """Importuje bibliotekę i dopasowuje reduktor do małego zbioru, aby skompilować funkcje numba."""
+    cls = reducer_class(method)
+    if not REDUCER_BACKENDS[method].uses_numba:
+        return
+    data = np.random.default_rng(0).standard_normal((PREWARM_ROWS, PREWARM_FEATURES)).astype(np.float32)
+    if method == 'TRIMAP':
+        reducer = cls(n_dims=2, n_iters=10, verbose=False)
+    elif method == 'UMAP':
+        reducer = cls(n_components=2, n_epochs=10, random_state=42)
+    else:
+        reducer = cls(n_components=2, num_iters=(5, 5, 10), random_state=42)
+    reducer.fit_transform(data)
+
+def _prewarm(methods: List[str], jit: bool) -> None:
+    for method in methods:
+        try:
+            if jit:
+                _warm_up(method)
+            else:
+                reducer_class(method)
+        except Exception:
+            # Rozgrzewka jest tylko optymalizacją - błąd ujawni się przy właściwym użyciu metody
+            continue
+
+def prewarm(methods: Optional[Iterable[str]] = None, jit: bool = True) -> Optional[threading.Thread]:
+    """
+    Importuje biblioteki reduktorów (i opcjonalnie kompiluje ich funkcje numba) w wątku w tle,
+    aby pierwsza redukcja nie czekała na import. Każda metoda jest rozgrzewana co najwyżej raz na proces.
+
+    Returns:
+        Wątek rozgrzewki lub None, jeśli wszystkie metody były już rozgrzane.
+    """
+    with _prewarm_lock:
+        selected = [method for method in (methods or REDUCER_BACKENDS) if is_available(method) and method not in _prewarmed]
+        if not selected:
+            return None
+        _prewarmed.update(selected)
+    thread = threading.Thread(target=_prewarm, args=(selected, jit), name='reducer-prewarm', daemon=True)
+    thread.start()
+    return thread
+
+@contextmanager
+def thread_limits(n_threads: int) -> Iterator[None]:
+    """
+    Ogranicza liczbę wątków bibliotek natywnych (BLAS, OpenMP - przez threadpoolctl) oraz numba
+    na czas bloku. Przy kilku reduktorach dopasowywanych równolegle zapobiega to uruchamianiu
+    przez każdy z nich tylu wątków, ile jest rdzeni.
+    """
+    from threadpoolctl import threadpool_limits
+
+    n_threads = max(1, int(n_threads))
+    numba = None
+    # Pula wątków numba uruchomiona z wątku pobocznego (np. skryptu Streamlit) blokuje zakończenie procesu -
+    # liczbę wątków numba ustawiamy tylko w wątku głównym (procesy robocze puli zadań)
+    if threading.current_thread() is threading.main_thread() and importlib.util.find_spec('numba') is not None:
+        numba = importlib.import_module('numba')
+    previous = None
+    if numba is not None:
+        previous = numba.get_num_threads()
+        numba.set_num_threads(min(n_threads, numba.config.NUMBA_NUM_THREADS))
+    try:
+        with threadpool_limits(limits=n_threads):
+            yield
+    finally:
+        if numba is not None:
+            numba.set_num_threads(previous)
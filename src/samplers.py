@@ -0,0 +1,265 @@
+# src/samplers.py
+
+import math
+import numpy as np
+import pandas as pd
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, List, Literal, Optional
+
+StreamSampleMethod = Literal['Pierwsze n', 'Ostatnie n', 'Losowe n', 'Warstwowe n']
+
+# Maksymalna liczba warstw przy próbkowaniu warstwowym
+MAX_STRATA = 50
+# Zapas wierszy przechowywanych ponad podwojony przydział warstwy (przydział rośnie przez zaokrąglenia i zmianę proporcji)
+STRATUM_SPARE_ROWS = 10
+_POSITION_COLUMN = '__pozycja__'
+_KEY_COLUMN = '__klucz__'
+
+class StreamSampler(ABC):
+    """
+    Próbkowanie strumieniowe: dane przychodzą kawałkami (np. z pd.read_csv(chunksize=...)),
+    a w pamięci trzymana jest tylko próbka o stałym rozmiarze i bieżący kawałek.
+    """
+
+    def __init__(self, n_samples: int):
+        if n_samples <= 0:
+            raise ValueError("Liczba wierszy próbki musi być dodatnia.")
+        self.n_samples = n_samples
+        self.rows_seen = 0
+
+    @property
+    def done(self) -> bool:
+        """Czy dalsze dane nie mogą już zmienić próbki (można przerwać czytanie pliku)."""
+        return False
+
+    @abstractmethod
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Przetwarza kolejny kawałek danych."""
+
+    @abstractmethod
+    def result(self) -> pd.DataFrame:
+        """Zwraca próbkę z dotychczas przetworzonych danych."""
+
+    def describe(self) -> str:
+        """Opis próbkowania (do klucza pamięci podręcznej i komunikatów)."""
+        return f"{type(self).__name__}(n={self.n_samples})"
+
+class HeadSampler(StreamSampler):
+    """Pierwsze n wierszy - czytanie kończy się po ich zebraniu."""
+
+    def __init__(self, n_samples: int):
+        super().__init__(n_samples)
+        self._chunks: List[pd.DataFrame] = []
+
+    @property
+    def done(self) -> bool:
+        return self.rows_seen >= self.n_samples
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        needed = self.n_samples - self.rows_seen
+        if needed > 0:
+            self._chunks.append(chunk.iloc[:needed])
+        self.rows_seen += len(chunk)
+
+    def result(self) -> pd.DataFrame:
+        return pd.concat(self._chunks) if self._chunks else pd.DataFrame()
+
+class TailSampler(StreamSampler):
+    """Ostatnie n wierszy - bufor cykliczny kawałków, z którego odrzucane są kawałki niepotrzebne."""
+
+    def __init__(self, n_samples: int):
+        super().__init__(n_samples)
+        self._chunks: Deque[pd.DataFrame] = deque()
+        self._buffered = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self._chunks.append(chunk)
+        self._buffered += len(chunk)
+        self.rows_seen += len(chunk)
+        while self._chunks and self._buffered - len(self._chunks[0]) >= self.n_samples:
+            self._buffered -= len(self._chunks.popleft())
+
+    def result(self) -> pd.DataFrame:
+        if not self._chunks:
+            return pd.DataFrame()
+        return pd.concat(list(self._chunks)).iloc[-self.n_samples:]
+
+class ReservoirSampler(StreamSampler):
+    """
+    Jednorodna próbka losowa n wierszy (algorytm R, wektorowo dla całych kawałków).
+    Wiersz o pozycji t trafia do rezerwuaru z prawdopodobieństwem n / (t + 1) i zastępuje losowy element.
+    Wynik jest uporządkowany według pozycji w pliku.
+    """
+
+    def __init__(self, n_samples: int, seed: Optional[int] = 42, rng: Optional[np.random.Generator] = None):
+        super().__init__(n_samples)
+        self._rng = rng if rng is not None else np.random.default_rng(seed)
+        self._parts: List[pd.DataFrame] = []
+        self._slots: List[np.ndarray] = []
+        self._part_rows = 0
+
+    def update(self, chunk: pd.DataFrame, file_positions: Optional[np.ndarray] = None) -> None:
+        """Dodaje kawałek danych; `file_positions` to pozycje wierszy w pliku, jeśli strumień jest podzbiorem pliku."""
+        positions = np.arange(self.rows_seen, self.rows_seen + len(chunk))
+        file_positions = positions if file_positions is None else file_positions
+        self.rows_seen += len(chunk)
+
+        slots = np.where(positions < self.n_samples, positions, -1)
+        later = positions >= self.n_samples
+        if later.any():
+            drawn = self._rng.integers(0, positions[later] + 1)
+            slots[later] = np.where(drawn < self.n_samples, drawn, -1)
+        accepted = np.flatnonzero(slots >= 0)
+        if not len(accepted):
+            return
+
+        part = chunk.iloc[accepted].copy()
+        part[_POSITION_COLUMN] = file_positions[accepted]
+        self._parts.append(part)
+        self._slots.append(slots[accepted])
+        self._part_rows += len(accepted)
+        if self._part_rows > 2 * self.n_samples:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Zostawia po jednym (najpóźniejszym) wierszu na miejsce w rezerwuarze."""
+        if not self._parts:
+            return
+        parts = pd.concat(self._parts)
+        slots = np.concatenate(self._slots)
+        # Ostatni zapis do danego miejsca wygrywa - szukamy ostatniego wystąpienia każdego miejsca
+        _, last = np.unique(slots[::-1], return_index=True)
+        keep = np.sort(len(slots) - 1 - last)
+        self._parts = [parts.iloc[keep]]
+        self._slots = [slots[keep]]
+        self._part_rows = len(keep)
+
+    def result(self) -> pd.DataFrame:
+        self._compact()
+        if not self._parts:
+            return pd.DataFrame()
+        sample = self._parts[0].sort_values(_POSITION_COLUMN, kind='stable')
+        return sample.drop(columns=_POSITION_COLUMN)
+
+class StratifiedSampler(StreamSampler):
+    """
+    Próbka warstwowa według kolumny kategorycznej: przydział n wierszy proporcjonalny do liczności warstw
+    (co najmniej jeden wiersz na warstwę, jeśli się da).
+
+    Każdy wiersz dostaje losowy klucz, a próbka warstwy to jej wiersze o najmniejszych kluczach, więc jest
+    jednorodna. Warstwa przechowuje tylko wiersze o kluczach mniejszych od progu - ok. dwukrotność bieżącego
+    przydziału (plus STRATUM_SPARE_ROWS) - więc pamięć próbnika jest ograniczona przez ok. 2n wierszy
+    (przed porządkowaniem: 4n) plus stały zapas na warstwę, a nie n wierszy na każdą warstwę.
+    """
+
+    def __init__(self, n_samples: int, column: str, seed: Optional[int] = 42):
+        super().__init__(n_samples)
+        self.column = column
+        self._rng = np.random.default_rng(seed)
+        # Dla każdej warstwy: wszystkie jej wiersze o kluczu mniejszym od progu (próg maleje przy porządkowaniu)
+        self._parts: Dict[object, List[pd.DataFrame]] = {}
+        self._thresholds: Dict[object, float] = {}
+        self._counts: Dict[object, int] = {}
+        self._buffered = 0
+
+    def describe(self) -> str:
+        return f"{type(self).__name__}(n={self.n_samples}, kolumna={self.column})"
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if self.column not in chunk.columns:
+            raise ValueError(f"Kolumna warstwowania '{self.column}' nie istnieje w danych.")
+        file_positions = np.arange(self.rows_seen, self.rows_seen + len(chunk))
+        keys = self._rng.random(len(chunk))
+        self.rows_seen += len(chunk)
+        for value, rows in chunk.groupby(self.column, sort=False, dropna=False, observed=True).indices.items():
+            value = None if pd.isna(value) else value  # braki danych tworzą jedną wspólną warstwę
+            if value not in self._counts:
+                if len(self._counts) >= MAX_STRATA:
+                    raise ValueError(f"Kolumna '{self.column}' ma więcej niż {MAX_STRATA} wartości - nie nadaje się do warstwowania.")
+                self._parts[value] = []
+                self._thresholds[value] = 1.0
+                self._counts[value] = 0
+            self._counts[value] += len(rows)
+            rows = rows[keys[rows] < self._thresholds[value]]
+            if len(rows):
+                part = chunk.iloc[rows].copy()
+                part[_POSITION_COLUMN] = file_positions[rows]
+                part[_KEY_COLUMN] = keys[rows]
+                self._parts[value].append(part)
+                self._buffered += len(rows)
+        if self._buffered > 2 * sum(self._capacity(value) for value in self._counts):
+            self._compact()
+
+    def _capacity(self, value: object) -> int:
+        """Liczba wierszy przechowywanych dla warstwy: podwojony bieżący przydział proporcjonalny i zapas."""
+        return math.ceil(2 * self.n_samples * self._counts[value] / self.rows_seen) + STRATUM_SPARE_ROWS
+
+    def _compact(self) -> None:
+        """Zostawia w każdej warstwie wiersze o najmniejszych kluczach (do jej pojemności) i obniża jej próg."""
+        for value, parts in self._parts.items():
+            if not parts:
+                continue
+            stratum = pd.concat(parts) if len(parts) > 1 else parts[0]
+            capacity = self._capacity(value)
+            if len(stratum) > capacity:
+                keys = stratum[_KEY_COLUMN].to_numpy()
+                order = np.argpartition(keys, capacity)
+                self._thresholds[value] = min(self._thresholds[value], float(keys[order[capacity:]].min()))
+                stratum = stratum.iloc[np.sort(order[:capacity])]
+            self._parts[value] = [stratum]
+        self._buffered = sum(len(parts[0]) for parts in self._parts.values() if parts)
+
+    def _allocation(self, available: Dict[object, int]) -> Dict[object, int]:
+        """
+        Przydział n wierszy do warstw proporcjonalnie do liczności (metoda największych reszt), najwyżej
+        `available` wierszy na warstwę. Łącznie przydzielanych jest dokładnie min(n, liczba dostępnych wierszy);
+        każda warstwa dostaje co najmniej jeden wiersz, jeśli n nie jest mniejsze od liczby warstw
+        (kosztem warstw najbardziej ponad przydział proporcjonalny).
+        """
+        total = sum(self._counts.values())
+        n = min(self.n_samples, sum(available.values()))
+        quotas = {value: n * count / total for value, count in self._counts.items()}
+        minimum = 1 if n >= sum(1 for count in available.values() if count) else 0
+        allocation = {value: min(available[value], max(minimum, int(quota))) for value, quota in quotas.items()}
+        while sum(allocation.values()) > n:
+            value = max((v for v in allocation if allocation[v] > minimum), key=lambda v: allocation[v] - quotas[v])
+            allocation[value] -= 1
+        remaining = n - sum(allocation.values())
+        order = sorted(quotas, key=lambda v: (allocation[v] > 0, -(quotas[v] - allocation[v])))
+        while remaining > 0:
+            for value in order:
+                if remaining > 0 and allocation[value] < available[value]:
+                    allocation[value] += 1
+                    remaining -= 1
+        return allocation
+
+    def result(self) -> pd.DataFrame:
+        if not self._counts:
+            return pd.DataFrame()
+        self._compact()
+        available = {value: len(parts[0]) if parts else 0 for value, parts in self._parts.items()}
+        parts = []
+        for value, k in self._allocation(available).items():
+            if k <= 0:
+                continue
+            stratum = self._parts[value][0]
+            # k najmniejszych kluczy - jednorodny podzbiór warstwy
+            chosen = np.sort(np.argsort(stratum[_KEY_COLUMN].to_numpy(), kind='stable')[:k])
+            parts.append(stratum.iloc[chosen])
+        combined = pd.concat(parts).sort_values(_POSITION_COLUMN, kind='stable')
+        return combined.drop(columns=[_POSITION_COLUMN, _KEY_COLUMN])
+
+def make_sampler(method: StreamSampleMethod, n_samples: int, stratify_column: Optional[str] = None) -> StreamSampler:
+    """Tworzy próbnik strumieniowy odpowiadający metodzie próbkowania."""
+    if method == 'Pierwsze n':
+        return HeadSampler(n_samples)
+    if method == 'Ostatnie n':
+        return TailSampler(n_samples)
+    if method == 'Losowe n':
+        return ReservoirSampler(n_samples)
+    if method == 'Warstwowe n':
+        if not stratify_column:
+            raise ValueError("Próbkowanie warstwowe wymaga kolumny kategorycznej.")
+        return StratifiedSampler(n_samples, stratify_column)
+    raise ValueError(f"Nieznana metoda próbkowania: {method}")
@@ -3,30 +3,65 @@
 import pandas as pd
 from typing import Literal, List, Optional
 
-def calculate_descriptive_stats(df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
-    """Oblicza statystyki opisowe dla ramki danych."""
-    if columns:
-        # Wybierz tylko określone kolumny
-        selected_df = df[columns]
-    else:
-        # Użyj wszystkich kolumn numerycznych
-        selected_df = df.select_dtypes(include=['number'])
-    
-    if selected_df.empty:
-        raise ValueError("Brak kolumn numerycznych do obliczenia statystyk opisowych.")
-    
-    return selected_df.describe().T
-
-def calculate_correlation(df: pd.DataFrame, method: Literal['pearson', 'spearman'], columns: Optional[List[str]] = None) -> pd.DataFrame:
-    """Oblicza macierz korelacji dla podanej metody."""
-    if columns:
-        # Wybierz tylko określone kolumny numeryczne
-        numeric_df = df[columns].select_dtypes(include=['number'])
-    else:
-        # Użyj wszystkich kolumn numerycznych
-        numeric_df = df.select_dtypes(include=['number'])
+from src.correlation import top_pairs
+from src.incremental_stats import StatisticsEngine
+from src.tracing import span
+
+def _numeric_columns(df: pd.DataFrame, columns: Optional[List[str]] = None) -> List[str]:
+    """Zwraca nazwy kolumn numerycznych (spośród podanych lub wszystkich), tak jak select_dtypes(include=['number'])."""
+    dtypes = df.dtypes if not columns else df.dtypes[columns]
+    return [col for col, dtype in dtypes.items()
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)]
+
+def calculate_descriptive_stats(df: pd.DataFrame, columns: Optional[List[str]] = None, engine: Optional[StatisticsEngine] = None) -> pd.DataFrame:
+    """
+    Oblicza statystyki opisowe dla ramki danych.
+    Jeśli podano silnik statystyk przyrostowych dla tej ramki, korzysta z zapamiętanych statystyk.
+    """
+    with span('stats.describe', rows=len(df), columns=len(columns) if columns else len(df.columns)) as stage:
+        if columns:
+            # Wybierz tylko określone kolumny
+            if engine is not None and all(col in engine.columns for col in columns):
+                stage.set(engine=True)
+                return engine.describe(columns)
+            selected_df = df[columns]
+        else:
+            # Użyj wszystkich kolumn numerycznych
+            if engine is not None and engine.columns:
+                stage.set(engine=True)
+                return engine.describe()
+            selected_df = df.select_dtypes(include=['number'])
+
+        if selected_df.empty:
+            raise ValueError("Brak kolumn numerycznych do obliczenia statystyk opisowych.")
+
+        return selected_df.describe().T
+
+def calculate_correlation(
+    df: pd.DataFrame,
+    method: Literal['pearson', 'spearman'],
+    columns: Optional[List[str]] = None,
+    engine: Optional[StatisticsEngine] = None,
+    top_k: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Oblicza macierz korelacji dla podanej metody (pary kompletnych obserwacji, jak DataFrame.corr).
+    Sumy par kolumn są liczone blokowymi iloczynami macierzowymi na wielu rdzeniach (src/correlation.py).
+    Jeśli podano silnik statystyk przyrostowych dla tej ramki, korzysta z zapamiętanych sum.
+    Przy podanym `top_k` zwraca tylko k par kolumn o najsilniejszej korelacji.
+    """
+    # Wybierz określone kolumny numeryczne lub wszystkie kolumny numeryczne (bez kopiowania danych)
+    numeric_columns = _numeric_columns(df, columns)
     
-    if numeric_df.empty:
+    if not numeric_columns:
         raise ValueError("Brak kolumn numerycznych do obliczenia korelacji.")
-    
-    return numeric_df.corr(method=method)
\ No newline at end of file
+
+    if engine is None or not all(col in engine.columns for col in numeric_columns):
+        with span('stats.summarize', rows=len(df), columns=len(df.columns)):
+            engine = StatisticsEngine.from_frame(df)
+    with span('stats.correlation', method=method, rows=len(df), columns=len(numeric_columns)):
+        corr = engine.correlation(method, numeric_columns)
+
+    if top_k:
+        return top_pairs(corr, top_k)
+    return corr
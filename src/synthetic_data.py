@@ -0,0 +1,82 @@
+# src/synthetic_data.py
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Union
+
+# Liczba ukrytych czynników, z których powstają kolumny numeryczne (dzięki nim kolumny są skorelowane)
+LATENT_FACTORS = 4
+# Co która kolumna numeryczna jest całkowita (pozostałe są zmiennoprzecinkowe)
+INTEGER_COLUMN_EVERY = 4
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    """Parametry syntetycznego zbioru danych (do testów wydajności)."""
+    n_rows: int = 100_000
+    n_numeric: int = 20
+    n_text: int = 2
+    n_categories: int = 10  # liczba różnych wartości w kolumnach tekstowych
+    nan_rate: float = 0.0  # odsetek braków danych w kolumnach numerycznych
+    decimal_comma: bool = False  # liczby w pliku CSV zapisane z przecinkiem dziesiętnym
+    seed: int = 42
+
+    def __post_init__(self):
+        if self.n_rows <= 0:
+            raise ValueError("Liczba wierszy musi być dodatnia.")
+        if self.n_numeric < 0 or self.n_text < 0 or self.n_numeric + self.n_text == 0:
+            raise ValueError("Zbiór musi mieć co najmniej jedną kolumnę.")
+        if self.n_categories <= 0:
+            raise ValueError("Liczba kategorii musi być dodatnia.")
+        if not 0.0 <= self.nan_rate < 1.0:
+            raise ValueError("Odsetek braków danych musi należeć do przedziału [0, 1).")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def generate_dataframe(spec: SyntheticSpec) -> pd.DataFrame:
+    """
+    Generuje ramkę danych o zadanym kształcie: kolumny numeryczne są kombinacjami kilku wspólnych
+    czynników z szumem (nietrywialne korelacje i struktura dla redukcji wymiarowości),
+    a kolumny tekstowe zawierają etykiety kategorii. Wynik jest powtarzalny dla danego ziarna.
+    """
+    rng = np.random.default_rng(spec.seed)
+    columns: Dict[str, Any] = {}
+
+    if spec.n_numeric:
+        factors = rng.standard_normal((spec.n_rows, LATENT_FACTORS))
+        loadings = rng.standard_normal((LATENT_FACTORS, spec.n_numeric))
+        values = factors @ loadings + rng.standard_normal((spec.n_rows, spec.n_numeric))
+        for i in range(spec.n_numeric):
+            column = values[:, i] * 10.0
+            if i % INTEGER_COLUMN_EVERY == INTEGER_COLUMN_EVERY - 1:
+                column = np.round(column)
+            else:
+                column = np.round(column, 4)
+            if spec.nan_rate:
+                column[rng.random(spec.n_rows) < spec.nan_rate] = np.nan
+            columns[f"liczba_{i + 1}"] = column
+
+    labels = np.array([f"kategoria_{i + 1}" for i in range(spec.n_categories)], dtype=object)
+    for i in range(spec.n_text):
+        columns[f"tekst_{i + 1}"] = labels[rng.integers(0, spec.n_categories, spec.n_rows)]
+
+    df = pd.DataFrame(columns, index=pd.RangeIndex(spec.n_rows, name='id'))
+    # Kolumny całkowite bez braków zapisujemy jako int (jak po wczytaniu z pliku)
+    for col in df.columns[:spec.n_numeric]:
+        if not df[col].isna().any() and np.array_equal(df[col], np.round(df[col])):
+            df[col] = df[col].astype(np.int64)
+    return df
+
+def write_csv(spec: SyntheticSpec, path: Union[str, Path], separator: str = ';') -> Path:
+    """
+    Zapisuje syntetyczny zbiór do pliku CSV w formacie oczekiwanym przez load_data
+    (nagłówek, pierwsza kolumna to indeks wierszy).
+    """
+    if spec.decimal_comma and separator == ',':
+        raise ValueError("Przy przecinku dziesiętnym separatorem kolumn nie może być przecinek.")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    generate_dataframe(spec).to_csv(path, sep=separator, decimal=',' if spec.decimal_comma else '.')
+    return path
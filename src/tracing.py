@@ -0,0 +1,213 @@
+# src/tracing.py
+
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from src.config import TRACE_MAX_SPANS
+
+@dataclass
+class SpanRecord:
+    """Pomiar pojedynczego etapu: czas rzeczywisty, czas procesora, szczyt pamięci i parametry."""
+    name: str
+    category: str
+    start: float  # czas rozpoczęcia (time.time, sekundy)
+    wall_seconds: float
+    cpu_seconds: float
+    peak_bytes: Optional[int]  # None, gdy pomiar pamięci jest wyłączony
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    pid: int = 0
+    tid: int = 0
+    depth: int = 0
+
+class _NullSpan:
+    """Etap, który niczego nie mierzy (śledzenie wyłączone) - wspólna instancja bez stanu."""
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """Aktywny pomiar etapu (menedżer kontekstu); `set` dopisuje parametry znane dopiero w trakcie."""
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, attrs: Dict[str, Any]):
+        self._tracer = tracer
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+        self.depth = 0
+        self._memory = False
+        self._base_memory = 0
+        self._child_peak = 0
+        self._owns_tracemalloc = False
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> 'Span':
+        stack = self._tracer._stack()
+        self.depth = len(stack)
+        if self._tracer.memory and not stack and not tracemalloc.is_tracing():
+            # Śledzenie alokacji tylko na czas mierzonych etapów - poza nimi nie spowalnia serwera
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        self._memory = self._tracer.memory and tracemalloc.is_tracing()
+        if self._memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack and stack[-1]._memory:
+                # Szczyt etapu nadrzędnego sprzed rozpoczęcia tego etapu (reset_peak go wymaże)
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak - stack[-1]._base_memory)
+            tracemalloc.reset_peak()
+            self._base_memory = current
+        stack.append(self)
+        self._start = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        peak_bytes = None
+        if self._memory and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes = max(peak - self._base_memory, self._child_peak, 0)
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+        stack = self._tracer._stack()
+        stack.pop()
+        if stack and stack[-1]._memory and peak_bytes is not None:
+            # Szczyt względem pamięci na początku etapu nadrzędnego
+            parent = stack[-1]
+            parent._child_peak = max(parent._child_peak, self._base_memory - parent._base_memory + peak_bytes)
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self._tracer._record(SpanRecord(
+            self.name, self.category, self._start, wall, cpu, peak_bytes,
+            {**self._tracer.tags, **self.attrs}, os.getpid(), threading.get_ident(), self.depth,
+        ))
+
+class Tracer:
+    """
+    Zbiór pomiarów etapów jednej sesji (ograniczony do TRACE_MAX_SPANS najnowszych).
+
+    Etapy są mierzone przez `span(...)` tylko wtedy, gdy tracer jest aktywny w bieżącym kontekście
+    (`activate`). Pomiar pamięci (tracemalloc, włączany na czas etapów najwyższego poziomu) jest
+    opcjonalny, bo spowalnia obliczenia; dotyczy całego procesu, więc przy równoległej pracy wielu
+    sesji jest przybliżony.
+    """
+
+    def __init__(self, memory: bool = False, max_spans: int = TRACE_MAX_SPANS):
+        self.memory = memory
+        self.tags: Dict[str, Any] = {}
+        self.spans: Deque[SpanRecord] = deque(maxlen=max_spans)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _record(self, record: SpanRecord) -> None:
+        with self._lock:
+            self.spans.append(record)
+
+    def span(self, name: str, category: str = '', **attrs: Any) -> Span:
+        return Span(self, name, category or name.split('.', 1)[0], attrs)
+
+    def activate(self) -> '_Activation':
+        """Ustawia tracer jako aktywny w bieżącym kontekście (menedżer kontekstu)."""
+        return _Activation(self)
+
+    def merge(self, records: Optional[Iterable[Dict[str, Any]]]) -> None:
+        """Dołącza pomiary zebrane w innym procesie (np. w zadaniu w tle)."""
+        for record in records or []:
+            self._record(SpanRecord(**record))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [asdict(record) for record in self.spans]
+
+    def to_json(self) -> str:
+        return json.dumps({'tags': self.tags, 'spans': self.records()}, ensure_ascii=False, indent=2, default=str)
+
+    def to_chrome_trace(self) -> str:
+        """Pomiary w formacie Chrome Trace Event (chrome://tracing, Perfetto)."""
+        events = [{
+            'name': record['name'],
+            'cat': record['category'],
+            'ph': 'X',
+            'ts': record['start'] * 1e6,
+            'dur': record['wall_seconds'] * 1e6,
+            'pid': record['pid'],
+            'tid': record['tid'],
+            'args': {**record['attrs'], 'cpu_ms': record['cpu_seconds'] * 1e3,
+                     'peak_mb': record['peak_bytes'] / 2**20 if record['peak_bytes'] is not None else None},
+        } for record in self.records()]
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, ensure_ascii=False, default=str)
+
+_active_tracer: contextvars.ContextVar[Optional[Tracer]] = contextvars.ContextVar('active_tracer', default=None)
+
+class _Activation:
+    def __init__(self, tracer: Optional[Tracer]):
+        self._tracer = tracer
+
+    def __enter__(self) -> Optional[Tracer]:
+        self._token = _active_tracer.set(self._tracer)
+        return self._tracer
+
+    def __exit__(self, *exc) -> None:
+        _active_tracer.reset(self._token)
+
+def set_active_tracer(tracer: Optional[Tracer]) -> None:
+    """
+    Ustawia (lub wyłącza, dla None) tracer bieżącego wątku bez przywracania poprzedniego -
+    dla skryptu Streamlit, który przy każdym uruchomieniu ustawia tracer swojej sesji.
+    """
+    _active_tracer.set(tracer)
+
+def active_tracer() -> Optional[Tracer]:
+    return _active_tracer.get()
+
+def span(name: str, category: str = '', **attrs: Any):
+    """
+    Mierzy etap o nazwie `name` (np. 'load.parse') z parametrami `attrs`, jeśli w bieżącym kontekście
+    jest aktywny tracer. W przeciwnym razie zwraca wspólny pusty pomiar - koszt to jedno odczytanie ContextVar.
+    """
+    tracer = _active_tracer.get()
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, category, **attrs)
+
+def summarize(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Podsumowanie pomiarów według nazwy etapu: liczba, łączny i średni czas, maksymalny szczyt pamięci."""
+    summary: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        item = summary.setdefault(record['name'], {'etap': record['name'], 'liczba': 0, 'czas [s]': 0.0,
+                                                   'CPU [s]': 0.0, 'maks. pamięć [MB]': None})
+        item['liczba'] += 1
+        item['czas [s]'] += record['wall_seconds']
+        item['CPU [s]'] += record['cpu_seconds']
+        if record['peak_bytes'] is not None:
+            item['maks. pamięć [MB]'] = max(item['maks. pamięć [MB]'] or 0.0, record['peak_bytes'] / 2**20)
+    for item in summary.values():
+        item['średnio [s]'] = item['czas [s]'] / item['liczba']
+    return sorted(summary.values(), key=lambda item: item['czas [s]'], reverse=True)
@@ -1,28 +1,494 @@
 # src/visualizer.py
 
+import weakref
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
 from plotly.graph_objects import Figure
-from typing import Dict
+from typing import Any, Dict, List, Optional, Tuple
 
-# Mapowanie nazw wykresów na funkcje z plotly.express
+from src.tracing import span
+
+# Mapowanie nazw wykresów na funkcje z plotly.express (moduł jest importowany przy pierwszym wykresie)
 PLOT_MAPPING = {
-    'Histogram': px.histogram,
-    'Wykres punktowy': px.scatter,
-    'Wykres słupkowy': px.bar,
-    'Wykres liniowy': px.line,
-    'Wykres pudełkowy': px.box,
-    'Mapa ciepła': px.imshow
+    'Histogram': 'histogram',
+    'Wykres punktowy': 'scatter',
+    'Wykres słupkowy': 'bar',
+    'Wykres liniowy': 'line',
+    'Wykres pudełkowy': 'box',
+    'Mapa ciepła': 'imshow'
+}
+
+# Powyżej tej liczby punktów wykresy punktowe i liniowe są rysowane przez WebGL
+WEBGL_THRESHOLD = 5_000
+# Powyżej tej liczby punktów dane są agregowane po stronie serwera
+AGGREGATION_THRESHOLD = 200_000
+# Rozdzielczość siatki gęstości dla zagregowanego wykresu punktowego
+DENSITY_BINS = 300
+# Maksymalna liczba punktów serii po próbkowaniu LTTB
+LINE_MAX_POINTS = 5_000
+# Funkcje agregujące wykresów słupkowych i liniowych (etykieta w interfejsie -> nazwa funkcji w pandas)
+AGGREGATIONS = {'suma': 'sum', 'średnia': 'mean', 'liczba': 'count', 'mediana': 'median'}
+# Powyżej tej liczby różnych wartości liczbowa lub czasowa oś X jest dzielona na przedziały przed agregacją
+AGGREGATE_MAX_GROUPS = 1_000
+# Liczba przedziałów (równej szerokości) osi X przy agregacji
+AGGREGATE_X_BINS = 500
+
+# Maksymalna liczba przedziałów histogramu
+HISTOGRAM_MAX_BINS = 100
+# Maksymalna liczba grup koloru; rzadsze wartości są łączone w grupę 'inne'
+MAX_COLOR_GROUPS = 20
+# Maksymalna liczba punktów odstających pokazywanych dla jednej grupy wykresu pudełkowego
+BOX_MAX_OUTLIERS = 500
+OTHER_GROUP_LABEL = 'inne'
+# Maksymalna liczba punktów jednego panelu porównania osadzeń (ta sama próbka wierszy we wszystkich panelach)
+EMBEDDING_GRID_MAX_POINTS = 20_000
+# Liczba paneli w jednym wierszu porównania osadzeń
+EMBEDDING_GRID_COLUMNS = 3
+
+# Opisy trybów renderowania (zapisywane w fig.layout.meta['render_mode'])
+RENDER_MODES = {
+    'svg': 'pełne dane (SVG)',
+    'webgl': 'pełne dane (WebGL)',
+    'density': 'agregacja gęstości 2D',
+    'sampled': 'losowa próbka punktów (WebGL)',
+    'lttb': 'próbkowanie LTTB (WebGL)',
+    'grouped': 'agregacja grup po stronie serwera',
 }
 
-def create_plot(df: pd.DataFrame, plot_type: str, plot_params: Dict) -> Figure:
+def _express():
+    """plotly.express - import odroczony do pierwszego wykresu (skraca start serwera)."""
+    import plotly.express as px
+    return px
+
+def _set_render_info(fig: Figure, mode: str, n_points: int, n_rendered: int, note: Optional[str] = None) -> Figure:
+    """Zapisuje w figurze informację o użytym trybie renderowania (wyświetlaną w aplikacji)."""
+    meta = {'render_mode': mode, 'n_points': int(n_points), 'n_rendered': int(n_rendered)}
+    if note:
+        meta['note'] = note
+    fig.update_layout(meta=meta)
+    return fig
+
+class _FrameCache:
+    """
+    Pamięć podręczna wyników pośrednich powiązana z konkretnym obiektem ramki danych.
+    Wpisy znikają razem z ramką, więc zmodyfikowane dane (nowy obiekt) nigdy nie trafią na stary wynik.
+    """
+
+    def __init__(self):
+        self._entries: Dict[int, Tuple[weakref.ref, Dict[Any, Any]]] = {}
+
+    def for_frame(self, df: pd.DataFrame) -> Dict[Any, Any]:
+        key = id(df)
+        entry = self._entries.get(key)
+        if entry is None or entry[0]() is not df:
+            ref = weakref.ref(df, lambda _, key=key: self._entries.pop(key, None))
+            entry = (ref, {})
+            self._entries[key] = entry
+        return entry[1]
+
+_frame_cache = _FrameCache()
+
+def column_bin_edges(df: pd.DataFrame, column: str, max_bins: int = HISTOGRAM_MAX_BINS,
+                     cache: Optional[Dict[Any, Any]] = None) -> np.ndarray:
+    """
+    Wyznacza granice przedziałów histogramu dla kolumny numerycznej (reguła 'auto' z NumPy,
+    ograniczona do `max_bins`). Wynik jest zapamiętywany w `cache` (domyślnie: dla danej ramki w bieżącym procesie),
+    więc zmiana grupowania kolorem nie wymaga ponownego przeglądania danych.
+    """
+    cache = _frame_cache.for_frame(df) if cache is None else cache
+    key = ('bin_edges', column, max_bins)
+    if key not in cache:
+        values = _to_numeric_axis(df[column])
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            raise ValueError(f"Kolumna '{column}' nie zawiera wartości liczbowych.")
+        edges = np.histogram_bin_edges(values, bins='auto')
+        if len(edges) - 1 > max_bins:
+            edges = np.linspace(values.min(), values.max(), max_bins + 1)
+        cache[key] = edges
+    return cache[key]
+
+def _color_groups(df: pd.DataFrame, color: Optional[str]) -> List[Tuple[str, np.ndarray]]:
+    """
+    Dzieli wiersze na grupy według kolumny koloru i zwraca pary (etykieta, pozycje wierszy).
+    Najliczniejsze grupy są zachowane, pozostałe łączone w grupę 'inne'.
+    """
+    if color is None:
+        return [('', np.arange(len(df)))]
+
+    codes, uniques = pd.factorize(df[color], sort=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    order = np.argsort(-counts, kind='stable')
+    kept = np.sort(order[:MAX_COLOR_GROUPS])
+
+    groups = [(str(uniques[code]), np.flatnonzero(codes == code)) for code in kept]
+    rest = np.flatnonzero(~np.isin(codes, kept) & (codes >= 0))
+    if rest.size:
+        groups.append((OTHER_GROUP_LABEL, rest))
+    return groups
+
+def _group_color(i: int) -> str:
+    palette = _express().colors.qualitative.Plotly
+    return palette[i % len(palette)]
+
+def _histogram_figure(df: pd.DataFrame, x: str, color: Optional[str], title: Optional[str],
+                      cache: Optional[Dict[Any, Any]] = None) -> Figure:
+    """Histogram ze zliczeń policzonych w NumPy (go.Bar) zamiast surowych wartości w figurze."""
+    groups = _color_groups(df, color)
+    column = df[x]
+    fig = go.Figure()
+
+    if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column) \
+            or pd.api.types.is_datetime64_any_dtype(column):
+        edges = column_bin_edges(df, x, cache=cache)
+        values = _to_numeric_axis(column)
+        centers, widths = (edges[:-1] + edges[1:]) / 2, np.diff(edges)
+        if pd.api.types.is_datetime64_any_dtype(column):
+            centers = pd.to_datetime(centers.astype(np.int64))
+            widths = widths / 1e6  # Szerokość osi dat w milisekundach
+        for i, (label, rows) in enumerate(groups):
+            counts, _ = np.histogram(values[rows], bins=edges)
+            fig.add_trace(go.Bar(x=centers, y=counts, width=widths, name=label or x, marker_color=_group_color(i),
+                                 showlegend=color is not None))
+        fig.update_layout(bargap=0)
+    else:
+        # Kolumna kategoryczna - zliczenia wartości w każdej grupie
+        for i, (label, rows) in enumerate(groups):
+            counts = column.iloc[rows].value_counts(sort=False)
+            counts = counts[counts > 0]
+            fig.add_trace(go.Bar(x=counts.index.astype(str), y=counts.to_numpy(), name=label or x,
+                                 marker_color=_group_color(i), showlegend=color is not None))
+
+    fig.update_layout(title=title, barmode='relative', xaxis_title=x, yaxis_title='count', legend_title_text=color)
+    return fig
+
+def _box_figure(df: pd.DataFrame, y: str, color: Optional[str], title: Optional[str]) -> Figure:
+    """
+    Wykres pudełkowy z kwartyli, wąsów (1.5 IQR) i próbki punktów odstających
+    policzonych w NumPy dla każdej grupy koloru.
+    """
+    values = df[y].to_numpy(dtype=np.float64)
+    rng = np.random.default_rng(42)
+    fig = go.Figure()
+
+    for i, (label, rows) in enumerate(_color_groups(df, color)):
+        group = values[rows]
+        group = group[np.isfinite(group)]
+        if group.size == 0:
+            continue
+        q1, median, q3 = np.percentile(group, [25, 50, 75])
+        iqr = q3 - q1
+        # Wąsy sięgają do najdalszej obserwacji w granicy 1.5 IQR (jak w Plotly)
+        inside = group[(group >= q1 - 1.5 * iqr) & (group <= q3 + 1.5 * iqr)]
+        lower, upper = inside.min(), inside.max()
+        outliers = group[(group < lower) | (group > upper)]
+        if outliers.size > BOX_MAX_OUTLIERS:
+            outliers = rng.choice(outliers, BOX_MAX_OUTLIERS, replace=False)
+
+        name = label or y
+        fig.add_trace(go.Box(
+            x=[name], q1=[q1], median=[median], q3=[q3], lowerfence=[lower], upperfence=[upper],
+            name=name, marker_color=_group_color(i), showlegend=color is not None,
+        ))
+        if outliers.size:
+            fig.add_trace(go.Scatter(
+                x=[name] * outliers.size, y=outliers, mode='markers', name=name,
+                marker={'color': _group_color(i), 'size': 4}, showlegend=False,
+            ))
+
+    fig.update_layout(title=title, yaxis_title=y, legend_title_text=color)
+    return fig
+
+def describe_render_mode(fig: Figure) -> Optional[str]:
+    """Zwraca czytelny opis trybu renderowania wykresu lub None, jeśli figura go nie zawiera."""
+    meta = fig.layout.meta
+    if not isinstance(meta, dict) or 'render_mode' not in meta:
+        return None
+    description = f"Tryb renderowania: {RENDER_MODES.get(meta['render_mode'], meta['render_mode'])}"
+    if meta['n_rendered'] != meta['n_points']:
+        description += f" - narysowano {meta['n_rendered']:,} elementów dla {meta['n_points']:,} punktów danych"
+    if meta.get('note'):
+        description += f". {meta['note']}"
+    return description
+
+def _to_numeric_axis(values: pd.Series) -> np.ndarray:
+    """Zamienia oś (liczby lub daty) na tablicę float do obliczeń."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    return values.to_numpy(dtype=np.float64)
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Wybiera indeksy punktów algorytmem Largest-Triangle-Three-Buckets, który zachowuje
+    kształt serii (ekstrema) przy redukcji do `n_out` punktów. Zakłada posortowane x.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    bucket_edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = bucket_edges[i], bucket_edges[i + 1]
+        next_end = bucket_edges[i + 2] if i + 2 < len(bucket_edges) else n
+        # Punkt odniesienia: średnia następnego kubełka
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        # Pole trójkąta (poprzedni wybrany, kandydat, średnia następnego kubełka)
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area)) if end > start else start
+        selected[i + 1] = previous
+    return selected
+
+def _density_scatter(df: pd.DataFrame, x: str, y: str, color: Optional[str], title: Optional[str]) -> Figure:
+    """Rysuje wykres punktowy jako siatkę gęstości (lub średniej wartości kolumny koloru) w kubełkach 2D."""
+    x_values, y_values = _to_numeric_axis(df[x]), _to_numeric_axis(df[y])
+    counts, x_edges, y_edges = np.histogram2d(x_values, y_values, bins=DENSITY_BINS)
+    note = None
+    if color is not None and pd.api.types.is_numeric_dtype(df[color]):
+        sums, _, _ = np.histogram2d(x_values, y_values, bins=[x_edges, y_edges], weights=df[color].to_numpy(dtype=np.float64))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = sums / counts
+        colorbar_title = f"średnia {color}"
+    else:
+        z = counts
+        colorbar_title = "liczba punktów"
+        if color is not None:
+            note = f"Kolorowanie według '{color}' pominięto w trybie agregacji."
+    z = np.where(counts > 0, z, np.nan).T  # Puste kubełki pozostają przezroczyste
+
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=z,
+        colorscale='Viridis',
+        colorbar={'title': {'text': colorbar_title}},
+    ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return _set_render_info(fig, 'density', len(df), int((counts > 0).sum()), note)
+
+def _large_scatter(df: pd.DataFrame, plot_params: Dict) -> Figure:
+    """Wykres punktowy dla dużej liczby punktów: WebGL, a powyżej progu agregacja po stronie serwera."""
+    x, y, color = plot_params.get('x'), plot_params.get('y'), plot_params.get('color')
+    used_columns = [c for c in (x, y, color) if c is not None]
+    data = df[list(dict.fromkeys(used_columns))].dropna(subset=[c for c in (x, y) if c is not None])
+    n_points = len(data)
+
+    if n_points <= AGGREGATION_THRESHOLD:
+        fig = _express().scatter(df, render_mode='webgl', **plot_params)
+        return _set_render_info(fig, 'webgl', n_points, n_points)
+
+    numeric_axes = all(
+        pd.api.types.is_numeric_dtype(data[c]) or pd.api.types.is_datetime64_any_dtype(data[c])
+        for c in (x, y) if c is not None
+    )
+    if x is not None and y is not None and numeric_axes:
+        return _density_scatter(data, x, y, color, plot_params.get('title'))
+
+    # Osi kategorycznych nie da się zagregować w siatkę - rysujemy losową próbkę punktów
+    sample = data.sample(n=AGGREGATION_THRESHOLD, random_state=42)
+    fig = _express().scatter(sample, render_mode='webgl', **plot_params)
+    return _set_render_info(fig, 'sampled', n_points, len(sample))
+
+def _large_line(df: pd.DataFrame, plot_params: Dict) -> Figure:
+    """Wykres liniowy dla dużej liczby punktów: WebGL, a powyżej progu próbkowanie LTTB każdej serii."""
+    x, y, color = plot_params.get('x'), plot_params.get('y'), plot_params.get('color')
+    n_points = len(df)
+
+    if n_points <= AGGREGATION_THRESHOLD or y is None:
+        fig = _express().line(df, render_mode='webgl', **plot_params)
+        return _set_render_info(fig, 'webgl', n_points, n_points)
+
+    columns = [c for c in dict.fromkeys((x, y, color)) if c is not None]
+    if x is None:
+        # Bez kolumny X oś tworzy indeks - przenosimy go do kolumny, aby próbkować razem z danymi
+        data = df[columns].reset_index()
+        x_name = data.columns[0]
+    else:
+        data = df[columns]
+        x_name = x
+    data = data.dropna(subset=[y])
+
+    numeric_x = pd.api.types.is_numeric_dtype(data[x_name]) or pd.api.types.is_datetime64_any_dtype(data[x_name])
+    groups = data.groupby(color, observed=True, sort=False) if color is not None else [(None, data)]
+    sampled = []
+    for _, group in groups:
+        if numeric_x:
+            group = group.sort_values(x_name, kind='stable')
+            x_values = _to_numeric_axis(group[x_name])
+        else:
+            x_values = np.arange(len(group), dtype=np.float64)
+        keep = lttb_indices(x_values, group[y].to_numpy(dtype=np.float64), LINE_MAX_POINTS)
+        sampled.append(group.iloc[keep])
+    sampled = pd.concat(sampled)
+
+    line_params = dict(plot_params, x=x_name)
+    fig = _express().line(sampled, render_mode='webgl', **line_params)
+    return _set_render_info(fig, 'lttb', n_points, len(sampled))
+
+def _aggregate_x(data: pd.DataFrame, x: str) -> Tuple[Any, Optional[int]]:
+    """
+    Klucz grupowania dla osi X: same wartości lub - dla liczbowej albo czasowej osi z dużą liczbą
+    różnych wartości - środki przedziałów równej szerokości. Zwraca (klucz, liczba przedziałów lub None).
+    """
+    column = data[x]
+    numeric_x = pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column) \
+        or pd.api.types.is_datetime64_any_dtype(column)
+    if not numeric_x or column.nunique() <= AGGREGATE_MAX_GROUPS:
+        return column, None
+
+    values = _to_numeric_axis(column)
+    valid = column.notna().to_numpy() & np.isfinite(values)
+    edges = np.linspace(values[valid].min(), values[valid].max(), AGGREGATE_X_BINS + 1)
+    codes = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, AGGREGATE_X_BINS - 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+    binned = np.where(valid, centers[codes], np.nan)
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return pd.Series(pd.to_datetime(binned), index=data.index, name=x), AGGREGATE_X_BINS
+    return pd.Series(binned, index=data.index, name=x), AGGREGATE_X_BINS
+
+def _aggregate(df: pd.DataFrame, x: Optional[str], y: Optional[str], color: Optional[str], agg: str) -> Tuple[pd.DataFrame, Optional[int]]:
+    if x is None:
+        # Bez kolumny X oś tworzy indeks - przenosimy go do kolumny, aby grupować razem z danymi
+        data = df[[c for c in dict.fromkeys((y, color)) if c is not None]].reset_index()
+        x = data.columns[0]
+    else:
+        data = df
+    x_key, n_bins = _aggregate_x(data, x)
+    keys = [x_key.rename(x)]
+    if color is not None and color != x:
+        # Rzadkie wartości koloru są łączone w grupę 'inne', jak na pozostałych wykresach
+        labels = np.full(len(data), None, dtype=object)
+        for label, rows in _color_groups(data, color):
+            labels[rows] = label
+        keys.append(pd.Series(labels, index=data.index, name=color))
+
+    grouped = data.groupby(keys, observed=True, sort=True, dropna=True)
+    values = grouped.size() if y is None else grouped[y].agg(agg)
+    result = values.index.to_frame(index=False)
+    # Kolumna wartości nie może zastąpić kolumny osi X lub koloru (np. ta sama kolumna na obu osiach)
+    name = 'count' if y is None else y
+    result[name if name not in result.columns else f"{agg}({name})"] = values.to_numpy()
+    return result, n_bins
+
+def aggregate_frame(df: pd.DataFrame, x: Optional[str], y: Optional[str], color: Optional[str], agg: str,
+                    cache: Optional[Dict[Any, Any]] = None) -> Tuple[pd.DataFrame, Optional[int]]:
+    """
+    Grupuje wiersze według osi X (i kolumny koloru) i liczy funkcję `agg` ('sum', 'mean', 'count', 'median')
+    kolumny Y; bez kolumny Y zlicza wiersze. Liczbowa lub czasowa oś X z dużą liczbą różnych wartości
+    jest dzielona na przedziały. Wynik jest zapamiętywany w `cache` (domyślnie: dla danej ramki),
+    więc zmiana tytułu lub ponowne wygenerowanie wykresu nie przelicza grup.
+
+    Returns:
+        (ramka z kolumnami osi X, koloru i wartości, liczba przedziałów osi X lub None)
+    """
+    if agg not in AGGREGATIONS.values():
+        raise ValueError(f"Nieznana funkcja agregująca: '{agg}'")
+    if y is None and agg != 'count':
+        raise ValueError(f"Funkcja agregująca '{agg}' wymaga kolumny osi Y.")
+    cache = _frame_cache.for_frame(df) if cache is None else cache
+    key = ('aggregate', x, y, color, agg)
+    if key not in cache:
+        with span('plot.aggregate', rows=len(df), agg=agg) as stage:
+            cache[key] = _aggregate(df, x, y, color, agg)
+            stage.set(groups=len(cache[key][0]), bins=cache[key][1])
+    return cache[key]
+
+def _aggregated_figure(df: pd.DataFrame, plot_type: str, plot_params: Dict, agg: str,
+                       cache: Optional[Dict[Any, Any]] = None, note: Optional[str] = None) -> Figure:
+    """Wykres słupkowy lub liniowy z wartości zagregowanych w grupach osi X (i koloru) - figura nie zawiera surowych wierszy."""
+    x, y, color = plot_params.pop('x', None), plot_params.pop('y', None), plot_params.pop('color', None)
+    grouped, n_bins = aggregate_frame(df, x, y, color, agg, cache)
+    x_name, value = grouped.columns[0], grouped.columns[-1]
+    labels = {value: f"{agg}({y})"} if value == y else {}
+    color = color if color in grouped.columns[1:-1] else None
+
+    if plot_type == 'Wykres słupkowy':
+        # Średnich i median nie sumujemy w stosie - słupki grup stoją obok siebie
+        barmode = 'relative' if agg in ('sum', 'count') else 'group'
+        fig = _express().bar(grouped, x=x_name, y=value, color=color, labels=labels, barmode=barmode, **plot_params)
+    else:
+        render_mode = 'webgl' if len(grouped) > WEBGL_THRESHOLD else 'svg'
+        fig = _express().line(grouped, x=x_name, y=value, color=color, labels=labels, render_mode=render_mode, **plot_params)
+
+    notes = [note] if note else []
+    if n_bins is not None:
+        notes.append(f"Oś X podzielono na {n_bins} przedziałów równej szerokości.")
+    return _set_render_info(fig, 'grouped', len(df), len(grouped), ' '.join(notes) or None)
+
+def create_embedding_grid(
+    panels: List[Tuple[str, Optional[np.ndarray]]],
+    color_values: Optional[pd.Series] = None,
+    color: Optional[str] = None,
+    title: Optional[str] = None,
+) -> Figure:
+    """
+    Rysuje osadzenia 2D tych samych wierszy obok siebie ('small multiples'), po jednym panelu na
+    parę (tytuł, osadzenie). Wszystkie panele pokazują tę samą losową próbkę wierszy i te same kolory grup,
+    więc można porównać, jak metody rozmieszczają te same punkty. Panel bez osadzenia (None) pozostaje pusty.
+    """
+    from plotly.subplots import make_subplots
+
+    n_points = max((len(embedding) for _, embedding in panels if embedding is not None), default=0)
+    if n_points > EMBEDDING_GRID_MAX_POINTS:
+        positions = np.sort(np.random.default_rng(42).choice(n_points, EMBEDDING_GRID_MAX_POINTS, replace=False))
+    else:
+        positions = np.arange(n_points)
+    if color is not None and color_values is not None:
+        groups = _color_groups(pd.DataFrame({color: np.asarray(color_values)[positions]}), color)
+    else:
+        groups = _color_groups(pd.DataFrame(index=pd.RangeIndex(len(positions))), None)
+
+    n_cols = min(EMBEDDING_GRID_COLUMNS, max(1, len(panels)))
+    n_rows = -(-len(panels) // n_cols)
+    fig = make_subplots(rows=n_rows, cols=n_cols, subplot_titles=[panel_title for panel_title, _ in panels])
+    legend_shown = False
+    for i, (_, embedding) in enumerate(panels):
+        if embedding is None:
+            continue
+        points = np.asarray(embedding)[positions]
+        for g, (label, group_positions) in enumerate(groups):
+            fig.add_trace(go.Scattergl(
+                x=points[group_positions, 0], y=points[group_positions, 1], mode='markers',
+                marker={'size': 3, 'color': _group_color(g)}, name=label, legendgroup=label,
+                showlegend=color is not None and not legend_shown,
+            ), row=i // n_cols + 1, col=i % n_cols + 1)
+        legend_shown = True
+    fig.update_xaxes(showticklabels=False)
+    fig.update_yaxes(showticklabels=False)
+    fig.update_layout(title=title, height=320 * n_rows, legend_title_text=color)
+    n_panels = sum(embedding is not None for _, embedding in panels)
+    mode = 'webgl' if len(positions) == n_points else 'sampled'
+    return _set_render_info(fig, mode, n_points * n_panels, len(positions) * n_panels)
+
+def create_plot(df: pd.DataFrame, plot_type: str, plot_params: Dict,
+                cache: Optional[Dict[Any, Any]] = None) -> Figure:
     """
     Tworzy wykres dynamicznie na podstawie przekazanych parametrów.
+    Wykresy punktowe i liniowe z dużą liczbą punktów są rysowane przez WebGL lub agregowane
+    po stronie serwera; użyty tryb jest zapisany w fig.layout.meta['render_mode'].
+    Parametr 'agg' wykresów słupkowych i liniowych (np. 'sum') rysuje wartości zagregowane w grupach osi X;
+    `cache` to pamięć podręczna wyników pośrednich (grup agregacji, granic przedziałów histogramu) - słownik
+    należący do węzła potoku, przekazywany także do procesów roboczych; domyślnie powiązana z ramką `df` w bieżącym procesie.
     """
-    plot_function = PLOT_MAPPING.get(plot_type)
-    if not plot_function:
+    with span('plot.build', plot_type=plot_type, rows=len(df)) as stage:
+        fig = _build_plot(df, plot_type, plot_params, cache)
+        meta = fig.layout.meta
+        stage.set(traces=len(fig.data), render_mode=meta.get('render_mode') if isinstance(meta, dict) else None)
+    return fig
+
+def _build_plot(df: pd.DataFrame, plot_type: str, plot_params: Dict, cache: Optional[Dict[Any, Any]] = None) -> Figure:
+    if plot_type not in PLOT_MAPPING:
         raise ValueError(f"Nieznany typ wykresu: '{plot_type}'")
-        
+    px = _express()
+    plot_function = getattr(px, PLOT_MAPPING[plot_type])
+
     # Obsługa specjalnego przypadku dla mapy ciepła
     if plot_type == 'Mapa ciepła':
         corr_df = plot_params.pop('corr_df', None)
@@ -30,6 +496,35 @@ def create_plot(df: pd.DataFrame, plot_type: str, plot_params: Dict) -> Figure:
             raise ValueError("Dla mapy ciepła wymagany jest parametr 'corr_df'.")
         return px.imshow(corr_df, text_auto=True, aspect="auto", **plot_params)
 
+    # Histogram i wykres pudełkowy są budowane z podsumowań - rozmiar figury zależy od liczby przedziałów i grup
+    if plot_type == 'Histogram':
+        if plot_params.get('x') is None:
+            raise ValueError("Dla histogramu wymagany jest parametr 'x'.")
+        return _histogram_figure(df, plot_params['x'], plot_params.get('color'), plot_params.get('title'), cache)
+    if plot_type == 'Wykres pudełkowy':
+        if plot_params.get('y') is None:
+            raise ValueError("Dla wykresu pudełkowego wymagany jest parametr 'y'.")
+        return _box_figure(df, plot_params['y'], plot_params.get('color'), plot_params.get('title'))
+
+    # Wykresy słupkowe i liniowe z agregacją rysują tylko wartości grup
+    plot_params = dict(plot_params)
+    agg = plot_params.pop('agg', None)
+    if plot_type in ('Wykres słupkowy', 'Wykres liniowy'):
+        if agg is not None:
+            return _aggregated_figure(df, plot_type, plot_params, agg, cache)
+        if plot_type == 'Wykres słupkowy' and len(df) > AGGREGATION_THRESHOLD:
+            # Plotly rysowałby osobny segment słupka dla każdego wiersza
+            note = "Bez wybranej agregacji wartości zsumowano w grupach osi X."
+            return _aggregated_figure(df, plot_type, plot_params, 'sum', cache, note)
+
+    if len(df) > WEBGL_THRESHOLD:
+        if plot_type == 'Wykres punktowy':
+            return _large_scatter(df, plot_params)
+        if plot_type == 'Wykres liniowy':
+            return _large_line(df, plot_params)
+
     # Dynamiczne tworzenie wykresu z przekazanych parametrów (np. x, y, color)
     fig = plot_function(df, **plot_params)
-    return fig
\ No newline at end of file
+    if plot_type in ('Wykres punktowy', 'Wykres liniowy'):
+        _set_render_info(fig, 'svg', len(df), len(df))
+    return fig
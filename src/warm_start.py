@@ -0,0 +1,58 @@
+# src/warm_start.py
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Optional
+
+from src.landmarks import knn_interpolate
+
+# Liczba sąsiadów (w przestrzeni cech), z których położeń wyznaczane jest położenie początkowe nowego wiersza
+SEED_NEIGHBORS = 10
+# Minimalny odsetek wierszy obecnych w poprzednim osadzeniu, przy którym start od niego ma sens
+MIN_OVERLAP = 0.5
+# Odchylenie dodatkowych wymiarów (gdy nowe osadzenie ma ich więcej) względem odchylenia istniejących
+PADDING_SCALE = 1e-2
+
+@dataclass
+class PreviousEmbedding:
+    """Ostatnie osadzenie w linii danych (historii modyfikacji): etykiety wierszy i ich położenia."""
+    index: pd.Index
+    embedding: np.ndarray
+    method: str
+
+    @classmethod
+    def from_frame(cls, reduced_df: pd.DataFrame, method: str) -> 'PreviousEmbedding':
+        """Zapamiętuje osadzenie z wyniku reduce_dimensions (kolumny 'Komponent_*')."""
+        columns = [col for col in reduced_df.columns if str(col).startswith('Komponent_')]
+        return cls(reduced_df.index, reduced_df[columns].to_numpy(dtype=np.float32), method)
+
+def initial_layout(previous: PreviousEmbedding, index: pd.Index, scaled_data: np.ndarray, n_components: int,
+                   random_state: int = 42) -> Optional[np.ndarray]:
+    """
+    Wyznacza położenia początkowe dla nowego dopasowania: wiersze obecne w poprzednim osadzeniu zachowują
+    swoje położenia, a nowe wiersze są umieszczane interpolacją k najbliższych sąsiadów spośród nich
+    (w przestrzeni znormalizowanych cech). Nadmiarowe wymiary są obcinane, brakujące - wypełniane małym szumem.
+
+    Returns:
+        Macierz (len(index), n_components) lub None, gdy za mało wierszy pokrywa się z poprzednim osadzeniem.
+    """
+    if not previous.index.is_unique or not index.is_unique or len(index) != len(scaled_data):
+        return None
+    positions = previous.index.get_indexer(index)
+    persisting = positions >= 0
+    if persisting.mean() < MIN_OVERLAP:
+        return None
+
+    coords = previous.embedding[positions[persisting], :n_components].astype(np.float64)
+    if coords.shape[1] < n_components:
+        rng = np.random.default_rng(random_state)
+        scale = PADDING_SCALE * float(coords.std()) or PADDING_SCALE
+        padding = rng.normal(scale=scale, size=(len(coords), n_components - coords.shape[1]))
+        coords = np.hstack([coords, padding])
+
+    init = np.empty((len(index), n_components), dtype=np.float64)
+    init[persisting] = coords
+    if not persisting.all():
+        init[~persisting] = knn_interpolate(scaled_data[persisting], coords, scaled_data[~persisting], k=SEED_NEIGHBORS)
+    return init
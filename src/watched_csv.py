@@ -0,0 +1,223 @@
+# src/watched_csv.py
+
+import io
+import os
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Optional, Tuple
+
+from src.data_loader import CHUNK_ROWS, SNIFF_SAMPLE_BYTES, convert_like, detect_and_convert_numeric, read_csv_data, sniff_csv_format
+from src.tracing import span
+
+class _BoundedReader(io.RawIOBase):
+    """Strumień pliku ograniczony do `limit` bajtów od bieżącej pozycji (parser nie wyjdzie poza pełne linie)."""
+
+    def __init__(self, file: io.BufferedReader, limit: int):
+        self._file = file
+        self._remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), self._remaining)
+        if n <= 0:
+            return 0
+        data = self._file.read(n)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+def _line_end(file: io.BufferedReader, start: int, stop: int) -> int:
+    """
+    Pozycja tuż za ostatnim znakiem końca linii w zakresie [start, stop) pliku, czytając od końca
+    (zwykle jeden blok), lub `start`, jeśli w zakresie nie ma pełnej linii.
+    """
+    position = stop
+    while position > start:
+        block_start = max(start, position - SNIFF_SAMPLE_BYTES)
+        file.seek(block_start)
+        block = file.read(position - block_start)
+        newline = block.rfind(b'\n')
+        if newline >= 0:
+            return block_start + newline + 1
+        position = block_start
+    return start
+
+def _file_id(stat: os.stat_result) -> Tuple[int, int]:
+    return stat.st_dev, stat.st_ino
+
+# Minimalna pojemność (wiersze) tablic kolumn przy pierwszym powiększeniu bufora
+BUFFER_MIN_ROWS = 1024
+
+def _grow(values: np.ndarray, n_rows: int, capacity: int, dtype: np.dtype) -> np.ndarray:
+    """Nowa tablica o podanej pojemności i typie z przepisanymi pierwszymi `n_rows` wartościami."""
+    grown = np.empty(capacity, dtype=dtype)
+    grown[:n_rows] = values[:n_rows]
+    return grown
+
+def _codes_dtype(n_categories: int) -> np.dtype:
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+class FrameBuffer:
+    """
+    Ramka, do której dopisywane są wiersze bez kopiowania dotychczasowych: każda kolumna (i indeks) to tablica
+    NumPy z zapasem pojemności, powiększana dwukrotnie po zapełnieniu, a `frame` to ramka złożona z widoków
+    pierwszych `n_rows` wartości tych tablic. Koszt dopisania zależy od liczby nowych wierszy (zamortyzowany).
+    Wcześniej zwrócone ramki pozostają poprawne - dopisywanie zapisuje tylko wolną część tablic.
+
+    Kolumny kategoryczne są przechowywane jako kody; nowe wartości dostają nowe kategorie (zamiast zamiany
+    na tekst). Typ kolumny liczbowej jest poszerzany (jedyny przypadek kopiowania kolumny), jeśli nowe
+    wartości się w nim nie mieszczą - tak jak przy pd.concat.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.columns = frame.columns
+        self.index_name = frame.index.name
+        self.n_rows = len(frame)
+        self._index = frame.index.to_numpy()
+        self._values: Dict[str, np.ndarray] = {}
+        self._categories: Dict[str, pd.CategoricalDtype] = {}
+        for col in frame.columns:
+            series = frame[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                self._categories[col] = series.dtype
+                self._values[col] = series.cat.codes.to_numpy()
+            else:
+                self._values[col] = series.to_numpy()
+        self.frame = frame
+
+    def append(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Dopisuje wiersze (kolumny jak w ramce bufora) i zwraca ramkę ze wszystkimi wierszami."""
+        if len(rows) == 0:
+            return self.frame
+        stop = self.n_rows + len(rows)
+        self._index = self._put(self._index, rows.index.to_numpy(), stop)
+        for col in self.columns:
+            new = rows[col]
+            if col in self._categories:
+                dtype = self._categories[col]
+                added = pd.Index(new.dropna().unique()).difference(dtype.categories)
+                if len(added):
+                    dtype = self._categories[col] = pd.CategoricalDtype(dtype.categories.append(added), ordered=dtype.ordered)
+                codes = dtype.categories.get_indexer(new)
+                self._values[col] = self._put(self._values[col], codes.astype(_codes_dtype(len(dtype.categories))), stop)
+            else:
+                self._values[col] = self._put(self._values[col], new.to_numpy(), stop)
+        self.n_rows = stop
+        self.frame = self._view()
+        return self.frame
+
+    def _put(self, values: np.ndarray, new: np.ndarray, stop: int) -> np.ndarray:
+        """Zapisuje nowe wartości za dotychczasowymi, powiększając tablicę lub poszerzając jej typ w razie potrzeby."""
+        dtype = np.result_type(values.dtype, new.dtype)
+        if len(values) < stop or dtype != values.dtype:
+            capacity = len(values) if len(values) >= stop else max(2 * len(values), stop, BUFFER_MIN_ROWS)
+            values = _grow(values, self.n_rows, capacity, dtype)
+        values[self.n_rows:stop] = new
+        return values
+
+    def _view(self) -> pd.DataFrame:
+        data = {}
+        for col in self.columns:
+            values = self._values[col][:self.n_rows]
+            if col in self._categories:
+                values = pd.Categorical.from_codes(values, dtype=self._categories[col], validate=False)
+            data[col] = values
+        index = pd.Index(self._index[:self.n_rows], dtype=self._index.dtype, name=self.index_name, copy=False)
+        # Bez parametru columns - pandas wyrównywałby kolumny do listy (kopia kolumn kategorycznych)
+        frame = pd.DataFrame(data, index=index, copy=False)
+        frame.columns = self.columns
+        return frame
+
+class WatchedCsv:
+    """
+    Plik CSV na serwerze, do którego na bieżąco dopisywane są wiersze (np. zapis pomiarów).
+
+    Zapamiętuje przesunięcie (w bajtach) końca ostatniej sparsowanej linii; kolejne sprawdzenia parsują
+    tylko pełne linie dopisane od tego miejsca, z separatorami i typami kolumn ustalonymi przy pierwszym
+    wczytaniu. Koszt sprawdzenia zależy od ilości nowych danych, a nie od rozmiaru pliku.
+    Linia bez znaku końca jest traktowana jako niedokończona i czeka na kolejne sprawdzenie.
+    Wczytane wiersze są przechowywane w `buffer` (FrameBuffer), do którego dopisuje się wynik poll().
+    """
+
+    def __init__(self, path: str, separator: str, decimal: str, columns: pd.Index, dtypes: pd.Series,
+                 index_name: Optional[str], offset: int, file_id: Tuple[int, int], n_rows: int,
+                 buffer: Optional[FrameBuffer] = None):
+        self.path = path
+        self.separator = separator
+        self.decimal = decimal
+        self.columns = columns
+        self.dtypes = dtypes
+        self.index_name = index_name
+        self.offset = offset
+        self.file_id = file_id
+        self.n_rows = n_rows
+        self.buffer = buffer
+
+    @classmethod
+    def open(cls, path: str, separator: str = 'auto', decimal: str = 'auto',
+             progress_callback: Optional[Callable[[int], None]] = None) -> Tuple['WatchedCsv', pd.DataFrame]:
+        """
+        Wczytuje pełne linie pliku (jak read_data, bez pamięci podręcznej - plik się zmienia)
+        i zwraca obiekt obserwujący plik wraz z wczytaną ramką (przechowywaną w jego buforze).
+        """
+        separator, decimal = sniff_csv_format(path, separator, decimal)
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            offset = _line_end(f, 0, stat.st_size)
+            f.seek(0)
+            with span('load.parse', separator=separator, decimal=decimal, watched=True) as stage:
+                df = read_csv_data(io.BufferedReader(_BoundedReader(f, offset)), separator, decimal, progress_callback=progress_callback)
+                stage.set(rows=len(df), columns=len(df.columns), bytes=offset)
+        with span('load.convert_types', rows=len(df), columns=len(df.columns)):
+            df = detect_and_convert_numeric(df, decimal)
+        return cls(path, separator, decimal, df.columns, df.dtypes, df.index.name, offset, _file_id(stat), len(df), FrameBuffer(df)), df
+
+    def poll(self) -> Optional[pd.DataFrame]:
+        """
+        Sprawdza plik i zwraca wiersze z pełnych linii dopisanych od ostatniego sprawdzenia
+        (typy jak przy pierwszym wczytaniu) albo None, jeśli nic nie dopisano.
+        Zgłasza ValueError, gdy plik został skrócony lub zastąpiony innym - wtedy trzeba go wczytać od nowa.
+        """
+        stat = os.stat(self.path)
+        if _file_id(stat) != self.file_id or stat.st_size < self.offset:
+            raise ValueError("Plik został skrócony lub zastąpiony innym - wczytaj go ponownie.")
+        if stat.st_size == self.offset:
+            return None
+
+        with open(self.path, 'rb') as f:
+            end = _line_end(f, self.offset, stat.st_size)
+            if end == self.offset:
+                return None
+            f.seek(self.offset)
+            with span('load.poll', bytes=end - self.offset) as stage:
+                reader = pd.read_csv(
+                    io.BufferedReader(_BoundedReader(f, end - self.offset)),
+                    sep=self.separator,
+                    header=None,
+                    names=['__index__'] + self.columns.tolist(),
+                    index_col=0,
+                    decimal=self.decimal,
+                    encoding='utf-8',
+                    engine='c',
+                    chunksize=CHUNK_ROWS,
+                    # Kolumny tekstowe pozostają tekstem, nawet jeśli nowe wartości wyglądają na liczby
+                    dtype={col: str for col in self.columns if not pd.api.types.is_numeric_dtype(self.dtypes[col])},
+                )
+                with reader:
+                    chunks = [chunk for chunk in reader if len(chunk)]
+                if not chunks:
+                    # Same puste linie
+                    self.offset = end
+                    return None
+                rows = pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+                rows.index.name = self.index_name
+                rows = convert_like(rows, self.dtypes, self.decimal)
+                stage.set(rows=len(rows))
+        self.offset = end
+        self.n_rows += len(rows)
+        return rows
@@ -0,0 +1,21 @@
+# tests/conftest.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+@pytest.fixture
+def numeric_frame() -> pd.DataFrame:
+    """Ramka z kolumnami numerycznymi (z brakami) i jedną kategoryczną."""
+    rng = np.random.default_rng(0)
+    n = 1_000
+    df = pd.DataFrame({
+        'a': rng.normal(size=n),
+        'b': rng.normal(loc=5, scale=2, size=n),
+        'c': rng.integers(0, 100, size=n).astype(np.float64),
+        'grupa': rng.choice(['x', 'y', 'z'], size=n),
+    }, index=pd.RangeIndex(n, name='id'))
+    df['b'] += 0.5 * df['a']
+    df.loc[rng.choice(n, 50, replace=False), 'a'] = np.nan
+    df.loc[rng.choice(n, 80, replace=False), 'c'] = np.nan
+    return df
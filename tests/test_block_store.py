@@ -0,0 +1,57 @@
+# tests/test_block_store.py
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from src.block_store import BlockStore
+
+def _table(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.normal(size=(2_000, 4)), columns=list('abcd'))
+
+def test_spill_to_disk_and_restore(tmp_path):
+    store = BlockStore(max_bytes=40_000, spill_dir=tmp_path)
+    tables = [_table(seed) for seed in range(4)]
+    blocks = [store.add('dataframe', table, f'Tabela {i}') for i, table in enumerate(tables)]
+    store.add('message', 'komunikat', 'Komunikat')
+
+    # Tabela większa niż limit zostaje w pamięci tylko jako ostatnio dodana
+    assert [block.location for block in blocks] == ['disk', 'disk', 'disk', 'memory']
+    assert any(store.spill_dir.iterdir())
+    # Odczyt bloku z dysku przywraca go do pamięci (i wypiera inny)
+    pd.testing.assert_frame_equal(store.load(blocks[0].block_id), tables[0])
+    assert blocks[0].location == 'memory'
+    for block, table in zip(blocks, tables):
+        pd.testing.assert_frame_equal(store.load(block.block_id), table)
+
+def test_eviction_without_spill():
+    store = BlockStore(max_bytes=40_000, spill=False)
+    first = store.add('dataframe', _table(0), 'Tabela 0')
+    for seed in range(1, 4):
+        store.add('dataframe', _table(seed), f'Tabela {seed}')
+    assert first.location == 'evicted'
+    assert store.load(first.block_id) is None
+    assert len(store) == 4
+
+def test_plot_round_trip_and_remove(tmp_path):
+    store = BlockStore(spill_dir=tmp_path)
+    figure = go.Figure(go.Bar(x=['a', 'b'], y=[1, 2]), layout={'title': {'text': 'Wykres'}})
+    block = store.add('plot', figure, 'Wykres')
+    store._decoded.clear()  # wymuszenie dekodowania z postaci zwartej
+    loaded = store.load(block.block_id)
+    assert loaded.layout.title.text == 'Wykres'
+    assert list(loaded.data[0].x) == ['a', 'b']
+
+    store.remove(block.block_id)
+    assert len(store) == 0
+    assert store.memory_bytes == 0
+
+def test_replace_keeps_position(tmp_path):
+    store = BlockStore(spill_dir=tmp_path)
+    first = store.add('dataframe', _table(0), 'Tabela')
+    store.add('message', 'tekst', 'Komunikat')
+    assert store.replace(first.block_id, _table(1))
+    assert store.blocks[0].block_id == first.block_id
+    pd.testing.assert_frame_equal(store.load(first.block_id), _table(1))
+    assert not store.replace(12345, _table(1))
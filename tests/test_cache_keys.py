@@ -0,0 +1,60 @@
+# tests/test_cache_keys.py
+
+import numpy as np
+
+from src.embedding_cache import EmbeddingCache, fingerprint_matrix, make_embedding_key
+
+def test_embedding_key_depends_on_all_parts():
+    base = make_embedding_key('dane', 'UMAP', 2, {'n_neighbors': 15, 'random_state': 42})
+    assert base == make_embedding_key('dane', 'UMAP', 2, {'random_state': 42, 'n_neighbors': 15})
+    assert base != make_embedding_key('inne', 'UMAP', 2, {'n_neighbors': 15, 'random_state': 42})
+    assert base != make_embedding_key('dane', 't-SNE', 2, {'n_neighbors': 15, 'random_state': 42})
+    assert base != make_embedding_key('dane', 'UMAP', 3, {'n_neighbors': 15, 'random_state': 42})
+    assert base != make_embedding_key('dane', 'UMAP', 2, {'n_neighbors': 30, 'random_state': 42})
+
+def test_matrix_fingerprint_depends_on_content_shape_and_dtype():
+    matrix = np.arange(12, dtype=np.float64).reshape(3, 4)
+    assert fingerprint_matrix(matrix) == fingerprint_matrix(matrix.copy())
+    assert fingerprint_matrix(matrix) != fingerprint_matrix(matrix.reshape(4, 3))
+    assert fingerprint_matrix(matrix) != fingerprint_matrix(matrix.astype(np.float32))
+    changed = matrix.copy()
+    changed[2, 3] += 1e-9
+    assert fingerprint_matrix(matrix) != fingerprint_matrix(changed)
+
+def test_embedding_cache_lru_and_spill(tmp_path):
+    cache = EmbeddingCache(max_entries=1, spill_dir=tmp_path)
+    first, second = np.ones((3, 2)), np.zeros((3, 2))
+    cache.put('a', first)
+    cache.put('b', second)
+    # Wpis wyparty z pamięci wraca z dysku
+    np.testing.assert_array_equal(cache.get('a'), first)
+    assert cache.get('brak') is None
+
+def test_embedding_cache_writes_through_to_disk(tmp_path):
+    # Dwie instancje z tym samym katalogiem odpowiadają procesowi serwera i procesowi roboczemu zadania
+    worker, server = EmbeddingCache(spill_dir=tmp_path), EmbeddingCache(spill_dir=tmp_path)
+    embedding = np.arange(6, dtype=np.float64).reshape(3, 2)
+    worker.put('a', embedding)
+    np.testing.assert_array_equal(server.get('a'), embedding)
+
+def test_landmark_placement_changes_embedding_key(monkeypatch):
+    import src.data_modifier as data_modifier
+
+    class RecordingCache:
+        def __init__(self):
+            self.keys = []
+
+        def get(self, key):
+            self.keys.append(key)
+            return np.zeros((60, 2))
+
+    cache = RecordingCache()
+    monkeypatch.setattr(data_modifier, 'get_default_embedding_cache', lambda: cache)
+    scaled = np.random.default_rng(0).normal(size=(60, 3))
+    for placement in ['transform', 'knn']:
+        data_modifier.embed_scaled(scaled, 'UMAP', {'large_data': True, 'n_landmarks': 20, 'placement': placement})
+    # Bez punktów orientacyjnych sposób umieszczenia nie ma znaczenia
+    for placement in ['transform', 'knn']:
+        data_modifier.embed_scaled(scaled, 'UMAP', {'large_data': False, 'placement': placement})
+    assert cache.keys[0] != cache.keys[1]
+    assert cache.keys[2] == cache.keys[3]
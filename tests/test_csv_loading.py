@@ -0,0 +1,56 @@
+# tests/test_csv_loading.py
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_loader import _read_head, read_csv_data, sniff_csv_format
+
+def _csv_bytes(frame: pd.DataFrame, sep: str, decimal: str) -> bytes:
+    return frame.to_csv(sep=sep, decimal=decimal).encode('utf-8')
+
+def test_chunked_read_matches_single_read(numeric_frame):
+    raw = _csv_bytes(numeric_frame, ';', ',')
+    progress = []
+    # Celowo mały kawałek, który nie dzieli liczby wierszy bez reszty
+    result = read_csv_data(io.BytesIO(raw), ';', ',', chunksize=37, progress_callback=progress.append)
+
+    expected = pd.read_csv(io.BytesIO(raw), sep=';', decimal=',', index_col=0)
+    pd.testing.assert_frame_equal(result, expected)
+    assert progress == list(range(37, len(numeric_frame), 37)) + [len(numeric_frame)]
+
+@pytest.mark.parametrize('sep, decimal', [(';', ','), (';', '.'), (',', '.'), ('\t', ','), ('|', '.')])
+def test_sniffer_detects_separator_and_decimal(numeric_frame, sep, decimal):
+    source = io.BytesIO(_csv_bytes(numeric_frame.head(50), sep, decimal))
+    assert sniff_csv_format(source) == (sep, decimal)
+    # Wykrywanie nie przesuwa pozycji bufora
+    assert source.tell() == 0
+
+def test_sniffer_ignores_separators_inside_quotes():
+    raw = b'id;opis;x\n1;"a;b;c";1,5\n2;"d;e";2,5\n3;"f";3,5\n'
+    assert sniff_csv_format(io.BytesIO(raw)) == (';', ',')
+
+def test_sniffer_keeps_explicit_values():
+    raw = b'id;x\n1;1,5\n'
+    assert sniff_csv_format(io.BytesIO(raw), separator=',', decimal='.') == (',', '.')
+    # Jawny separator jest używany przy wykrywaniu separatora dziesiętnego
+    assert sniff_csv_format(io.BytesIO(raw), separator=';') == (';', ',')
+    assert sniff_csv_format(io.BytesIO(raw), decimal='.') == (';', '.')
+
+def test_sniffer_drops_truncated_last_line():
+    raw = b'id;x\n1;1,5\n2;2,5\n3;33'
+    assert _read_head(io.BytesIO(raw), n_bytes=len(raw)).splitlines() == ['id;x', '1;1,5', '2;2,5']
+    # Krótszy plik jest czytany w całości
+    assert _read_head(io.BytesIO(raw), n_bytes=len(raw) + 1).splitlines()[-1] == '3;33'
+
+def test_sniffer_rejects_empty_file():
+    with pytest.raises(ValueError):
+        sniff_csv_format(io.BytesIO(b'\n\n'))
+
+def test_sniffer_on_integer_only_data_defaults_to_dot():
+    raw = b'id;x;y\n1;10;20\n2;11;21\n'
+    assert sniff_csv_format(io.BytesIO(raw)) == (';', '.')
+    result = read_csv_data(io.BytesIO(raw), ';')
+    assert result['x'].dtype == np.int64
@@ -0,0 +1,26 @@
+# tests/test_data_loader.py
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import convert_like, detect_and_convert_numeric
+
+def test_float_downcast_keeps_precision():
+    df = pd.DataFrame({
+        'dokladne': ['0,5', '1,25', '', '-2,75'],
+        'ulamki': ['697,7', '1,1', '2,2', ''],
+        'calkowite': ['1', '2', '3', '400'],
+    })
+    converted = detect_and_convert_numeric(df, decimal=',')
+    assert converted['dokladne'].dtype == np.float32
+    assert converted['ulamki'].dtype == np.float64
+    assert converted['ulamki'].iloc[0] == 697.7
+    assert converted['calkowite'].dtype == np.int16
+
+def test_convert_like_widens_on_append():
+    first = detect_and_convert_numeric(pd.DataFrame({'x': ['0.5', '1.5']}))
+    assert first['x'].dtype == np.float32
+    rows = convert_like(pd.DataFrame({'x': ['697.7']}), first.dtypes)
+    combined = pd.concat([first, rows], ignore_index=True)
+    assert combined['x'].dtype == np.float64
+    assert combined['x'].iloc[-1] == 697.7
@@ -0,0 +1,17 @@
+# tests/test_dataset_cache.py
+
+import pandas as pd
+
+from src.dataset_cache import DatasetCache
+
+def test_dataset_key_and_round_trip(tmp_path, numeric_frame):
+    key = DatasetCache.make_key('plik', ';', ',')
+    assert key != DatasetCache.make_key('plik', ',', ',')
+    assert key != DatasetCache.make_key('plik', ';', '.')
+    assert key != DatasetCache.make_key('inny', ';', ',')
+
+    cache = DatasetCache(cache_dir=tmp_path)
+    assert cache.get(key) is None
+    frame = numeric_frame.assign(grupa=numeric_frame['grupa'].astype('category'))
+    cache.put(key, frame)
+    pd.testing.assert_frame_equal(cache.get(key), frame)
@@ -0,0 +1,47 @@
+# tests/test_dataset_registry.py
+
+import numpy as np
+import pandas as pd
+
+from src.dataset_registry import DatasetRegistry
+
+def _frame(n_rows: int) -> pd.DataFrame:
+    return pd.DataFrame({'x': np.zeros(n_rows)}, index=pd.RangeIndex(n_rows))
+
+def test_sessions_share_one_frame():
+    registry = DatasetRegistry(max_bytes=10_000, idle_seconds=60)
+    first = registry.register('plik', _frame(100))
+    second = registry.acquire('plik')
+    assert second.frame is first.frame and first.shared
+    assert registry.stats()['references'] == 2
+    first.release()
+    first.release()
+    assert registry.stats()['references'] == 1
+
+def test_budget_evicts_unused_datasets_first():
+    registry = DatasetRegistry(max_bytes=10_000, idle_seconds=60)
+    registry.register('stary', _frame(1_000)).release()
+    handle = registry.register('nowy', _frame(1_000))
+    assert handle.shared
+    assert registry.acquire('stary') is None
+    assert registry.total_bytes <= registry.max_bytes
+
+def test_budget_is_enforced_for_datasets_in_use():
+    registry = DatasetRegistry(max_bytes=10_000, idle_seconds=60)
+    used = registry.register('używany', _frame(1_000))
+    frame = _frame(1_000)
+    private = registry.register('nowy', frame)
+    assert not private.shared and private.frame is frame
+    assert registry.total_bytes <= registry.max_bytes
+    assert registry.acquire('nowy') is None
+    private.release()
+    assert registry.stats() == {'datasets': 1, 'references': 1, 'bytes': used.frame.memory_usage(deep=True).sum()}
+
+def test_budget_counts_string_contents():
+    registry = DatasetRegistry(max_bytes=1_000_000, idle_seconds=60)
+    frame = pd.DataFrame({'opis': ['x' * 100] * 10_000})
+    # Same wskaźniki to 80 KB, a napisy ok. 1,5 MB - zbiór nie mieści się w budżecie
+    assert frame.memory_usage(deep=False).sum() < registry.max_bytes
+    handle = registry.register('tekst', frame)
+    assert not handle.shared
+    assert registry.total_bytes == 0
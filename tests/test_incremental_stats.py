@@ -0,0 +1,114 @@
+# tests/test_incremental_stats.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.incremental_stats import ColumnMoments, CoMoments, StatisticsEngine
+
+NUMERIC = ['a', 'b', 'c']
+
+def _values(df: pd.DataFrame) -> np.ndarray:
+    return df[NUMERIC].to_numpy(dtype=np.float64)
+
+def test_moments_merge_matches_single_pass(numeric_frame):
+    values = _values(numeric_frame)
+    merged = ColumnMoments.from_array(values[:137])
+    for start in range(137, len(values), 300):
+        merged = merged.merge(ColumnMoments.from_array(values[start:start + 300]))
+    full = ColumnMoments.from_array(values)
+
+    np.testing.assert_allclose(merged.count, full.count)
+    np.testing.assert_allclose(merged.mean, full.mean)
+    np.testing.assert_allclose(merged.std, numeric_frame[NUMERIC].std().to_numpy())
+    np.testing.assert_allclose(merged.minimum, numeric_frame[NUMERIC].min().to_numpy())
+    np.testing.assert_allclose(merged.maximum, numeric_frame[NUMERIC].max().to_numpy())
+
+def test_moments_merge_with_empty_part():
+    values = np.array([[1.0], [2.0], [4.0]])
+    empty = ColumnMoments.from_array(np.full((2, 1), np.nan))
+    merged = empty.merge(ColumnMoments.from_array(values))
+    assert merged.count[0] == 3
+    assert merged.mean[0] == pytest.approx(7 / 3)
+    assert merged.std[0] == pytest.approx(np.std(values, ddof=1))
+
+def test_comoments_merge_with_different_shifts(numeric_frame):
+    values = _values(numeric_frame)
+    first = CoMoments.from_array(values[:400])
+    second = CoMoments.from_array(values[400:])  # własne przesunięcie (średnie drugiej części)
+    corr = first.merge(second).correlation()
+    np.testing.assert_allclose(corr, numeric_frame[NUMERIC].corr().to_numpy(), atol=1e-12)
+
+def test_engine_describe_matches_pandas(numeric_frame):
+    engine = StatisticsEngine.from_frame(numeric_frame, block_rows=128)
+    expected = numeric_frame[NUMERIC].describe().T
+    pd.testing.assert_frame_equal(engine.describe(), expected, check_names=False)
+
+def test_engine_updates_in_chunks(numeric_frame):
+    engine = StatisticsEngine(NUMERIC, block_rows=128)
+    for start in range(0, len(numeric_frame), 250):
+        engine.update(numeric_frame.iloc[start:start + 250])
+    described = engine.describe()
+    expected = numeric_frame[NUMERIC].describe().T
+    for column in ['count', 'mean', 'std', 'min', 'max']:
+        np.testing.assert_allclose(described[column], expected[column])
+    np.testing.assert_allclose(engine.correlation('pearson').to_numpy(), numeric_frame[NUMERIC].corr().to_numpy(), atol=1e-12)
+
+@pytest.mark.parametrize('n', [1, 100, 128, 700])
+def test_head_and_tail_engines(numeric_frame, n):
+    engine = StatisticsEngine.from_frame(numeric_frame, block_rows=128)
+    head = numeric_frame.iloc[:n]
+    tail = numeric_frame.iloc[-n:]
+    for derived, frame in [(engine.head(n, head), head), (engine.tail(n, tail), tail)]:
+        assert derived.n_rows == n
+        expected = frame[NUMERIC].describe().T
+        np.testing.assert_allclose(derived.describe()['mean'], expected['mean'])
+        np.testing.assert_allclose(derived.describe()['count'], expected['count'])
+
+def test_projection_keeps_statistics(numeric_frame):
+    engine = StatisticsEngine.from_frame(numeric_frame)
+    full_corr = engine.correlation('pearson')
+    projected = engine.project(['c', 'a'])
+    assert projected.columns == ['c', 'a']
+    pd.testing.assert_frame_equal(projected.correlation('pearson'), full_corr.loc[['c', 'a'], ['c', 'a']])
+    with pytest.raises(ValueError):
+        engine.describe(['grupa'])
+
+def test_pickled_engine_drops_frame_and_ranks(numeric_frame):
+    import pickle
+    engine = StatisticsEngine.from_frame(numeric_frame)
+    expected = engine.correlation('spearman')
+    assert engine._ranks
+    restored = pickle.loads(pickle.dumps(engine))
+    assert restored._frame is None and restored._ranks == {}
+    assert engine._ranks  # oryginał zachowuje rangi
+    pd.testing.assert_frame_equal(restored.correlation('spearman'), expected)
+
+@pytest.mark.parametrize('block_rows', [64, 10_000])
+def test_spearman_with_missing_values_matches_pandas(numeric_frame, block_rows):
+    frame = numeric_frame[NUMERIC].copy()
+    frame['d'] = np.round(frame['b'])  # remisy
+    frame.loc[frame.index[:30], 'd'] = np.nan
+    frame['e'] = frame['b'].where(frame['a'].notna())  # ten sam wzorzec braków co 'a'
+    engine = StatisticsEngine.from_frame(frame, block_rows=block_rows)
+    pd.testing.assert_frame_equal(engine.correlation('spearman'), frame.corr('spearman'), atol=1e-12, rtol=0)
+    pd.testing.assert_frame_equal(engine.correlation('spearman', ['c', 'd']), frame[['c', 'd']].corr('spearman'),
+                                  atol=1e-12, rtol=0)
+
+def test_spearman_with_many_missing_patterns_matches_pandas(monkeypatch):
+    import src.incremental_stats as incremental_stats
+    rng = np.random.default_rng(1)
+    n_rows, n_columns = 300, 40
+    values = rng.integers(0, 20, size=(n_rows, n_columns)).astype(np.float64)  # remisy
+    values[rng.random((n_rows, n_columns)) < rng.uniform(0, 0.4, n_columns)] = np.nan
+    frame = pd.DataFrame(values, columns=[f'k{i}' for i in range(n_columns)])
+    frame['pełna'] = rng.normal(size=n_rows)
+    frame['kopia'] = frame['k0'] * 2  # ten sam wzorzec braków co 'k0'
+    expected = frame.corr('spearman')
+
+    pd.testing.assert_frame_equal(StatisticsEngine.from_frame(frame).correlation('spearman'), expected,
+                                  atol=1e-12, rtol=0)
+    # Rangi przeliczane w kilku porcjach kolumn
+    monkeypatch.setattr(incremental_stats, 'RERANK_BLOCK_VALUES', 8 * n_rows)
+    pd.testing.assert_frame_equal(StatisticsEngine.from_frame(frame, block_rows=64).correlation('spearman'),
+                                  expected, atol=1e-12, rtol=0)
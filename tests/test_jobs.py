@@ -0,0 +1,66 @@
+# tests/test_jobs.py
+
+import gc
+import pickle
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import src.jobs as jobs
+from src.jobs import JobCancelled, JobManager, SharedFrame, open_frame, run_statistics
+
+def _busy(context, seconds: float) -> dict:
+    """Obliczenia bez raportowania postępu (jak dopasowanie reduktora)."""
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(1_000))
+    return {'total': total}
+
+@pytest.fixture(scope='module')
+def manager():
+    return JobManager(max_workers=1)
+
+def test_running_job_is_interrupted(manager):
+    job = manager.submit('reduction', 'Długie obliczenia', _busy, 60.0)
+    while not job.future.running():
+        time.sleep(0.05)
+    time.sleep(0.5)
+    manager.cancel(job)
+    with pytest.raises(JobCancelled):
+        job.future.result(timeout=10)
+
+    # Proces roboczy pozostaje w puli i przyjmuje kolejne zadania
+    assert manager.submit('reduction', 'Krótkie obliczenia', _busy, 0.1).future.result(timeout=60)['total'] > 0
+
+def test_finished_job_is_not_interrupted(manager):
+    job = manager.submit('reduction', 'Krótkie obliczenia', _busy, 0.1)
+    assert job.future.result(timeout=60)['total'] > 0
+    manager.cancel(job)
+    assert manager.submit('reduction', 'Kolejne obliczenia', _busy, 0.1).future.result(timeout=60)['total'] > 0
+
+def test_frame_is_shared_through_one_file(manager, numeric_frame, monkeypatch, tmp_path):
+    monkeypatch.setattr(jobs, 'CACHE_DIR', tmp_path)
+    frame = numeric_frame.assign(grupa=numeric_frame['grupa'].astype('category'))
+    shared = manager.share_frame(frame)
+    assert isinstance(shared, SharedFrame)
+    # Kolejne zadania na tym samym obiekcie ramki korzystają z tego samego pliku
+    assert manager.share_frame(frame).path == shared.path
+    # Do procesu roboczego trafia tylko ścieżka
+    assert pickle.loads(pickle.dumps(shared)).frame is None
+    pd.testing.assert_frame_equal(open_frame(shared), frame)
+
+    job = manager.submit('statistics', 'Statystyki', run_statistics, shared, None, 'Statystyki opisowe', None, None)
+    expected = run_statistics(jobs.JobContext('test'), frame, None, 'Statystyki opisowe', None, None)['result']
+    pd.testing.assert_frame_equal(job.future.result(timeout=60)['result'], expected)
+
+    # Plik jest usuwany razem z ramką
+    path = Path(shared.path)
+    del frame, shared, job
+    gc.collect()
+    assert not path.exists()
+
+def test_frame_is_passed_directly_without_pool(numeric_frame):
+    assert JobManager(max_workers=0).share_frame(numeric_frame) is numeric_frame
@@ -0,0 +1,73 @@
+# tests/test_pipeline.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.pipeline import ModificationPipeline
+
+def test_sample_and_projection_are_views(numeric_frame):
+    pipeline = ModificationPipeline(numeric_frame)
+    pipeline.sample('Pierwsze n', 100)
+    pd.testing.assert_frame_equal(pipeline.frame(), numeric_frame.iloc[:100])
+
+    pipeline.remove_columns(['c'])
+    frame = pipeline.frame()
+    assert frame.columns.tolist() == ['a', 'b', 'grupa']
+    assert len(frame) == 100
+    # Projekcja i wycinek wierszy nie kopiują danych źródłowych
+    assert np.shares_memory(frame['b'].to_numpy(), numeric_frame['b'].to_numpy())
+
+def test_last_and_random_samples(numeric_frame):
+    pipeline = ModificationPipeline(numeric_frame)
+    pipeline.sample('Ostatnie n', 30)
+    pd.testing.assert_frame_equal(pipeline.frame(), numeric_frame.iloc[-30:])
+    pipeline.sample('Losowe n', 10)
+    sampled = pipeline.frame()
+    assert len(sampled) == 10
+    assert sampled.index.isin(numeric_frame.index[-30:]).all()
+
+def test_undo_redo_and_branches(numeric_frame):
+    pipeline = ModificationPipeline(numeric_frame)
+    root = pipeline.current_id
+    first = pipeline.sample('Pierwsze n', 500).node_id
+    second = pipeline.remove_columns(['a']).node_id
+
+    pipeline.undo()
+    assert pipeline.current_id == first
+    pipeline.undo()
+    assert pipeline.current_id == root
+    assert not pipeline.can_undo()
+    with pytest.raises(ValueError):
+        pipeline.undo()
+
+    pipeline.redo()
+    pipeline.redo()
+    assert pipeline.current_id == second
+    assert not pipeline.can_redo()
+
+    # Modyfikacja po cofnięciu tworzy nową gałąź; poprzednia pozostaje dostępna
+    pipeline.undo()
+    branch = pipeline.remove_columns(['b']).node_id
+    assert pipeline.frame().columns.tolist() == ['a', 'c', 'grupa']
+    pipeline.checkout(second)
+    assert pipeline.frame().columns.tolist() == ['b', 'c', 'grupa']
+    assert [node.node_id for node in pipeline.path(branch)] == [root, first, branch]
+    # Po przełączeniu gałęzi ponowienie z węzła nadrzędnego prowadzi do wybranej gałęzi
+    pipeline.undo()
+    pipeline.redo()
+    assert pipeline.current_id == second
+
+def test_remove_columns_validation(numeric_frame):
+    pipeline = ModificationPipeline(numeric_frame)
+    with pytest.raises(ValueError):
+        pipeline.remove_columns(['nie_ma'])
+    assert pipeline.current_id == 0
+
+def test_derived_engine_for_head(numeric_frame):
+    from src.incremental_stats import StatisticsEngine
+    pipeline = ModificationPipeline(numeric_frame, engine=StatisticsEngine.from_frame(numeric_frame))
+    pipeline.sample('Pierwsze n', 250)
+    engine = pipeline.engine()
+    assert engine is not None and engine.n_rows == 250
+    np.testing.assert_allclose(engine.describe()['mean'], numeric_frame.iloc[:250][['a', 'b', 'c']].mean())
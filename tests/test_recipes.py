@@ -0,0 +1,55 @@
+# tests/test_recipes.py
+
+import pandas as pd
+import pytest
+
+from src.pipeline import ModificationPipeline
+from src.recipes import Recipe, RecipeStep, apply_modification, modification_steps, recipe_from_history
+
+def test_json_round_trip():
+    recipe = Recipe(
+        load={'separator': ';', 'decimal': ',', 'sampler': ['Losowe n', 100, None]},
+        steps=[
+            RecipeStep('sample', {'method': 'Pierwsze n', 'n_samples': 10}),
+            RecipeStep('plot', {'plot_type': 'Histogram', 'params': {'x': 'a', 'title': 'Żółć'}}, 'Wykres: Histogram'),
+        ],
+    )
+    restored = Recipe.from_json(recipe.to_json())
+    assert restored == recipe
+
+def test_invalid_recipes():
+    with pytest.raises(ValueError):
+        RecipeStep('usun_wszystko')
+    with pytest.raises(ValueError):
+        Recipe.from_json('{nie json')
+    with pytest.raises(ValueError):
+        Recipe.from_dict({'version': 999, 'steps': []})
+    with pytest.raises(ValueError):
+        Recipe.from_dict({'steps': {'action': 'sample'}})
+
+def test_history_with_branches_adds_reset(numeric_frame):
+    pipeline = ModificationPipeline(numeric_frame)
+    pipeline.sample('Pierwsze n', 100)
+    first = modification_steps(pipeline)
+    pipeline.remove_columns(['c'])
+    second = modification_steps(pipeline)
+    pipeline.checkout(0)
+    pipeline.remove_columns(['a'])
+    other_branch = modification_steps(pipeline)
+
+    stats = RecipeStep('statistics', {'stat_type': 'Statystyki opisowe'}, 'Statystyki')
+    recipe = recipe_from_history({}, [(first, stats), (second, stats), (other_branch, stats)])
+    assert [step.action for step in recipe.steps] == [
+        'sample', 'statistics', 'remove_columns', 'statistics', 'reset', 'remove_columns', 'statistics',
+    ]
+
+def test_replay_matches_pipeline(numeric_frame):
+    pipeline = ModificationPipeline(numeric_frame)
+    pipeline.sample('Ostatnie n', 300)
+    pipeline.remove_columns(['b'])
+    pipeline.sample('Losowe n', 50)
+
+    replayed = numeric_frame
+    for step in Recipe.from_json(Recipe(steps=modification_steps(pipeline)).to_json()).steps:
+        replayed = apply_modification(replayed, step)
+    pd.testing.assert_frame_equal(replayed, pipeline.frame())
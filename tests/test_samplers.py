@@ -0,0 +1,84 @@
+# tests/test_samplers.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.samplers import (
+    MAX_STRATA, STRATUM_SPARE_ROWS, HeadSampler, ReservoirSampler, StratifiedSampler, StreamSampler, TailSampler,
+)
+
+def _stream(sampler: StreamSampler, df: pd.DataFrame, chunk_rows: int) -> pd.DataFrame:
+    for start in range(0, len(df), chunk_rows):
+        sampler.update(df.iloc[start:start + chunk_rows])
+    return sampler.result()
+
+def _frame(strata: dict, seed: int = 0) -> pd.DataFrame:
+    labels = np.concatenate([[label] * count for label, count in strata.items()])
+    labels = np.random.default_rng(seed).permutation(labels)
+    return pd.DataFrame({'x': np.arange(len(labels)), 'warstwa': labels})
+
+def test_stream_sampler_is_abstract():
+    with pytest.raises(TypeError):
+        StreamSampler(10)
+
+def test_head_tail_and_reservoir_sizes():
+    df = pd.DataFrame({'x': np.arange(1_000)})
+    pd.testing.assert_frame_equal(_stream(HeadSampler(30), df, 7), df.iloc[:30])
+    pd.testing.assert_frame_equal(_stream(TailSampler(30), df, 7), df.iloc[-30:])
+    sample = _stream(ReservoirSampler(30), df, 7)
+    assert len(sample) == 30 and sample.index.is_unique and sample.index.is_monotonic_increasing
+    assert len(_stream(ReservoirSampler(5_000), df, 64)) == 1_000
+
+def test_stratified_proportional_allocation():
+    sample = _stream(StratifiedSampler(100, 'warstwa'), _frame({'a': 7_000, 'b': 2_000, 'c': 1_000}), 500)
+    assert sample['warstwa'].value_counts().to_dict() == {'a': 70, 'b': 20, 'c': 10}
+    assert sample['x'].is_monotonic_increasing and sample['x'].is_unique
+
+def test_stratified_size_never_exceeds_n():
+    # Więcej warstw niż wierszy próbki - każda z n warstw dostaje po jednym wierszu
+    sample = _stream(StratifiedSampler(5, 'warstwa'), _frame({f"w{i}": 10 for i in range(10)}), 13)
+    assert len(sample) == 5
+    assert sample['warstwa'].is_unique
+    # Rzadka warstwa dostaje co najmniej jeden wiersz kosztem największych reszt
+    sample = _stream(StratifiedSampler(10, 'warstwa'), _frame({'a': 995, 'b': 3, 'c': 2}), 100)
+    assert len(sample) == 10
+    assert sample['warstwa'].value_counts().to_dict() == {'a': 8, 'b': 1, 'c': 1}
+    # Mniej wierszy niż n - cały zbiór
+    assert len(_stream(StratifiedSampler(100, 'warstwa'), _frame({'a': 30, 'b': 20}), 7)) == 50
+
+def test_stratified_memory_is_bounded():
+    n = 200
+    sampler = StratifiedSampler(n, 'warstwa')
+    df = _frame({f"w{i}": 4_000 for i in range(MAX_STRATA)})
+    peak = 0
+    for start in range(0, len(df), 1_000):
+        sampler.update(df.iloc[start:start + 1_000])
+        peak = max(peak, sampler._buffered)
+    # Bez ograniczenia każda warstwa trzymałaby do 2n wierszy (tu 50 * 400)
+    assert peak <= 2 * (2 * n + MAX_STRATA * (STRATUM_SPARE_ROWS + 1))
+    assert len(sampler.result()) == n
+
+def _inclusion(make_sampler, df: pd.DataFrame, chunk_rows: int, repeats: int) -> np.ndarray:
+    counts = np.zeros(len(df))
+    for seed in range(repeats):
+        counts[_stream(make_sampler(seed), df, chunk_rows)['x'].to_numpy()] += 1
+    return counts / repeats
+
+def test_reservoir_is_uniform():
+    df = pd.DataFrame({'x': np.arange(200)})
+    frequency = _inclusion(lambda seed: ReservoirSampler(20, seed=seed), df, 50, 1_000)
+    # Każdy wiersz z prawdopodobieństwem 0.1 (odchylenie standardowe częstości ok. 0.0067)
+    assert np.abs(frequency - 0.1).max() < 0.045
+    assert abs(frequency[:100].mean() - frequency[100:].mean()) < 0.01
+
+def test_stratified_is_uniform_within_strata():
+    df = _frame({'a': 300, 'b': 100})
+    frequency = _inclusion(lambda seed: StratifiedSampler(20, 'warstwa', seed=seed), df, 50, 400)
+    for label, expected in [('a', 15 / 300), ('b', 5 / 100)]:
+        rows = np.flatnonzero(df['warstwa'].to_numpy() == label)
+        assert frequency[rows].mean() == pytest.approx(expected)
+        # Wiersze z początku i z końca pliku są wybierane równie często (także po odrzuceniu wierszy ponad próg)
+        first, last = np.array_split(frequency[rows], 2)
+        assert abs(first.mean() - last.mean()) < 0.01
+        assert np.abs(frequency[rows] - expected).max() < 0.05
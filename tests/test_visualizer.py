@@ -0,0 +1,63 @@
+# tests/test_visualizer.py
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from src.jobs import JobContext, run_plot
+from src.visualizer import aggregate_frame, create_plot
+
+def test_node_cache_survives_worker_round_trip(numeric_frame):
+    # Proces roboczy dostaje kopię słownika i zwraca ją uzupełnioną
+    result = run_plot(JobContext('test'), numeric_frame, None, 'Histogram', {'x': 'b'}, {})
+    plot_cache = pickle.loads(pickle.dumps(result['plot_cache']))
+    key = next(key for key in plot_cache if key[0] == 'bin_edges')
+    assert key[1] == 'b'
+
+    # Kolejny wykres (np. z grupowaniem kolorem) korzysta z zapamiętanych granic zamiast je wyznaczać
+    plot_cache[key] = np.array([-100.0, 0.0, 5.0, 100.0])
+    fig = create_plot(numeric_frame.copy(), 'Histogram', {'x': 'b', 'color': 'grupa'}, plot_cache)
+    assert all(len(trace.x) == 3 for trace in fig.data)
+    assert sum(trace.y.sum() for trace in fig.data) == len(numeric_frame)
+
+def test_worker_returns_only_new_cache_entries_and_node_cache_is_bounded(numeric_frame):
+    from src.pipeline import PIPELINE_PLOT_CACHE_ENTRIES, ModificationPipeline
+    known = {('bin_edges', 'a', 100): np.arange(3)}
+    result = run_plot(JobContext('test'), numeric_frame, None, 'Histogram', {'x': 'b'}, dict(known))
+    assert result['plot_cache'] and not set(result['plot_cache']) & set(known)
+
+    pipeline = ModificationPipeline(numeric_frame)
+    for i in range(PIPELINE_PLOT_CACHE_ENTRIES + 5):
+        pipeline.set_plot_cache(0, {('bin_edges', 'a', i): np.arange(3)})
+    assert len(pipeline.current.plot_cache) == PIPELINE_PLOT_CACHE_ENTRIES
+    assert ('bin_edges', 'a', PIPELINE_PLOT_CACHE_ENTRIES + 4) in pipeline.current.plot_cache
+
+def test_aggregate_uses_explicit_cache(numeric_frame):
+    cache = {}
+    grouped, n_bins = aggregate_frame(numeric_frame, 'grupa', 'b', None, 'mean', cache)
+    assert n_bins is None
+    np.testing.assert_allclose(grouped['b'], numeric_frame.groupby('grupa')['b'].mean())
+    assert aggregate_frame(numeric_frame.copy(), 'grupa', 'b', None, 'mean', cache)[0] is grouped
+
+def test_extend_source_clears_node_plot_cache(numeric_frame):
+    from src.pipeline import ModificationPipeline
+    pipeline = ModificationPipeline(numeric_frame.iloc[:500])
+    pipeline.set_plot_cache(0, {('bin_edges', 'a', 100): np.arange(3)})
+    pipeline.extend_source(numeric_frame)
+    assert pipeline.current.plot_cache == {}
+    pd.testing.assert_frame_equal(pipeline.frame(), numeric_frame)
+
+def test_extend_source_keeps_tail_sample_statistics(numeric_frame):
+    from src.incremental_stats import StatisticsEngine
+    from src.pipeline import ModificationPipeline
+    source = numeric_frame.iloc[:500]
+    pipeline = ModificationPipeline(source, engine=StatisticsEngine.from_frame(source))
+    sample = pipeline.sample('Ostatnie n', 100)
+    pipeline.extend_source(numeric_frame)
+    # Silnik próbki budowany po dopisaniu wierszy dotyczy wierszy 400-499, a nie ostatnich 100 nowych
+    expected = numeric_frame.iloc[400:500]
+    pd.testing.assert_frame_equal(pipeline.frame(sample.node_id), expected)
+    described = pipeline.engine(sample.node_id).describe()
+    np.testing.assert_allclose(described['mean'], expected[['a', 'b', 'c']].mean())
+    np.testing.assert_allclose(described['max'], expected[['a', 'b', 'c']].max())
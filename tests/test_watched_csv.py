@@ -0,0 +1,75 @@
+# tests/test_watched_csv.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.watched_csv import FrameBuffer, WatchedCsv
+
+HEADER = "id;wartosc;licznik;grupa\n"
+
+def _line(i: int, group: str = 'a') -> str:
+    return f"{i};{i},5;{i % 7};{group}\n"
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'pomiary.csv'
+    path.write_text(HEADER + ''.join(_line(i, 'ab'[i % 2]) for i in range(40)), encoding='utf-8')
+    return path
+
+def _append(path, text: str) -> None:
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+def test_partial_line_waits_for_newline(csv_path):
+    _append(csv_path, "40;40,")
+    watched, df = WatchedCsv.open(str(csv_path))
+    assert len(df) == 40 and watched.separator == ';' and watched.decimal == ','
+    assert watched.poll() is None
+
+    _append(csv_path, "5;5;a\n41;41,5;6;b\n")
+    rows = watched.poll()
+    assert rows.index.tolist() == [40, 41]
+    assert rows['wartosc'].tolist() == [40.5, 41.5]
+    assert watched.n_rows == 42
+    assert watched.poll() is None
+
+    _append(csv_path, "\n\n")
+    assert watched.poll() is None
+
+def test_appended_rows_keep_types_and_categories(csv_path):
+    watched, df = WatchedCsv.open(str(csv_path))
+    assert isinstance(df['grupa'].dtype, pd.CategoricalDtype)
+    _append(csv_path, _line(40, 'c') + "41;;1000000;a\n")
+    rows = watched.poll()
+    frame = watched.buffer.append(rows)
+
+    expected_groups = ['a', 'b'] * 20 + ['c', 'a']
+    assert frame['grupa'].astype(str).tolist() == expected_groups
+    assert list(frame['grupa'].cat.categories) == ['a', 'b', 'c']
+    # Typy poszerzone jak przy pd.concat (brak wartości, liczba spoza zakresu int8)
+    assert np.isnan(frame['wartosc'].iloc[-1])
+    assert frame['licznik'].iloc[-1] == 1_000_000
+    pd.testing.assert_frame_equal(frame.iloc[:40], df, check_dtype=False, check_categorical=False)
+
+def test_truncated_file_is_detected(csv_path):
+    watched, _ = WatchedCsv.open(str(csv_path))
+    csv_path.write_text(HEADER + _line(0), encoding='utf-8')
+    with pytest.raises(ValueError):
+        watched.poll()
+
+def test_buffer_appends_without_copying_existing_rows():
+    base = pd.DataFrame({'x': np.arange(10, dtype=np.float64), 'g': pd.Categorical(list('ab') * 5)},
+                        index=pd.Index(np.arange(10), name='id'))
+    buffer = FrameBuffer(base)
+    first = buffer.append(pd.DataFrame({'x': [10.0], 'g': ['a']}, index=pd.Index([10], name='id')))
+    second = buffer.append(pd.DataFrame({'x': [11.0, 12.0], 'g': ['c', None]}, index=pd.Index([11, 12], name='id')))
+
+    # Drugie dopisanie mieści się w zapasie pojemności - obie ramki korzystają z tych samych tablic
+    assert np.shares_memory(first['x'].to_numpy(), second['x'].to_numpy())
+    assert np.shares_memory(first['g'].cat.codes.to_numpy(), second['g'].cat.codes.to_numpy())
+    assert len(first) == 11 and first['g'].tolist()[-1] == 'a'
+    assert second.index.tolist() == list(range(13)) and second.index.name == 'id'
+    assert second['x'].tolist() == list(np.arange(13, dtype=float))
+    assert second['g'].iloc[-2] == 'c' and pd.isna(second['g'].iloc[-1])
+    assert buffer.append(second.iloc[:0]) is second